@@ -0,0 +1,926 @@
+"""
+Benchmarks del pipeline de catálogo → WooCommerce
+Uso:
+    python benchmark.py import --csv ../data/productos_starcenter.csv --rows 1000 --batch-size 500
+    python benchmark.py matching --sizes 700,50000
+    python benchmark.py parallel --rows 20000 --workers 1,2,4,8
+    python benchmark.py tagger --products 1000 --keywords 15,1000
+    python benchmark.py structure --rows 100000
+    python benchmark.py categories --nodes 1000,10000,50000
+    python benchmark.py slugs --names 100000
+    python benchmark.py stock --rows 10000 --legacy-sample 200
+    python benchmark.py images --images 500 --latency 0.05 --concurrency 1,16
+    python benchmark.py thumbnails --images 200 --workers 1,2,4,8
+    python benchmark.py linkage --sizes 5000,50000 --legacy-sample 200
+    python benchmark.py normalize --rows 6650
+    python benchmark.py coldstart --runs 3
+    python benchmark.py suite --sizes 1000,10000,100000 --database nopa_bench
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import random
+import re
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+import pandas as pd
+from slugs import SlugService, slugify
+
+BENCH_SKU_PREFIX = 'BENCH-'
+
+def load_benchmark_rows(csv_file, limit=None):
+    """
+    Convierte las filas del CSV de productos al formato del importador.
+    Si limit supera las filas del archivo, se repiten con SKU y slug únicos.
+    """
+    records = pd.read_csv(csv_file, dtype=str, keep_default_na=False).to_dict('records')
+    records = itertools.islice(itertools.cycle(records), limit or len(records))
+    rows = []
+    for i, record in enumerate(records):
+        name = record.get('Name', '') or f'Producto {i}'
+        slug = slugify(name)
+        rows.append({
+            'sku': f"{BENCH_SKU_PREFIX}{i}-{record.get('SKU', '')}",
+            'name': name,
+            'slug': f'{slug}-{i}',
+            'description': record.get('Description', ''),
+            'short_description': record.get('Short description', ''),
+            'price': record.get('Regular price', ''),
+            'regular_price': record.get('Regular price', ''),
+            'stock': str(int(float(record.get('Stock', '') or 0)))
+        })
+    return rows
+
+def report(label, rows, seconds):
+    """Imprime una línea de resultado"""
+    rate = rows / seconds if seconds > 0 else float('inf')
+    print(f"{label:<30} {rows:>8} filas  {seconds:>9.3f} s  {rate:>10.1f} filas/s")
+    return rate
+
+def cleanup_products(importer, product_ids):
+    """Elimina los productos creados por el benchmark"""
+    importer.delete_products(product_ids)
+    importer.flush_term_counts()
+
+def cleanup_benchmark_skus(importer):
+    """Elimina todos los productos con SKU de benchmark"""
+    importer.refresh_sku_index()
+    cleanup_products(importer, [product_id for sku, product_id in importer.sku_index.items()
+                                if sku.startswith(BENCH_SKU_PREFIX)])
+
+def bench_import(args):
+    """Compara la creación fila a fila contra la creación en lote"""
+    from woo_importer import WooCommerceImporter
+
+    rows = load_benchmark_rows(args.csv, args.rows)
+    importer = WooCommerceImporter()
+    try:
+        start = time.perf_counter()
+        product_ids = [importer.create_product(data) for data in rows]
+        per_row = report('create_product (fila a fila)', len(rows), time.perf_counter() - start)
+        cleanup_products(importer, product_ids)
+
+        start = time.perf_counter()
+        product_ids = importer.create_products(rows, batch_size=args.batch_size)
+        batched = report(f'create_products (lote {args.batch_size})', len(rows), time.perf_counter() - start)
+        cleanup_products(importer, product_ids)
+
+        print(f"Aceleración: {batched / per_row:.1f}x")
+        print(f"Estadísticas de conexión: {importer.db.get_stats()}")
+    finally:
+        importer.close()
+
+def synthetic_json_products(json_file, size, seed=0):
+    """Genera productos sintéticos con la forma de Starcenter.json a partir de los reales"""
+    with open(json_file, 'r', encoding='utf-8') as f:
+        source = json.load(f)
+    rng = random.Random(seed)
+    products = []
+    for i in range(size):
+        base = rng.choice(source)
+        products.append({
+            **base,
+            'code': f"{base.get('code', '')}-{i}",
+            'stock': rng.randint(0, 500),
+            'price': round(rng.uniform(1, 2000), 2)
+        })
+    return products
+
+def legacy_category_match(integrator, json_product):
+    """Ruta anterior: reajusta el TF-IDF sobre producto + categorías en cada llamada"""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.metrics.pairwise import cosine_similarity
+    from category_matcher import STOP_WORDS
+
+    product_text = integrator.get_category_matcher().product_text(
+        integrator.product_name(json_product), json_product.get('description', ''), json_product.get('tags', '')
+    )
+    category_texts = [
+        ' '.join(filter(None, [
+            integrator.normalize_text(row['Categoría Principal']),
+            integrator.normalize_text(row['Subcategoría']),
+            integrator.normalize_text(row['Sub-subcategoría'])
+        ]))
+        for _, row in integrator.categories_df.iterrows()
+    ]
+    vectorizer = TfidfVectorizer(analyzer='word', token_pattern=r'\w+', ngram_range=(1, 2),
+                                 min_df=2, stop_words=STOP_WORDS)
+    tfidf_matrix = vectorizer.fit_transform([product_text] + category_texts)
+    return cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:])[0].argmax()
+
+def synthetic_linkage_names(json_file, size, seed=0):
+    """
+    Pares (nombre del CSV, nombre del feed) sintéticos: títulos reales con un modelo único,
+    y del lado del feed con errores de tipeo, palabras faltantes o en otro orden
+    """
+    rng = random.Random(seed)
+    titles = [product['title'] for product in json.load(open(json_file, 'r', encoding='utf-8')) if product.get('title')]
+    alphabet = 'ABCDEFGHJKLMNPRSTUVWXYZ0123456789'
+    csv_names, feed_names = [], []
+    for _ in range(size):
+        model = ''.join(rng.choice(alphabet) for _ in range(rng.randint(5, 8)))
+        words = f"{rng.choice(titles)} {model}".split()
+        csv_names.append(' '.join(words))
+        change = rng.random()
+        if change < 0.3 and len(words) > 3:
+            words.pop(rng.randrange(len(words) - 1))
+        elif change < 0.5:
+            words[0], words[-2] = words[-2], words[0]
+        elif change < 0.8:
+            word = rng.randrange(len(words))
+            position = rng.randrange(len(words[word]))
+            words[word] = words[word][:position] + words[word][position + 1:]
+        feed_names.append(' '.join(words).lower() if rng.random() < 0.5 else ' '.join(words))
+    return csv_names, feed_names
+
+def bench_linkage(args):
+    """Vinculación de nombres por índice de bloqueo contra la comparación de todos los pares"""
+    import numpy as np
+    from record_linkage import ProductLinker
+    from text_normalize import normalize_text as normalize
+
+    for size in (int(value) for value in args.sizes.split(',')):
+        csv_names, feed_names = synthetic_linkage_names(args.json, size)
+        start = time.perf_counter()
+        linker = ProductLinker(normalize).fit(csv_names)
+        indices, _ = linker.match(feed_names)
+        report(f'índice de bloqueo ({size}x{size})', size, time.perf_counter() - start)
+        truth = np.arange(size)
+        correct = (indices == truth).sum()
+        predicted = (indices >= 0).sum()
+        print(f"  precisión {correct / max(predicted, 1):.4f}, exhaustividad {correct / size:.4f}")
+
+        # Todos los pares: similitud de cada nombre contra el catálogo completo
+        sample = feed_names[:args.legacy_sample]
+        start = time.perf_counter()
+        similarities = (linker.vectorizer.transform([normalize(name) for name in sample]) @ linker.matrix.T).toarray()
+        best = similarities.argmax(axis=1)
+        elapsed = time.perf_counter() - start
+        report(f'todos los pares (muestra {len(sample)})', len(sample), elapsed)
+        accepted = similarities[np.arange(len(sample)), best] >= linker.threshold
+        print(f"  exhaustividad en la muestra {(accepted & (best == truth[:len(sample)])).mean():.4f} "
+              f"(índice: {(indices[:len(sample)] == truth[:len(sample)]).mean():.4f}), "
+              f"estimado para {size}: {elapsed / len(sample) * size:.1f} s")
+
+def legacy_normalize_text(text):
+    """Ruta anterior: unidecode y regex sin compilar en cada llamada"""
+    import unidecode
+
+    if pd.isna(text):
+        return ""
+    text = str(text).lower()
+    text = unidecode.unidecode(text)
+    text = re.sub(r'[^a-z0-9\s]', ' ', text)
+    return ' '.join(text.split())
+
+def bench_normalize(args):
+    """Normalización de texto valor a valor vs. con caché vs. vectorizada sobre columnas"""
+    from text_normalize import _normalize, normalize_series, normalize_text
+
+    products = pd.read_csv(args.csv)
+    products = products.iloc[[i % len(products) for i in range(args.rows)]].reset_index(drop=True)
+    columns = [column for column in ('Name', 'Description', 'Short description', 'Categories') if column in products]
+    values = sum(len(products[column]) for column in columns)
+
+    start = time.perf_counter()
+    expected = {column: [legacy_normalize_text(value) for value in products[column]] for column in columns}
+    report('normalize_text anterior', values, time.perf_counter() - start)
+
+    _normalize.cache_clear()
+    start = time.perf_counter()
+    cached = {column: [normalize_text(value) for value in products[column]] for column in columns}
+    report('normalize_text con caché', values, time.perf_counter() - start)
+    print(f"  {_normalize.cache_info()}")
+
+    start = time.perf_counter()
+    vectorized = {column: normalize_series(products[column]).tolist() for column in columns}
+    report('normalize_series', values, time.perf_counter() - start)
+
+    identical = all(cached[column] == expected[column] == vectorized[column] for column in columns)
+    print(f"Resultados idénticos byte a byte: {'sí' if identical else 'NO'}")
+
+def bench_stock(args):
+    """Compara la actualización de precio y stock con update_product contra sync_stock_prices"""
+    from woo_importer import WooCommerceImporter
+
+    rows = load_benchmark_rows(args.csv, args.rows)
+    importer = WooCommerceImporter()
+    try:
+        product_ids = importer.create_products(rows)
+        rng = random.Random(0)
+        for data in rows:
+            data['price'] = data['regular_price'] = f"{rng.uniform(1, 500):.2f}"
+            data['stock'] = str(rng.randint(0, 50))
+
+        sample = rows[:args.legacy_sample]
+        start = time.perf_counter()
+        for data in sample:
+            importer.update_product(importer.sku_index[data['sku']], data)
+        legacy = report('update_product (fila a fila)', len(sample), time.perf_counter() - start)
+
+        updates = [(data['sku'], data['price'], data['stock']) for data in rows]
+        start = time.perf_counter()
+        summary = importer.sync_stock_prices(updates)
+        fast = report('sync_stock_prices', len(rows), time.perf_counter() - start)
+        print(f"  {summary}")
+
+        # Segunda pasada sin cambios: el caso de una actualización frecuente
+        start = time.perf_counter()
+        summary = importer.sync_stock_prices(updates)
+        report('sync_stock_prices (sin cambios)', len(rows), time.perf_counter() - start)
+        print(f"  {summary}")
+
+        print(f"Aceleración: {fast / legacy:.1f}x")
+        cleanup_products(importer, product_ids)
+    finally:
+        importer.close()
+
+def bench_matching(args):
+    """Compara la asignación de categorías producto a producto contra el motor por lotes"""
+    from product_integrator import ProductIntegrator
+
+    integrator = ProductIntegrator(tempfile.mkdtemp())
+    integrator.categories_df = pd.read_csv(args.categories)
+    integrator.get_category_matcher()
+
+    for size in [int(value) for value in args.sizes.split(',')]:
+        products = synthetic_json_products(args.json, size)
+
+        # La ruta anterior es cuadrática en la práctica: se mide sobre una muestra y se extrapola
+        sample = products[:min(size, args.legacy_sample)]
+        start = time.perf_counter()
+        for json_product in sample:
+            legacy_category_match(integrator, json_product)
+        legacy_seconds = (time.perf_counter() - start) * size / len(sample)
+        legacy = report(f'reajuste por producto ({size})', size, legacy_seconds)
+
+        start = time.perf_counter()
+        integrator.match_categories(products, top_k=args.top_k)
+        batched = report(f'motor por lotes ({size})', size, time.perf_counter() - start)
+
+        print(f"Aceleración: {batched / legacy:.1f}x")
+
+def run_cold_start(base_dir, json_file, products_csv, categories, size):
+    """
+    Categorización desde un proceso nuevo: importar el integrador, obtener el modelo
+    (ajustado o cargado del directorio de salida) y asignar categorías a los primeros size productos
+    """
+    import sys
+
+    with open(json_file, 'r', encoding='utf-8') as f:
+        products = json.load(f)[:size]
+    start = time.perf_counter()
+    from product_integrator import ProductIntegrator
+    integrator = ProductIntegrator(base_dir)
+    integrator.load_csv_data(products_csv, categories)
+    integrator.get_category_matcher()
+    ready = time.perf_counter() - start
+    integrator.match_categories(products)
+    return {'ready': ready, 'total': time.perf_counter() - start, 'sklearn': 'sklearn' in sys.modules}
+
+def bench_cold_start(args):
+    """Arranque en frío de la categorización sin modelo guardado (ajuste) vs. con el modelo en .npz"""
+    base_dir = tempfile.mkdtemp()
+    context = multiprocessing.get_context('spawn')
+    for run in range(args.runs + 1):
+        # Cada ejecución en un proceso limpio, como una nueva corrida de process_catalog
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            result = executor.submit(run_cold_start, base_dir, args.json, args.csv, args.categories,
+                                     args.products).result()
+        label = 'ajuste del modelo' if run == 0 else f'modelo guardado ({run})'
+        report(label, args.products, result['total'])
+        print(f"  modelo listo en {result['ready']:.3f} s, "
+              f"scikit-learn importado: {'sí' if result['sklearn'] else 'no'}")
+
+def bench_parallel(args):
+    """Mide cómo escala la importación con la cantidad de workers"""
+    from parallel_importer import ParallelImporter
+    from woo_importer import WooCommerceImporter
+
+    rows = load_benchmark_rows(args.csv, args.rows)
+    cleaner = WooCommerceImporter(preload_skus=False)
+    baseline = None
+    try:
+        for workers in [int(value) for value in args.workers.split(',')]:
+            result = ParallelImporter(workers, args.mode, args.batch_size).run(rows)
+            rate = report(f'{workers} workers ({args.mode})', result['rows'], result['seconds'])
+            baseline = baseline or rate
+            print(f"Escalado respecto del primer caso: {rate / baseline:.2f}x, errores: {len(result['errors'])}")
+            cleanup_benchmark_skus(cleaner)
+    finally:
+        cleaner.close()
+
+def legacy_extract_tags(keywords, description, title):
+    """Ruta anterior: una búsqueda de subcadena por palabra clave"""
+    tags = set()
+    text = (description + ' ' + title).upper()
+    for keyword, tag_group in keywords.items():
+        if keyword in text:
+            tags.update(tag_group.split(', '))
+    return ', '.join(sorted(tags or {'tecnología', 'producto'}))
+
+def synthetic_keywords(products, size):
+    """Diccionario de palabras clave real ampliado con las palabras más frecuentes del catálogo"""
+    from keyword_tagger import DEFAULT_KEYWORDS_PATH
+
+    keywords = json.loads(Path(DEFAULT_KEYWORDS_PATH).read_text(encoding='utf-8'))
+    words = {}
+    for product in products:
+        for word in re.findall(r'[A-ZÁÉÍÓÚÑ]{4,}', (product.get('description', '') + ' ' + product.get('title', '')).upper()):
+            words[word] = words.get(word, 0) + 1
+    for word in sorted(words, key=words.get, reverse=True):
+        if len(keywords) >= size:
+            break
+        keywords.setdefault(word, word.lower())
+    return dict(itertools.islice(keywords.items(), size))
+
+def bench_tagger(args):
+    """Compara el etiquetado por subcadenas contra el etiquetador compilado"""
+    from keyword_tagger import KeywordTagger
+
+    products = synthetic_json_products(args.json, args.products)
+    for size in [int(value) for value in args.keywords.split(',')]:
+        keywords = synthetic_keywords(products, size)
+
+        start = time.perf_counter()
+        for product in products:
+            legacy_extract_tags(keywords, product.get('description', ''), product.get('title', ''))
+        legacy = report(f'subcadenas ({len(keywords)} claves)', len(products), time.perf_counter() - start)
+
+        start = time.perf_counter()
+        tagger = KeywordTagger(keywords)
+        compile_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        tagger.tag_many(products)
+        compiled = report(f'regex compilada ({len(keywords)} claves)', len(products), time.perf_counter() - start)
+
+        print(f"Compilación: {compile_seconds * 1000:.1f} ms, aceleración: {compiled / legacy:.1f}x")
+
+def legacy_product_csv(productos_df):
+    """Ruta anterior de generate_product_csv: apply fila a fila"""
+    def set_marca_attributes(row):
+        marca = str(row.get('Meta: _marca', '')).strip()
+        if pd.notna(marca) and marca != 'nan' and marca != '':
+            row['Attribute 1 name'] = 'Marca'
+            row['Attribute 1 value(s)'] = marca
+            row['Attribute 1 visible'] = 1
+            row['Attribute 1 global'] = 1
+        return row
+    return productos_df.apply(set_marca_attributes, axis=1)
+
+def start_image_server(latency, failure_rate, seed=0):
+    """
+    Servidor HTTP local que imita el sitio del proveedor: sirve imágenes sintéticas
+    con una latencia fija y responde 503 a una fracción de las solicitudes.
+    Devuelve la URL base; el servidor corre en un hilo hasta que termina el proceso.
+    """
+    import asyncio
+    import socket
+    import threading
+    from aiohttp import web
+
+    rng = random.Random(seed)
+
+    async def serve_image(request):
+        await asyncio.sleep(latency)
+        if rng.random() < failure_rate:
+            return web.Response(status=503)
+        name = request.match_info['name']
+        return web.Response(body=name.encode('utf-8') * 512, content_type='image/jpeg')
+
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    ready = threading.Event()
+
+    def run():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        app = web.Application()
+        app.router.add_get('/uploads/products/{name}', serve_image)
+        runner = web.AppRunner(app)
+        loop.run_until_complete(runner.setup())
+        loop.run_until_complete(web.TCPSite(runner, '127.0.0.1', port).start())
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    ready.wait()
+    return f'http://127.0.0.1:{port}/'
+
+def bench_images(args):
+    """Descarga de imágenes contra un servidor local según la concurrencia"""
+    from image_ingest import ImageIngestor
+
+    base_url = start_image_server(args.latency, args.failure_rate)
+    urls = [f'{base_url}uploads/products/{i}.jpg' for i in range(args.images)]
+    for concurrency in (int(value) for value in args.concurrency.split(',')):
+        with tempfile.TemporaryDirectory() as uploads_dir:
+            ingestor = ImageIngestor(uploads_dir, concurrency=concurrency, backoff=0.01)
+            start = time.perf_counter()
+            ingestor.download(urls)
+            report(f'concurrencia {concurrency}', len(urls), time.perf_counter() - start)
+            print(f"  {ingestor.stats}")
+
+def bench_thumbnails(args):
+    """Generación de miniaturas de imágenes sintéticas según la cantidad de procesos"""
+    import hashlib
+    import os
+    import numpy as np
+    from PIL import Image
+    from thumbnails import generate_thumbnails
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as uploads_dir:
+        folder = Path(uploads_dir) / '2024' / '01'
+        folder.mkdir(parents=True)
+        files = {}
+        for i in range(args.images):
+            # Gradiente con ruido: se comprime como una foto de producto y no como ruido puro
+            gradient = np.linspace(0, 255, args.size, dtype=np.uint8)
+            pixels = np.stack([np.add.outer(gradient, gradient) // 2] * 3, axis=-1)
+            pixels = (pixels + rng.integers(0, 16, pixels.shape, dtype=np.uint8)).astype(np.uint8)
+            path = folder / f'producto-{i}.jpg'
+            Image.fromarray(pixels).save(path, quality=90)
+            files[f'2024/01/{path.name}'] = hashlib.sha256(path.read_bytes()).hexdigest()
+
+        print(f"{os.cpu_count()} núcleos disponibles")
+        for workers in (int(value) for value in args.workers.split(',')):
+            start = time.perf_counter()
+            _, summary = generate_thumbnails(files, uploads_dir, workers=workers)
+            report(f'{workers} procesos', len(files), time.perf_counter() - start)
+            print(f"  {summary}")
+
+def bench_structure(args):
+    """Compara la proyección de la marca fila a fila contra la vectorizada"""
+    from generate_woo_structure import generate_product_csv
+
+    source = pd.read_csv(args.csv)
+    products = source.iloc[[i % len(source) for i in range(args.rows)]].reset_index(drop=True)
+    # Una de cada cinco filas sin marca, como en los catálogos reales
+    brands = products['Name'].str.split().str[-1]
+    products['Meta: _marca'] = brands.where(products.index % 5 != 0)
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        csv_file = Path(work_dir) / 'productos.csv'
+        products.to_csv(csv_file, index=False)
+
+        start = time.perf_counter()
+        legacy_product_csv(pd.read_csv(csv_file))
+        legacy = report('apply por fila', len(products), time.perf_counter() - start)
+
+        start = time.perf_counter()
+        generate_product_csv(str(csv_file))
+        vectorized = report('proyección por columnas', len(products), time.perf_counter() - start)
+
+    print(f"Aceleración: {vectorized / legacy:.1f}x")
+
+def synthetic_taxonomy(nodes, subs_per_main=10, subsubs_per_sub=9):
+    """Taxonomía sintética de unos nodes nodos con la forma de categorias_convertidas.csv"""
+    mains = max(1, nodes // (1 + subs_per_main * (1 + subsubs_per_sub)))
+    return pd.DataFrame([
+        {
+            'Categoría Principal': f'Categoría {main}',
+            'Subcategoría': f'{main}.{sub}. Subcategoría {main} {sub}',
+            'Sub-subcategoría': f'* Grupo {main} {sub} {subsub}'
+        }
+        for main in range(mains)
+        for sub in range(subs_per_main)
+        for subsub in range(subsubs_per_sub)
+    ])
+
+def legacy_category_structure(df):
+    """Ruta anterior de generate_category_structure: un filtro del DataFrame por cada nodo"""
+    cat_rows = []
+    for main_cat in df['Categoría Principal'].unique():
+        cat_rows.append((main_cat.lower().replace(" ", "-"), main_cat))
+        for sub_cat in df[df['Categoría Principal'] == main_cat]['Subcategoría'].unique():
+            sub_cat_clean = sub_cat.split('. ')[-1] if '. ' in sub_cat else sub_cat
+            cat_rows.append((sub_cat_clean.lower().replace(" ", "-"), main_cat))
+            subsub_cats = df[(df['Categoría Principal'] == main_cat) &
+                             (df['Subcategoría'] == sub_cat)]['Sub-subcategoría']
+            for subsub_cat in subsub_cats:
+                if pd.notna(subsub_cat):
+                    subsub_cat_clean = subsub_cat.replace('* ', '')
+                    cat_rows.append((subsub_cat_clean.lower().replace(" ", "-"), sub_cat_clean))
+    return pd.DataFrame(cat_rows)
+
+def bench_categories(args):
+    """Compara el recorrido por filtros contra el árbol construido en una sola pasada sobre las filas"""
+    from generate_woo_structure import build_category_tree, category_tree_to_dataframe
+
+    for nodes in [int(value) for value in args.nodes.split(',')]:
+        taxonomy = synthetic_taxonomy(nodes)
+        start = time.perf_counter()
+        categories_df = category_tree_to_dataframe(build_category_tree(taxonomy))
+        tree = report(f'árbol indexado ({len(categories_df)} nodos)', len(categories_df), time.perf_counter() - start)
+
+        if len(categories_df) > args.legacy_max:
+            print(f"Ruta anterior omitida (más de {args.legacy_max} nodos)")
+            continue
+        start = time.perf_counter()
+        legacy_category_structure(taxonomy)
+        legacy = report(f'filtros por nodo ({len(categories_df)} nodos)', len(categories_df), time.perf_counter() - start)
+        print(f"Aceleración: {tree / legacy:.1f}x")
+
+def bench_slugs(args):
+    """Mide la generación de slugs únicos para nombres de productos (repetidos y distintos)"""
+    titles = [product.get('title', '') for product in synthetic_json_products(args.json, args.names)]
+    for label, names in [('nombres del catálogo', titles),
+                         ('nombres distintos', [f'{title} {i}' for i, title in enumerate(titles)])]:
+        slugs = SlugService()
+        start = time.perf_counter()
+        for name in names:
+            slugs.unique_slug(name)
+        report(f'slugs únicos ({label})', len(names), time.perf_counter() - start)
+
+# Esquema mínimo compatible con WordPress/WooCommerce para la base descartable del benchmark
+BENCHMARK_SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS {prefix}posts (
+        ID BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+        post_author BIGINT UNSIGNED NOT NULL DEFAULT 0,
+        post_date DATETIME NOT NULL DEFAULT '0000-00-00 00:00:00',
+        post_date_gmt DATETIME NOT NULL DEFAULT '0000-00-00 00:00:00',
+        post_content LONGTEXT NOT NULL,
+        post_title TEXT NOT NULL,
+        post_excerpt TEXT NOT NULL,
+        post_status VARCHAR(20) NOT NULL DEFAULT 'publish',
+        comment_status VARCHAR(20) NOT NULL DEFAULT 'open',
+        ping_status VARCHAR(20) NOT NULL DEFAULT 'open',
+        post_password VARCHAR(255) NOT NULL DEFAULT '',
+        post_name VARCHAR(200) NOT NULL DEFAULT '',
+        to_ping TEXT NOT NULL,
+        pinged TEXT NOT NULL,
+        post_modified DATETIME NOT NULL DEFAULT '0000-00-00 00:00:00',
+        post_modified_gmt DATETIME NOT NULL DEFAULT '0000-00-00 00:00:00',
+        post_content_filtered LONGTEXT NOT NULL,
+        post_parent BIGINT UNSIGNED NOT NULL DEFAULT 0,
+        guid VARCHAR(255) NOT NULL DEFAULT '',
+        menu_order INT NOT NULL DEFAULT 0,
+        post_type VARCHAR(20) NOT NULL DEFAULT 'post',
+        post_mime_type VARCHAR(100) NOT NULL DEFAULT '',
+        comment_count BIGINT NOT NULL DEFAULT 0,
+        PRIMARY KEY (ID),
+        KEY post_name (post_name(191)),
+        KEY type_status_date (post_type, post_status, post_date, ID),
+        KEY post_parent (post_parent)
+    )""",
+    """CREATE TABLE IF NOT EXISTS {prefix}postmeta (
+        meta_id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+        post_id BIGINT UNSIGNED NOT NULL DEFAULT 0,
+        meta_key VARCHAR(255) DEFAULT NULL,
+        meta_value LONGTEXT,
+        PRIMARY KEY (meta_id),
+        KEY post_id (post_id),
+        KEY meta_key (meta_key(191))
+    )""",
+    """CREATE TABLE IF NOT EXISTS {prefix}terms (
+        term_id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+        name VARCHAR(200) NOT NULL DEFAULT '',
+        slug VARCHAR(200) NOT NULL DEFAULT '',
+        term_group BIGINT NOT NULL DEFAULT 0,
+        PRIMARY KEY (term_id),
+        KEY slug (slug(191)),
+        KEY name (name(191))
+    )""",
+    """CREATE TABLE IF NOT EXISTS {prefix}term_taxonomy (
+        term_taxonomy_id BIGINT UNSIGNED NOT NULL AUTO_INCREMENT,
+        term_id BIGINT UNSIGNED NOT NULL DEFAULT 0,
+        taxonomy VARCHAR(32) NOT NULL DEFAULT '',
+        description LONGTEXT NOT NULL,
+        parent BIGINT UNSIGNED NOT NULL DEFAULT 0,
+        count BIGINT NOT NULL DEFAULT 0,
+        PRIMARY KEY (term_taxonomy_id),
+        UNIQUE KEY term_id_taxonomy (term_id, taxonomy),
+        KEY taxonomy (taxonomy)
+    )""",
+    """CREATE TABLE IF NOT EXISTS {prefix}term_relationships (
+        object_id BIGINT UNSIGNED NOT NULL DEFAULT 0,
+        term_taxonomy_id BIGINT UNSIGNED NOT NULL DEFAULT 0,
+        term_order INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (object_id, term_taxonomy_id),
+        KEY term_taxonomy_id (term_taxonomy_id)
+    )""",
+    """CREATE TABLE IF NOT EXISTS {prefix}wc_product_meta_lookup (
+        product_id BIGINT NOT NULL,
+        sku VARCHAR(100) NULL DEFAULT '',
+        `virtual` TINYINT(1) NULL DEFAULT 0,
+        downloadable TINYINT(1) NULL DEFAULT 0,
+        min_price DECIMAL(19,4) NULL DEFAULT NULL,
+        max_price DECIMAL(19,4) NULL DEFAULT NULL,
+        onsale TINYINT(1) NULL DEFAULT 0,
+        stock_quantity DOUBLE NULL DEFAULT NULL,
+        stock_status VARCHAR(100) NULL DEFAULT 'instock',
+        rating_count BIGINT NULL DEFAULT 0,
+        average_rating DECIMAL(3,2) NULL DEFAULT 0.00,
+        total_sales BIGINT NULL DEFAULT 0,
+        tax_status VARCHAR(100) NULL DEFAULT 'taxable',
+        tax_class VARCHAR(100) NULL DEFAULT '',
+        PRIMARY KEY (product_id),
+        KEY `virtual` (`virtual`),
+        KEY downloadable (downloadable),
+        KEY stock_status (stock_status),
+        KEY stock_quantity (stock_quantity),
+        KEY onsale (onsale),
+        KEY min_max_price (min_price, max_price),
+        KEY sku (sku(50))
+    )"""
+]
+
+def use_benchmark_database(database):
+    """Apunta DB_CONFIG a la base descartable del benchmark, creándola con el esquema mínimo"""
+    import mysql.connector
+    from config import DB_CONFIG
+
+    DB_CONFIG['database'] = database
+    config = {key: value for key, value in DB_CONFIG.items() if key not in ('database', 'prefix')}
+    if not config.get('unix_socket'):
+        config.pop('unix_socket', None)
+    cnx = mysql.connector.connect(**config)
+    try:
+        cursor = cnx.cursor()
+        cursor.execute(f"CREATE DATABASE IF NOT EXISTS `{database}` CHARACTER SET utf8mb4")
+        cursor.execute(f"USE `{database}`")
+        for statement in BENCHMARK_SCHEMA:
+            cursor.execute(statement.format(prefix=DB_CONFIG.get('prefix', 'wp_')))
+        cursor.close()
+    finally:
+        cnx.close()
+
+def write_synthetic_catalog(json_file, size, work_dir):
+    """
+    Genera un catálogo sintético de size productos con la forma de los archivos reales:
+    el JSON del proveedor, el CSV de productos WooCommerce y el CSV del importador.
+    """
+    products = synthetic_json_products(json_file, size)
+    paths = {
+        'json': work_dir / f'starcenter_{size}.json',
+        'products_csv': work_dir / f'productos_{size}.csv',
+        'import_csv': work_dir / f'import_{size}.csv'
+    }
+    with open(paths['json'], 'w', encoding='utf-8') as f:
+        json.dump(products, f, ensure_ascii=False)
+
+    pd.DataFrame({
+        'SKU': [product['code'] for product in products],
+        'Name': [product.get('title', '') for product in products],
+        'Description': [product.get('description', '') for product in products],
+        'Categories': [f"StarCenter_{product.get('category_id', '')}" for product in products],
+        'Regular price': [product['price'] for product in products],
+        'Stock': [product['stock'] for product in products]
+    }).to_csv(paths['products_csv'], index=False)
+
+    pd.DataFrame({
+        'sku': [f"{BENCH_SKU_PREFIX}{product['code']}" for product in products],
+        'name': [product.get('title', '') for product in products],
+        'slug': [f"producto-{i}" for i in range(len(products))],
+        'description': [product.get('description', '') for product in products],
+        'short_description': [product.get('description', '')[:150] for product in products],
+        'price': [product['price'] for product in products],
+        'regular_price': [product['price'] for product in products],
+        'stock': [product['stock'] for product in products]
+    }).to_csv(paths['import_csv'], index=False)
+    return paths
+
+def stage_load_categories(paths):
+    from category_manager import CategoryManager
+    manager = CategoryManager(str(paths['work_dir']))
+    manager.load_categories(str(paths['categories']))
+    return len(manager.categories_df), None
+
+def stage_category_menu(paths):
+    from category_manager import CategoryManager
+    manager = CategoryManager(str(paths['work_dir']))
+    manager.load_categories(str(paths['categories']))
+    return len(manager.generate_category_menu()), None
+
+def stage_compare_products(paths):
+    from product_integrator import ProductIntegrator
+    integrator = ProductIntegrator(str(paths['work_dir']))
+    integrator.load_json_data(str(paths['json']))
+    integrator.load_csv_data(str(paths['products_csv']), str(paths['categories']))
+    return len(integrator.compare_products()), None
+
+def stage_generate_woo_products(paths):
+    from generate_woo_products import generate_woo_products
+    output_file = generate_woo_products(str(paths['json']), str(paths['work_dir'] / 'output'))
+    return len(pd.read_csv(output_file, usecols=['SKU'])), None
+
+def stage_import_products(paths):
+    from woo_importer import import_products_from_csv
+    summary = import_products_from_csv(str(paths['import_csv']))
+    return summary['created'] + summary['updated'], summary['db']['statements']
+
+def stage_delete_all_products(paths):
+    from woo_importer import WooCommerceImporter
+    importer = WooCommerceImporter(preload_skus=False)
+    try:
+        count = importer.delete_all_products()
+        return count, importer.db.get_stats()['statements']
+    finally:
+        importer.close()
+
+SUITE_STAGES = [
+    ('load_categories', stage_load_categories, False),
+    ('generate_category_menu', stage_category_menu, False),
+    ('compare_products', stage_compare_products, False),
+    ('generate_woo_products', stage_generate_woo_products, False),
+    ('import_products_from_csv', stage_import_products, True),
+    ('delete_all_products', stage_delete_all_products, True)
+]
+
+def run_stage(stage, paths, database):
+    """Ejecuta una etapa en un proceso nuevo y mide tiempo, memoria y sentencias"""
+    from woo_importer import peak_rss_mb
+
+    if database:
+        use_benchmark_database(database)
+    func = dict((name, func) for name, func, _ in SUITE_STAGES)[stage]
+    start = time.perf_counter()
+    rows, statements = func(paths)
+    seconds = time.perf_counter() - start
+    return {
+        'stage': stage,
+        'rows': rows,
+        'seconds': round(seconds, 4),
+        'rows_per_second': round(rows / seconds, 1) if seconds > 0 else None,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'statements': statements
+    }
+
+def git_revision():
+    """Commit actual del repositorio, para identificar la ejecución"""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=Path(__file__).parent,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def bench_suite(args):
+    """Ejecuta todas las etapas del pipeline sobre catálogos sintéticos y guarda los resultados en JSON"""
+    output = Path(args.output)
+    history = json.loads(output.read_text(encoding='utf-8')) if output.exists() else []
+    previous = {(result['stage'], result['size']): result for result in history[-1]['results']} if history else {}
+
+    work_root = Path(tempfile.mkdtemp(prefix='nopa_bench_'))
+    # Cada etapa corre en un proceso limpio: el pico de memoria es el de esa etapa
+    context = multiprocessing.get_context('spawn')
+    results = []
+    for size in [int(value) for value in args.sizes.split(',')]:
+        work_dir = work_root / str(size)
+        work_dir.mkdir()
+        paths = write_synthetic_catalog(args.json, size, work_dir)
+        paths.update({'work_dir': work_dir, 'categories': Path(args.categories).resolve()})
+
+        for stage, _, needs_db in SUITE_STAGES:
+            if needs_db and not args.database:
+                continue
+            with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                result = executor.submit(run_stage, stage, paths, args.database).result()
+            result['size'] = size
+            results.append(result)
+
+            line = (f"{stage:<26} {size:>7}  {result['seconds']:>9.3f} s  "
+                    f"{result['rows_per_second'] or 0:>10.1f} filas/s  {result['peak_rss_mb']:>8.1f} MB")
+            if result['statements'] is not None:
+                line += f"  {result['statements']} sentencias"
+            before = previous.get((stage, size))
+            if before and before['seconds']:
+                line += f"  ({result['seconds'] / before['seconds']:.2f}x vs. anterior)"
+            print(line)
+
+    history.append({
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'database': args.database,
+        'results': results
+    })
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(history, indent=4), encoding='utf-8')
+    print(f"Resultados guardados en {output}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks del pipeline de catálogo')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help='Inserción fila a fila vs. en lote')
+    import_parser.add_argument('--csv', default='../data/productos_starcenter.csv')
+    import_parser.add_argument('--rows', type=int, default=1000)
+    import_parser.add_argument('--batch-size', type=int, default=500)
+    import_parser.set_defaults(func=bench_import)
+
+    matching_parser = subparsers.add_parser('matching', help='Asignación de categorías por producto vs. por lotes')
+    matching_parser.add_argument('--json', default='../data/Starcenter.json')
+    matching_parser.add_argument('--categories', default='../data/categorias_convertidas.csv')
+    matching_parser.add_argument('--sizes', default='700,50000')
+    matching_parser.add_argument('--legacy-sample', type=int, default=200)
+    matching_parser.add_argument('--top-k', type=int, default=1)
+    matching_parser.set_defaults(func=bench_matching)
+
+    coldstart_parser = subparsers.add_parser('coldstart', help='Arranque de la categorización con ajuste vs. modelo guardado')
+    coldstart_parser.add_argument('--json', default='../data/Starcenter.json')
+    coldstart_parser.add_argument('--csv', default='../data/productos_starcenter.csv')
+    coldstart_parser.add_argument('--categories', default='../data/categorias_convertidas.csv')
+    coldstart_parser.add_argument('--products', type=int, default=700)
+    coldstart_parser.add_argument('--runs', type=int, default=3)
+    coldstart_parser.set_defaults(func=bench_cold_start)
+
+    parallel_parser = subparsers.add_parser('parallel', help='Escalado de la importación con N workers')
+    parallel_parser.add_argument('--csv', default='../data/productos_starcenter.csv')
+    parallel_parser.add_argument('--rows', type=int, default=20000)
+    parallel_parser.add_argument('--workers', default='1,2,4,8')
+    parallel_parser.add_argument('--mode', choices=['process', 'thread'], default='process')
+    parallel_parser.add_argument('--batch-size', type=int, default=500)
+    parallel_parser.set_defaults(func=bench_parallel)
+
+    tagger_parser = subparsers.add_parser('tagger', help='Etiquetado por subcadenas vs. regex compilada')
+    tagger_parser.add_argument('--json', default='../data/Starcenter.json')
+    tagger_parser.add_argument('--products', type=int, default=1000)
+    tagger_parser.add_argument('--keywords', default='15,1000')
+    tagger_parser.set_defaults(func=bench_tagger)
+
+    structure_parser = subparsers.add_parser('structure', help='generate_product_csv con apply vs. vectorizado')
+    structure_parser.add_argument('--csv', default='../data/productos_starcenter.csv')
+    structure_parser.add_argument('--rows', type=int, default=100000)
+    structure_parser.set_defaults(func=bench_structure)
+
+    categories_parser = subparsers.add_parser('categories', help='Estructura de categorías por filtros vs. árbol indexado')
+    categories_parser.add_argument('--nodes', default='1000,10000,50000')
+    categories_parser.add_argument('--legacy-max', type=int, default=20000)
+    categories_parser.set_defaults(func=bench_categories)
+
+    slugs_parser = subparsers.add_parser('slugs', help='Generación de slugs únicos para nombres de productos')
+    slugs_parser.add_argument('--json', default='../data/Starcenter.json')
+    slugs_parser.add_argument('--names', type=int, default=100000)
+    slugs_parser.set_defaults(func=bench_slugs)
+
+    stock_parser = subparsers.add_parser('stock', help='Precio y stock con update_product vs. tabla temporal')
+    stock_parser.add_argument('--csv', default='../data/productos_starcenter.csv')
+    stock_parser.add_argument('--rows', type=int, default=10000)
+    stock_parser.add_argument('--legacy-sample', type=int, default=200)
+    stock_parser.set_defaults(func=bench_stock)
+
+    images_parser = subparsers.add_parser('images', help='Descarga de imágenes según la concurrencia (servidor local)')
+    images_parser.add_argument('--images', type=int, default=500)
+    images_parser.add_argument('--latency', type=float, default=0.05, help='Segundos por respuesta del servidor')
+    images_parser.add_argument('--failure-rate', type=float, default=0.02, help='Fracción de respuestas 503')
+    images_parser.add_argument('--concurrency', default='1,4,16,64')
+    images_parser.set_defaults(func=bench_images)
+
+    thumbnails_parser = subparsers.add_parser('thumbnails', help='Miniaturas según la cantidad de procesos')
+    thumbnails_parser.add_argument('--images', type=int, default=200)
+    thumbnails_parser.add_argument('--size', type=int, default=1200, help='Lado de las imágenes sintéticas')
+    thumbnails_parser.add_argument('--workers', default='1,2,4,8')
+    thumbnails_parser.set_defaults(func=bench_thumbnails)
+
+    linkage_parser = subparsers.add_parser('linkage', help='Vinculación de productos por bloqueo vs. todos los pares')
+    linkage_parser.add_argument('--json', default='../data/Starcenter.json')
+    linkage_parser.add_argument('--sizes', default='5000,50000')
+    linkage_parser.add_argument('--legacy-sample', type=int, default=200)
+    linkage_parser.set_defaults(func=bench_linkage)
+
+    normalize_parser = subparsers.add_parser('normalize', help='Normalización de texto por valor vs. caché vs. vectorizada')
+    normalize_parser.add_argument('--csv', default='../data/productos_starcenter.csv')
+    normalize_parser.add_argument('--rows', type=int, default=6650)
+    normalize_parser.set_defaults(func=bench_normalize)
+
+    suite_parser = subparsers.add_parser('suite', help='Todas las etapas sobre catálogos sintéticos')
+    suite_parser.add_argument('--json', default='../data/Starcenter.json')
+    suite_parser.add_argument('--categories', default='../data/categorias_convertidas.csv')
+    suite_parser.add_argument('--sizes', default='1000,10000,100000')
+    suite_parser.add_argument('--database', default=None,
+                              help='Base MySQL/MariaDB descartable; sin ella se omiten las etapas de base de datos')
+    suite_parser.add_argument('--output', default='output/benchmark_results.json')
+    suite_parser.set_defaults(func=bench_suite)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == '__main__':
+    main()
@@ -1,10 +1,12 @@
+import argparse
 import pandas as pd
-import unidecode
-import re
 from pathlib import Path
 import logging
 from datetime import datetime
 import json
+from chunking import iter_chunks
+from config import IMPORT_CONFIG
+from slugs import SlugService, clean_name, path_slug
 
 class CategoryManager:
     def __init__(self, base_dir: str):
@@ -26,32 +28,13 @@ class CategoryManager:
 
     def clean_category_name(self, name: str) -> str:
         """Limpia el nombre de la categoría eliminando caracteres especiales y espacios innecesarios"""
-        # Eliminar asteriscos y espacios extras
-        name = name.replace('*', '').strip()
-        # Eliminar espacios múltiples
-        name = ' '.join(name.split())
-        return name
+        return clean_name(name)
 
     def generate_slug(self, path_parts: list) -> str:
         """Genera un slug SEO-friendly para la categoría"""
         # Unir las partes del path y limpiar
         full_path = '->'.join(path_parts) if isinstance(path_parts, list) else path_parts
-        parts = [p.strip() for p in full_path.split('->')]
-        
-        # Generar slug para cada parte
-        slug_parts = []
-        for part in parts:
-            # Limpiar el nombre primero
-            clean_name = self.clean_category_name(part)
-            # Convertir a minúsculas y quitar acentos
-            text = unidecode.unidecode(clean_name.lower())
-            # Reemplazar caracteres no alfanuméricos con guiones
-            text = re.sub(r'[^a-z0-9]+', '-', text)
-            # Eliminar guiones al inicio y final
-            text = text.strip('-')
-            slug_parts.append(text)
-            
-        return '-'.join(slug_parts)
+        return path_slug(p.strip() for p in full_path.split('->'))
 
     def load_categories(self, csv_path: str) -> bool:
         """Cargar categorías desde CSV"""
@@ -82,15 +65,17 @@ class CategoryManager:
         categories = []
         id_counter = 1
         parent_map = {}
+        slugs = SlugService()
 
-        for path in self.unique_paths:
+        # Orden estable: los IDs y los sufijos de slugs repetidos no dependen del orden del set
+        for path in sorted(self.unique_paths):
             parts = [p.strip() for p in path.split('->')]
             current_parent = 0
             
             for i, part in enumerate(parts):
                 cleaned_name = self.clean_category_name(part)
                 if cleaned_name not in parent_map:
-                    slug = self.generate_slug(path[:i+1])
+                    slug = slugs.unique(self.generate_slug(parts[:i+1]))
                     categories.append({
                         'ID': id_counter,
                         'Name': cleaned_name,
@@ -139,7 +124,124 @@ class CategoryManager:
             logging.error(f"Error al exportar menú de categorías: {str(e)}")
             return False
 
+    def sync_to_database(self, db=None, dry_run: bool = False) -> dict:
+        """
+        Sincroniza el árbol de categorías con los términos product_cat de WordPress.
+        Carga los términos existentes en una consulta, inserta los que faltan por nivel
+        (padres primero) con INSERT multi-fila en terms y term_taxonomy, corrige los padres
+        y recalcula los contadores con sentencias por conjunto, todo en una transacción.
+        Los términos se identifican por slug. Con dry_run solo calcula las diferencias.
+        """
+        menu_df = self.generate_category_menu()
+        nodes = menu_df.to_dict('records')
+        nodes_by_id = {node['ID']: node for node in nodes}
+        levels = {}
+        for node in nodes:
+            # El menú lista cada categoría después de su padre
+            levels[node['ID']] = levels[node['Parent']] + 1 if node['Parent'] else 0
+        
+        own_db = db is None
+        if own_db:
+            # Solo la sincronización necesita el conector de MySQL; la exportación a CSV no
+            from db_connection import WordPressDB
+            db = WordPressDB()
+        prefix = db.prefix
+        summary = {'categories': len(nodes), 'existing': 0, 'inserted': 0, 'reparented': 0, 'recounted': 0}
+        try:
+            with db.transaction():
+                existing = {
+                    row['slug']: row for row in db.fetch(f"""
+                    SELECT t.term_id, t.slug, tt.term_taxonomy_id, tt.parent
+                    FROM {prefix}terms t
+                    JOIN {prefix}term_taxonomy tt ON tt.term_id = t.term_id
+                    WHERE tt.taxonomy = 'product_cat'
+                    """)
+                }
+                missing = [node for node in nodes if node['Slug'] not in existing]
+                summary['existing'] = len(nodes) - len(missing)
+                if dry_run:
+                    summary['inserted'] = len(missing)
+                    return summary
+                
+                term_ids = {slug: row['term_id'] for slug, row in existing.items()}
+                
+                def parent_term_id(node):
+                    return term_ids[nodes_by_id[node['Parent']]['Slug']] if node['Parent'] else 0
+                
+                # Insertar los términos faltantes por nivel: el padre ya tiene term_id al insertar el hijo
+                for level in sorted({levels[node['ID']] for node in missing}):
+                    level_nodes = [node for node in missing if levels[node['ID']] == level]
+                    for chunk in iter_chunks(level_nodes, IMPORT_CONFIG['batch_size']):
+                        first_id = db.insert(*db.multi_row_insert(
+                            'terms', ['name', 'slug', 'term_group'],
+                            [(node['Name'], node['Slug'], 0) for node in chunk]
+                        ))
+                        inserted = db.fetch(
+                            f"SELECT term_id, slug FROM {prefix}terms WHERE term_id BETWEEN %s AND %s ORDER BY term_id",
+                            (first_id, first_id + len(chunk) - 1)
+                        )
+                        if [row['slug'] for row in inserted] != [node['Slug'] for node in chunk]:
+                            raise RuntimeError(
+                                f"Los IDs autoincrementales de términos desde {first_id} no son consecutivos "
+                                "(revisar innodb_autoinc_lock_mode)"
+                            )
+                        for row in inserted:
+                            term_ids[row['slug']] = row['term_id']
+                        db.insert(*db.multi_row_insert(
+                            'term_taxonomy', ['term_id', 'taxonomy', 'description', 'parent', 'count'],
+                            [(term_ids[node['Slug']], 'product_cat', node['Description'], parent_term_id(node), 0)
+                             for node in chunk]
+                        ))
+                        summary['inserted'] += len(chunk)
+                
+                # Corregir en una sentencia el padre de los términos existentes que cambiaron de lugar
+                reparent = [
+                    (existing[node['Slug']]['term_taxonomy_id'], parent_term_id(node))
+                    for node in nodes
+                    if node['Slug'] in existing and existing[node['Slug']]['parent'] != parent_term_id(node)
+                ]
+                for chunk in iter_chunks(reparent, IMPORT_CONFIG['batch_size']):
+                    cases = ' '.join(['WHEN %s THEN %s'] * len(chunk))
+                    placeholders = ', '.join(['%s'] * len(chunk))
+                    summary['reparented'] += db.execute(
+                        f"""
+                        UPDATE {prefix}term_taxonomy
+                        SET parent = CASE term_taxonomy_id {cases} END
+                        WHERE term_taxonomy_id IN ({placeholders})
+                        """,
+                        [value for row in chunk for value in row] + [tt_id for tt_id, _ in chunk]
+                    )
+                
+                # Contadores de todos los product_cat en una sola sentencia
+                summary['recounted'] = db.execute(f"""
+                UPDATE {prefix}term_taxonomy tt
+                LEFT JOIN (
+                    SELECT tr.term_taxonomy_id, COUNT(*) AS total
+                    FROM {prefix}term_relationships tr
+                    JOIN {prefix}posts p ON p.ID = tr.object_id
+                    WHERE p.post_status = 'publish'
+                    GROUP BY tr.term_taxonomy_id
+                ) counts ON counts.term_taxonomy_id = tt.term_taxonomy_id
+                SET tt.count = COALESCE(counts.total, 0)
+                WHERE tt.taxonomy = 'product_cat'
+                """)
+                
+                # WordPress cachea la jerarquía de la taxonomía en esta opción
+                db.execute(f"DELETE FROM {prefix}options WHERE option_name = 'product_cat_children'")
+            
+            logging.info(f"Categorías sincronizadas con la base de datos: {summary}")
+            return summary
+        finally:
+            if own_db:
+                db.close()
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Genera el menú de categorías de WooCommerce')
+    parser.add_argument('--sync-db', action='store_true',
+                        help='Sincronizar además los términos product_cat directamente en la base de datos')
+    parser.add_argument('--dry-run', action='store_true', help='Con --sync-db, solo mostrar las diferencias')
+    args = parser.parse_args()
+    
     # Configuración de rutas
     BASE_DIR = Path("/Users/heydagen/Corporate Ecommerce")
     CATEGORIES_CSV = "/Users/heydagen/Documents/Proyectos/NOPA/Categorias/categorias_convertidas.csv"
@@ -152,3 +254,9 @@ if __name__ == "__main__":
     if manager.load_categories(CATEGORIES_CSV):
         # Exportar menú de categorías para WooCommerce
         manager.export_category_menu(str(OUTPUT_DIR / "woo_categories.csv"))
+        
+        if args.sync_db:
+            summary = manager.sync_to_database(dry_run=args.dry_run)
+            print(f"Categorías: {summary['categories']}, existentes: {summary['existing']}, "
+                  f"{'a insertar' if args.dry_run else 'insertadas'}: {summary['inserted']}, "
+                  f"padres corregidos: {summary['reparented']}")
@@ -0,0 +1,194 @@
+"""
+Motor de asignación de categorías por lotes
+Ajusta el modelo TF-IDF una sola vez sobre el corpus de categorías y puntúa
+todos los productos con un único producto de matrices dispersas.
+El modelo ajustado (vocabulario, pesos idf y matriz de categorías normalizada)
+se puede guardar en un .npz: al cargarlo, la inferencia usa solo NumPy y no
+necesita importar scikit-learn.
+"""
+
+import os
+import re
+import zipfile
+from collections import Counter
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, List, Optional
+from text_normalize import normalize_many, normalize_text
+
+CATEGORY_COLUMNS = ['Categoría Principal', 'Subcategoría', 'Sub-subcategoría']
+STOP_WORDS = ['de', 'la', 'el', 'y', 'en', 'con', 'para', 'por', 'los', 'las']
+TOKEN_PATTERN = re.compile(r'\w+')
+# Versión del formato del modelo guardado: invalida los modelos de ejecuciones anteriores
+MODEL_VERSION = 1
+
+class CategoryMatcher:
+    def __init__(self, normalize: Callable[[str], str] = normalize_text, block_size: int = 5000):
+        self.normalize = normalize
+        self.block_size = block_size
+        self.stop_words = frozenset(STOP_WORDS)
+        self.vocabulary = {}
+        self.idf = None
+        self.category_info = []
+        # Matriz término×categoría en formato CSR: categorías y pesos de cada término
+        self.term_offsets = None
+        self.term_categories = None
+        self.term_weights = None
+
+    def fit(self, categories_df: pd.DataFrame) -> 'CategoryMatcher':
+        """Normaliza las categorías y ajusta el vocabulario TF-IDF una sola vez"""
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        normalized = [normalize_many(categories_df[column], self.normalize) for column in CATEGORY_COLUMNS]
+        category_texts = [' '.join(filter(None, parts)) for parts in zip(*normalized)]
+        self.category_info = [
+            {
+                'categoria_principal': main,
+                'subcategoria': sub,
+                'sub_subcategoria': sub_sub
+            }
+            for main, sub, sub_sub in zip(*(categories_df[column] for column in CATEGORY_COLUMNS))
+        ]
+        vectorizer = TfidfVectorizer(
+            analyzer='word',
+            token_pattern=TOKEN_PATTERN.pattern,
+            ngram_range=(1, 2),
+            min_df=2,
+            stop_words=STOP_WORDS
+        )
+        # TfidfVectorizer normaliza cada fila (L2): el producto escalar es la similitud del coseno
+        category_matrix = vectorizer.fit_transform(category_texts).T.tocsr()
+        self.vocabulary = {term: int(index) for term, index in vectorizer.vocabulary_.items()}
+        self.idf = vectorizer.idf_
+        self.term_offsets = category_matrix.indptr.astype(np.int64)
+        self.term_categories = category_matrix.indices.astype(np.int64)
+        self.term_weights = category_matrix.data
+        return self
+
+    def save(self, path, key: str):
+        """Guarda el modelo ajustado en un .npz identificado por key (p. ej. el hash de la taxonomía)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        terms = sorted(self.vocabulary, key=self.vocabulary.get)
+        categories = [[info[name] for name in ('categoria_principal', 'subcategoria', 'sub_subcategoria')]
+                      for info in self.category_info]
+        missing = np.array([[pd.isna(value) for value in row] for row in categories], dtype=bool).reshape(-1, 3)
+        # Se escribe a un archivo temporal y se reemplaza, para no dejar un modelo a medias
+        temporary = path.with_name(path.stem + '.tmp.npz')
+        np.savez(
+            temporary,
+            key=np.array(key),
+            terms=np.array(terms, dtype=str),
+            idf=self.idf,
+            term_offsets=self.term_offsets,
+            term_categories=self.term_categories,
+            term_weights=self.term_weights,
+            categories=np.array([['' if pd.isna(value) else str(value) for value in row] for row in categories],
+                                dtype=str).reshape(-1, 3),
+            missing=missing
+        )
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path, key: str, normalize: Callable[[str], str] = normalize_text,
+             block_size: int = 5000) -> Optional['CategoryMatcher']:
+        """Carga un modelo guardado; None si no existe, es ilegible o corresponde a otra key"""
+        try:
+            with np.load(path) as data:
+                if str(data['key']) != key:
+                    return None
+                matcher = cls(normalize, block_size)
+                matcher.vocabulary = {term: index for index, term in enumerate(data['terms'].tolist())}
+                matcher.idf = data['idf']
+                matcher.term_offsets = data['term_offsets']
+                matcher.term_categories = data['term_categories']
+                matcher.term_weights = data['term_weights']
+                categories = data['categories'].tolist()
+                missing = data['missing'].tolist()
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            return None
+        matcher.category_info = [
+            dict(zip(('categoria_principal', 'subcategoria', 'sub_subcategoria'),
+                     (np.nan if absent else value for value, absent in zip(row, absent_row))))
+            for row, absent_row in zip(categories, missing)
+        ]
+        return matcher
+
+    def product_text(self, name: str, description: str, tags: str) -> str:
+        """Texto normalizado de un producto para la comparación"""
+        return ' '.join(filter(None, [
+            self.normalize(name),
+            self.normalize(description),
+            self.normalize(tags)
+        ]))
+
+    def term_counts(self, text: str) -> Counter:
+        """Términos del vocabulario en un texto (palabras y pares de palabras), como TfidfVectorizer"""
+        words = [word for word in TOKEN_PATTERN.findall(text.lower()) if word not in self.stop_words]
+        terms = words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+        return Counter(self.vocabulary[term] for term in terms if term in self.vocabulary)
+
+    def similarities(self, product_texts: List[str]) -> np.ndarray:
+        """Similitud del coseno TF-IDF de cada producto con cada categoría (matriz densa)"""
+        rows, terms, weights = [], [], []
+        for row, text in enumerate(product_texts):
+            counts = self.term_counts(text)
+            if not counts:
+                continue
+            row_terms = np.fromiter(counts.keys(), dtype=np.int64, count=len(counts))
+            row_weights = np.fromiter(counts.values(), dtype=np.float64, count=len(counts)) * self.idf[row_terms]
+            rows.append(np.full(len(counts), row))
+            terms.append(row_terms)
+            weights.append(row_weights / np.sqrt(np.dot(row_weights, row_weights)))
+
+        category_count = len(self.category_info)
+        if not rows:
+            return np.zeros((len(product_texts), category_count))
+        rows, terms, weights = np.concatenate(rows), np.concatenate(terms), np.concatenate(weights)
+        # Cada término del producto aporta su peso a todas las categorías que lo contienen
+        starts = self.term_offsets[terms]
+        lengths = self.term_offsets[terms + 1] - starts
+        positions = np.arange(lengths.sum()) + np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+        cells = np.repeat(rows, lengths) * category_count + self.term_categories[positions]
+        contributions = np.repeat(weights, lengths) * self.term_weights[positions]
+        return np.bincount(cells, weights=contributions,
+                           minlength=len(product_texts) * category_count).reshape(len(product_texts), category_count)
+
+    def top_k(self, product_texts: List[str], k: int = 1):
+        """
+        Devuelve (índices, puntuaciones) de las k mejores categorías por producto,
+        ordenadas de mayor a menor similitud. Procesa los productos por bloques
+        para acotar la memoria de la matriz producto×categoría.
+        """
+        if self.term_offsets is None:
+            raise ValueError("CategoryMatcher no está ajustado: llamar a fit() primero")
+        k = min(k, len(self.category_info))
+        indices = np.empty((len(product_texts), k), dtype=np.int64)
+        scores = np.empty((len(product_texts), k), dtype=np.float64)
+
+        for start in range(0, len(product_texts), self.block_size):
+            similarities = self.similarities(product_texts[start:start + self.block_size])
+            if k == 1:
+                candidates = similarities.argmax(axis=1)[:, np.newaxis]
+            elif k < similarities.shape[1]:
+                candidates = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+            else:
+                candidates = np.tile(np.arange(similarities.shape[1]), (similarities.shape[0], 1))
+            candidate_scores = np.take_along_axis(similarities, candidates, axis=1)
+            # Orden estable: a igual puntuación gana la categoría de menor índice (como argmax)
+            order = np.lexsort((candidates, -candidate_scores), axis=1)
+            end = start + similarities.shape[0]
+            indices[start:end] = np.take_along_axis(candidates, order, axis=1)
+            scores[start:end] = np.take_along_axis(candidate_scores, order, axis=1)
+
+        return indices, scores
+
+    def match(self, product_texts: List[str], k: int = 1) -> List[List[Dict]]:
+        """Mejores k categorías por producto, con su puntuación de confianza"""
+        indices, scores = self.top_k(product_texts, k)
+        return [
+            [{**self.category_info[index], 'confidence_score': score}
+             for index, score in zip(row_indices, row_scores)]
+            for row_indices, row_scores in zip(indices, scores)
+        ]
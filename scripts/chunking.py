@@ -0,0 +1,16 @@
+"""
+Agrupación de iterables en bloques
+Compartido por el importador y la gestión de categorías para escribir en lotes sin
+materializar toda la entrada.
+"""
+
+def iter_chunks(items, size):
+    """Agrupa un iterable en listas de hasta size elementos"""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
@@ -11,3 +11,47 @@ DB_CONFIG = {
     'prefix': 'wp_',
     'unix_socket': '/Users/heydagen/Library/Application Support/Local/run/79Kha0pva/mysql/mysqld.sock'
 }
+
+# Parámetros de importación masiva
+IMPORT_CONFIG = {
+    'batch_size': 500,
+    'csv_chunksize': 2000,
+    'purge_chunk_size': 1000,
+    'lookup_chunk_size': 5000,
+    # Categorías del proveedor ('StarCenter_<id>' en la columna Categories del CSV generado)
+    # -> slug del término product_cat; las que no figuran se buscan con el slug 'starcenter-<id>'
+    'supplier_categories': {}
+}
+
+# Ingesta de imágenes de productos
+IMAGE_CONFIG = {
+    'base_url': 'https://starcenter.com.uy/',
+    'uploads_dir': 'output/uploads',
+    'uploads_url': 'http://nopasi.local/wp-content/uploads/',
+    'concurrency': 16,
+    'retries': 3,
+    'backoff': 0.5,
+    'timeout': 30,
+    # Descargas entre guardados del manifiesto (una interrupción solo pierde las últimas)
+    'manifest_every': 100
+}
+
+# Tamaños intermedios de las imágenes de productos (ancho, alto, recorte; 0 = sin límite)
+THUMBNAIL_CONFIG = {
+    'sizes': {
+        'woocommerce_thumbnail': (300, 300, True),
+        'woocommerce_single': (600, 0, False),
+        'woocommerce_gallery_thumbnail': (100, 100, True)
+    },
+    'jpeg_quality': 82,
+    'workers': None
+}
+
+# Pool de conexiones de WordPressDB
+POOL_CONFIG = {
+    'pool_size': 4,
+    'acquire_timeout': 30,
+    'ping_interval': 60,
+    'reconnect_attempts': 3,
+    'max_prepared_statements': 256
+}
@@ -2,60 +2,326 @@
 Database connection handler for WordPress/WooCommerce
 """
 
+import queue
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
 import mysql.connector
 from mysql.connector import Error
-from config import DB_CONFIG
+from mysql.connector.errors import PoolError
+from config import DB_CONFIG, POOL_CONFIG
+
+class PooledConnection:
+    """Conexión del pool con su caché de sentencias preparadas por texto SQL"""
+
+    def __init__(self, cnx, max_prepared):
+        self.cnx = cnx
+        self.max_prepared = max_prepared
+        self.prepared = OrderedDict()
+        self.last_used = time.monotonic()
+
+    def prepared_cursor(self, query):
+        """Devuelve el cursor preparado para este SQL, preparándolo en el servidor si es nuevo"""
+        cursor = self.prepared.get(query)
+        if cursor is not None:
+            self.prepared.move_to_end(query)
+            return cursor, True
+        cursor = self.cnx.cursor(prepared=True)
+        self.prepared[query] = cursor
+        if len(self.prepared) > self.max_prepared:
+            _, oldest = self.prepared.popitem(last=False)
+            self._close_cursor(oldest)
+        return cursor, False
+
+    def discard_prepared(self, query):
+        """Quita de la caché el cursor de este SQL y libera la sentencia en el servidor"""
+        cursor = self.prepared.pop(query, None)
+        if cursor is not None:
+            self._close_cursor(cursor)
+
+    def reset_prepared(self):
+        """Descarta la caché (las sentencias del servidor se pierden al reconectar)"""
+        for cursor in self.prepared.values():
+            self._close_cursor(cursor)
+        self.prepared.clear()
+
+    @staticmethod
+    def _close_cursor(cursor):
+        try:
+            cursor.close()
+        except Error:
+            pass
 
 class WordPressDB:
-    def __init__(self):
-        self.connection = None
-        try:
-            config = DB_CONFIG.copy()
-            unix_socket = config.pop('unix_socket', None)
-            prefix = config.pop('prefix', 'wp_')
-            self.prefix = prefix
-            
-            if unix_socket:
-                config['unix_socket'] = unix_socket
-            
-            self.connection = mysql.connector.connect(**config)
+    def __init__(self, pool_size=None, acquire_timeout=None):
+        self.pool_size = pool_size or POOL_CONFIG['pool_size']
+        self.acquire_timeout = acquire_timeout or POOL_CONFIG['acquire_timeout']
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.stats = {
+            'connections': 0,
+            'reconnects': 0,
+            'acquires': 0,
+            'acquire_wait_seconds': 0.0,
+            'max_acquire_wait_seconds': 0.0,
+            'statements': 0,
+            'prepared_hits': 0,
+            'prepared_misses': 0,
+            'transactions': 0
+        }
+
+        config = DB_CONFIG.copy()
+        unix_socket = config.pop('unix_socket', None)
+        prefix = config.pop('prefix', 'wp_')
+        self.prefix = prefix
+
+        if unix_socket:
+            config['unix_socket'] = unix_socket
+        self.config = config
+
+        # Abrir la primera conexión para validar la configuración
+        try:
+            self._idle.put(self._connect())
             print("Successfully connected to the database")
         except Error as e:
             print(f"Error connecting to MySQL Database: {e}")
 
-    def execute_query(self, query, params=None):
-        """Execute a query and return results"""
-        cursor = self.connection.cursor(dictionary=True)
+    def _connect(self):
+        """Abre una nueva conexión física para el pool"""
+        with self._lock:
+            if self._created >= self.pool_size:
+                return None
+            self._created += 1
+        try:
+            cnx = mysql.connector.connect(**self.config)
+            cnx.autocommit = True
+        except Error:
+            with self._lock:
+                self._created -= 1
+            raise
+        self._count('connections')
+        return PooledConnection(cnx, POOL_CONFIG['max_prepared_statements'])
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def _acquire(self):
+        """Toma una conexión libre del pool, abriendo otra o esperando si es necesario"""
+        start = time.monotonic()
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+            if conn is None:
+                try:
+                    conn = self._idle.get(timeout=self.acquire_timeout)
+                except queue.Empty:
+                    raise PoolError(f"No hay conexiones libres tras {self.acquire_timeout} s")
+        waited = time.monotonic() - start
+        with self._lock:
+            self.stats['acquires'] += 1
+            self.stats['acquire_wait_seconds'] += waited
+            self.stats['max_acquire_wait_seconds'] = max(self.stats['max_acquire_wait_seconds'], waited)
+
+        # Reconectar si la conexión estuvo ociosa y el servidor la cerró
+        if time.monotonic() - conn.last_used > POOL_CONFIG['ping_interval']:
+            try:
+                conn.cnx.ping(reconnect=False)
+            except Error:
+                conn.reset_prepared()
+                try:
+                    conn.cnx.ping(reconnect=True, attempts=POOL_CONFIG['reconnect_attempts'], delay=1)
+                except Error:
+                    self._discard(conn)
+                    raise
+                conn.cnx.autocommit = True
+                self._count('reconnects')
+        return conn
+
+    def _release(self, conn):
+        conn.last_used = time.monotonic()
+        self._idle.put(conn)
+
+    def _discard(self, conn):
+        """Saca del pool una conexión inutilizable"""
+        conn.reset_prepared()
+        try:
+            conn.cnx.close()
+        except Error:
+            pass
+        with self._lock:
+            self._created -= 1
+
+    @contextmanager
+    def connection(self):
+        """Conexión para una o más sentencias: la de la transacción en curso o una del pool"""
+        current = getattr(self._local, 'conn', None)
+        if current is not None:
+            yield current
+            return
+        conn = self._acquire()
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    @contextmanager
+    def transaction(self):
+        """
+        Ejecuta las sentencias del bloque en una única transacción.
+        fetch/execute/executemany llamados dentro del bloque (en el mismo hilo) usan
+        la misma conexión; las transacciones anidadas se unen a la exterior.
+        """
+        if getattr(self._local, 'conn', None) is not None:
+            yield self
+            return
+        conn = self._acquire()
+        self._local.conn = conn
+        try:
+            conn.cnx.start_transaction()
+            yield self
+            conn.cnx.commit()
+            self._count('transactions')
+        except BaseException:
+            try:
+                conn.cnx.rollback()
+            except Error:
+                pass
+            raise
+        finally:
+            self._local.conn = None
+            self._release(conn)
+
+    def _run_prepared(self, conn, query, params):
+        cursor, cached = conn.prepared_cursor(query)
+        self._count('prepared_hits' if cached else 'prepared_misses')
+        self._count('statements')
         try:
+            cursor.execute(query, tuple(params))
+        except Error:
+            # Un cursor preparado con error no se reutiliza
+            conn.discard_prepared(query)
+            raise
+        return cursor
+
+    def fetch(self, query, params=None):
+        """Ejecuta una consulta y devuelve las filas como diccionarios"""
+        with self.connection() as conn:
             if params:
-                cursor.execute(query, params)
-            else:
+                cursor = self._run_prepared(conn, query, params)
+                columns = cursor.column_names
+                return [
+                    {column: value.decode('utf-8') if isinstance(value, (bytes, bytearray)) else value
+                     for column, value in zip(columns, row)}
+                    for row in cursor.fetchall()
+                ]
+            cursor = conn.cnx.cursor(dictionary=True)
+            try:
+                self._count('statements')
                 cursor.execute(query)
-            
-            if query.strip().upper().startswith(('SELECT', 'SHOW')):
                 return cursor.fetchall()
-            else:
-                self.connection.commit()
+            finally:
+                cursor.close()
+
+    def execute(self, query, params=None):
+        """Ejecuta una sentencia de escritura y devuelve las filas afectadas"""
+        with self.connection() as conn:
+            if params:
+                return self._run_prepared(conn, query, params).rowcount
+            cursor = conn.cnx.cursor()
+            try:
+                self._count('statements')
+                cursor.execute(query)
+                return cursor.rowcount
+            finally:
+                cursor.close()
+
+    def insert(self, query, params=None):
+        """Ejecuta un INSERT y devuelve el ID autoincremental generado (el de la primera fila)"""
+        with self.connection() as conn:
+            if params:
+                return self._run_prepared(conn, query, params).lastrowid
+            cursor = conn.cnx.cursor()
+            try:
+                self._count('statements')
+                cursor.execute(query)
+                return cursor.lastrowid
+            finally:
+                cursor.close()
+
+    def executemany(self, query, rows):
+        """
+        Ejecuta una sentencia para muchas filas.
+        Usa el cursor de texto del conector, que reescribe los INSERT como un único
+        INSERT multi-fila (un cursor preparado enviaría una sentencia por fila).
+        """
+        rows = list(rows)
+        if not rows:
+            return 0
+        with self.connection() as conn:
+            cursor = conn.cnx.cursor()
+            try:
+                self._count('statements')
+                cursor.executemany(query, rows)
                 return cursor.rowcount
+            finally:
+                cursor.close()
+
+    def multi_row_insert(self, table, columns, rows, ignore=False, update_columns=None):
+        """
+        Arma un INSERT multi-fila para una tabla (sin prefijo) y devuelve (sentencia, parámetros).
+        ignore agrega IGNORE; update_columns agrega ON DUPLICATE KEY UPDATE con esas columnas.
+        Los nombres de columna se escriben entre comillas invertidas (p. ej. `virtual` es reservada).
+        """
+        rows = list(rows)
+        row_placeholder = '(' + ', '.join(['%s'] * len(columns)) + ')'
+        query = (
+            f"INSERT {'IGNORE ' if ignore else ''}INTO {self.prefix}{table} ({', '.join(f'`{column}`' for column in columns)}) "
+            f"VALUES {', '.join([row_placeholder] * len(rows))}"
+        )
+        if update_columns:
+            query += " ON DUPLICATE KEY UPDATE " + ', '.join(
+                f"`{column}` = VALUES(`{column}`)" for column in update_columns
+            )
+        return query, [value for row in rows for value in row]
+
+    def execute_query(self, query, params=None):
+        """Execute a query and return results (compatibilidad: usar fetch/execute)"""
+        try:
+            if query.strip().upper().startswith(('SELECT', 'SHOW')):
+                return self.fetch(query, params)
+            return self.execute(query, params)
         except Error as e:
             print(f"Error executing query: {e}")
             return None
-        finally:
-            cursor.close()
+
+    def get_stats(self):
+        """Métricas del pool: esperas al adquirir conexiones y sentencias ejecutadas"""
+        with self._lock:
+            return dict(self.stats)
 
     def close(self):
-        """Close the database connection"""
-        if self.connection and self.connection.is_connected():
-            self.connection.close()
+        """Close the database connections"""
+        closed = 0
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+            closed += 1
+        if closed:
             print("Database connection closed.")
 
     def test_connection(self):
         """Test the database connection"""
-        if self.connection and self.connection.is_connected():
-            cursor = self.connection.cursor()
-            cursor.execute("SELECT VERSION()")
-            db_version = cursor.fetchone()
-            print(f"Connected to MySQL version: {db_version[0]}")
-            cursor.close()
-            return True
-        return False
+        try:
+            db_version = self.fetch("SELECT VERSION() AS version")
+        except Error:
+            return False
+        print(f"Connected to MySQL version: {db_version[0]['version']}")
+        return True
@@ -1,8 +1,12 @@
-import json
-import pandas as pd
+import csv
 import os
 from datetime import datetime
 import logging
+from config import IMAGE_CONFIG
+from json_stream import iter_json_array
+from keyword_tagger import get_default_tagger
+from title_translator import get_default_translator
+from woo_columns import WOO_PRODUCT_COLUMNS
 
 def setup_logging():
     log_dir = 'logs'
@@ -26,165 +30,104 @@ def clean_description(desc):
         return ""
     return desc.strip()
 
-def process_images(images):
+def process_images(images, base_url=None):
     """Procesa las URLs de las imágenes manteniendo la estructura original"""
     if not images:
         return []
-    base_url = 'https://starcenter.com.uy/'
+    base_url = base_url or IMAGE_CONFIG['base_url']
     return [base_url + img['urlImage'] for img in images]
 
 def extract_tags_from_description(description, title):
     """Extrae etiquetas relevantes de la descripción y título"""
-    if not description and not title:
-        return "producto, tecnología"
-        
-    # Palabras clave importantes para productos tecnológicos
-    tech_keywords = {
-        'USB': 'USB, conectividad',
-        'WIFI': 'WiFi, conectividad, redes',
-        'BLUETOOTH': 'Bluetooth, wireless, conectividad',
-        'HD': 'HD, alta definición',
-        'WIRELESS': 'wireless, inalámbrico',
-        'GAMING': 'gaming, juegos, gamer',
-        'MEMORIA': 'memoria, almacenamiento',
-        'AUDIO': 'audio, sonido',
-        'VIDEO': 'video, multimedia',
-        'IMPRESORA': 'impresora, impresión',
-        'ROUTER': 'router, redes, conectividad',
-        'TECLADO': 'teclado, periférico',
-        'MOUSE': 'mouse, periférico',
-        'CABLE': 'cable, conectividad',
-        'AURICULAR': 'auriculares, audio',
-    }
-    
-    tags = set()
-    text = (description + ' ' + title).upper()
-    
-    # Extraer palabras clave técnicas
-    for keyword, tag_group in tech_keywords.items():
-        if keyword in text:
-            tags.update(tag_group.split(', '))
-    
-    # Asegurar que siempre tengamos al menos algunas etiquetas
-    if not tags:
-        tags = {'tecnología', 'producto'}
-    
-    return ', '.join(sorted(tags))
+    return get_default_tagger().tag(description, title)
 
 def translate_title(title):
     """Mantiene términos técnicos en inglés pero preserva nombres de marca"""
-    # Términos que no se deben traducir (marcas, modelos, etc.)
-    preserve_terms = ['ARGOM', 'FELLOWES', 'HUAWEI', 'APPLE', 'BROTHER', 'SOHO', 'USB', 'WIFI', 'HD']
+    return get_default_translator().translate(title)
+
+DEFAULT_JSON_PATH = '/Users/heydagen/Documents/Proyectos/NOPA/Lista de productos/JSON/Starcenter.json'
+
+def build_woo_product(product):
+    """Convierte un producto del JSON del proveedor en una fila del CSV de WooCommerce"""
+    # Procesar imágenes
+    image_urls = process_images(product.get('image', []))
     
-    # Mapeo de términos comunes
-    translations = {
-        'AURICULAR': 'Headphone',
-        'AURICULARES': 'Headphones',
-        'TECLADO': 'Keyboard',
-        'MOUSE': 'Mouse',
-        'CABLE': 'Cable',
-        'CARGADOR': 'Charger',
-        'ROUTER': 'Router',
-        'MEMORIA': 'Memory',
-        'FUENTE': 'Power Supply',
-        'PAPEL': 'Paper',
-        'SOBRE': 'Envelope',
-        'MARCADOR': 'Marker',
-        'IMPRESORA': 'Printer',
-        'PARLANTE': 'Speaker',
-        'PURIFICADOR': 'Air Purifier',
-        'INALAMBRICO': 'Wireless',
-        'MULTIFUNCION': 'Multifunction',
-    }
+    # Procesar descripción y título
+    description = clean_description(product.get('description', ''))
+    if not description:
+        description = f"Producto {product['title']} disponible en NOPA Uruguay. Consulte especificaciones y disponibilidad."
     
-    # Preservar términos específicos
-    for term in preserve_terms:
-        if term in title.upper():
-            translations[term] = term
+    # Traducir título al inglés
+    english_title = translate_title(product['title'])
     
-    # Traducir título
-    translated = title
-    for es, en in translations.items():
-        translated = translated.replace(es.upper(), en)
-        translated = translated.replace(es.capitalize(), en)
-        translated = translated.replace(es.lower(), en)
+    # Generar etiquetas basadas en la descripción y título
+    tags = extract_tags_from_description(description, product['title'])
     
-    return translated
+    return {
+        'Type': 'simple',
+        'Title': english_title,
+        'Description': description,
+        'Short description': description[:150] + '...' if len(description) > 150 else description,
+        'SKU': product['code'],
+        'Published': 1,
+        'Featured': 0,
+        'Visibility in catalog': 'visible',
+        'Tax status': 'taxable',
+        'Tax class': '',
+        'In stock?': 1 if product['stock'] > 0 else 0,
+        'Stock': product['stock'],
+        'Backorders allowed?': 0,
+        'Sold individually?': 0,
+        'Allow customer reviews?': 1,
+        'Regular price': product['price'],
+        'Categories': f'StarCenter_{product["category_id"]}',
+        'Tags': tags,
+        'Images': '|'.join(image_urls) if image_urls else '',
+        'Position': 0
+    }
 
-def generate_woo_products():
+def generate_woo_products(json_path=DEFAULT_JSON_PATH, output_dir='output'):
+    """
+    Genera el CSV de productos WooCommerce a partir del JSON del proveedor y devuelve su ruta.
+    Lee el JSON producto a producto y escribe cada fila al momento, por lo que la
+    memoria no crece con el tamaño del feed. Las filas se escriben en un archivo temporal
+    que reemplaza al CSV solo al terminar: un error no deja un CSV a medias y se propaga.
+    """
     logger = setup_logging()
     logger.info("Iniciando generación de productos WooCommerce")
     
+    output_file = os.path.join(output_dir, 'woo_products.csv')
+    temporary = output_file + '.tmp'
     try:
-        # Cargar datos del JSON
-        json_path = '/Users/heydagen/Documents/Proyectos/NOPA/Lista de productos/JSON/Starcenter.json'
-        logger.info(f"Cargando datos desde {json_path}")
-        
-        with open(json_path, 'r', encoding='utf-8') as f:
-            products = json.load(f)
-        
-        logger.info(f"Se cargaron {len(products)} productos del archivo JSON")
-
-        # Preparar datos para WooCommerce
-        woo_products = []
-        for product in products:
-            # Procesar imágenes
-            image_urls = process_images(product.get('image', []))
-            
-            # Procesar descripción y título
-            description = clean_description(product.get('description', ''))
-            if not description:
-                description = f"Producto {product['title']} disponible en NOPA Uruguay. Consulte especificaciones y disponibilidad."
-            
-            # Traducir título al inglés
-            english_title = translate_title(product['title'])
-            
-            # Generar etiquetas basadas en la descripción y título
-            tags = extract_tags_from_description(description, product['title'])
-            
-            woo_product = {
-                'Type': 'simple',
-                'Title': english_title,
-                'Description': description,
-                'Short description': description[:150] + '...' if len(description) > 150 else description,
-                'SKU': product['code'],
-                'Published': 1,
-                'Featured': 0,
-                'Visibility in catalog': 'visible',
-                'Tax status': 'taxable',
-                'Tax class': '',
-                'In stock?': 1 if product['stock'] > 0 else 0,
-                'Stock': product['stock'],
-                'Backorders allowed?': 0,
-                'Sold individually?': 0,
-                'Allow customer reviews?': 1,
-                'Regular price': product['price'],
-                'Categories': f'StarCenter_{product["category_id"]}',
-                'Tags': tags,
-                'Images': '|'.join(image_urls) if image_urls else '',
-                'Position': 0
-            }
-            
-            woo_products.append(woo_product)
-
-        # Crear DataFrame y guardar como CSV
-        df = pd.DataFrame(woo_products)
-        output_dir = 'output'
+        logger.info(f"Leyendo datos desde {json_path}")
         os.makedirs(output_dir, exist_ok=True)
-        output_file = os.path.join(output_dir, 'woo_products.csv')
-        df.to_csv(output_file, index=False)
-        
-        logger.info(f"Proceso completado exitosamente")
-        logger.info(f"Archivo generado: {output_file}")
-        logger.info("Este archivo está listo para ser importado en WooCommerce")
         
-        print(f"Proceso completado exitosamente.")
-        print(f"Archivo generado: {output_file}")
-        print("Este archivo está listo para ser importado en WooCommerce.")
+        # Generar y escribir las filas a medida que se leen los productos
+        count = 0
+        with open(temporary, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=WOO_PRODUCT_COLUMNS, lineterminator=os.linesep)
+            writer.writeheader()
+            for product in iter_json_array(json_path):
+                writer.writerow(build_woo_product(product))
+                count += 1
+        os.replace(temporary, output_file)
 
     except Exception as e:
         logger.error(f"Error al generar archivo de productos: {str(e)}")
         print(f"Error: Error al generar archivo de productos")
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+    
+    logger.info(f"Se procesaron {count} productos del archivo JSON")
+    logger.info(f"Proceso completado exitosamente")
+    logger.info(f"Archivo generado: {output_file}")
+    logger.info("Este archivo está listo para ser importado en WooCommerce")
+    
+    print(f"Proceso completado exitosamente.")
+    print(f"Archivo generado: {output_file}")
+    print("Este archivo está listo para ser importado en WooCommerce.")
+    return output_file
 
 if __name__ == '__main__':
     generate_woo_products()
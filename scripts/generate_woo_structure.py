@@ -1,57 +1,80 @@
 import json
 import pandas as pd
 import os
-
-def generate_category_structure():
+from slugs import SlugService
+from woo_columns import WOO_CATEGORY_COLUMNS, present, set_global_attribute, text_column
+
+CATEGORY_LEVELS = ['Categoría Principal', 'Subcategoría', 'Sub-subcategoría']
+
+def category_id_part(name):
+    """Fragmento del ID de una categoría"""
+    return name.lower().replace(" ", "_")
+
+def category_node(name, slugs, parent=None):
+    """Nodo del árbol de categorías: ID, slug único y descripción se calculan una sola vez"""
+    return {
+        'id': f'{parent["id"]}_{category_id_part(name)}' if parent else f'cat_{category_id_part(name)}',
+        'name': name,
+        'slug': slugs.unique_slug(name),
+        'parent': parent['name'] if parent else '',
+        'description': f'Productos de {name}',
+        'children': []
+    }
+
+def build_category_tree(df, slugs=None):
     """
-    Genera la estructura jerárquica de categorías basada en categorias_convertidas.csv
+    Construye el árbol de categorías en una sola pasada sobre las filas
+    Devuelve la lista de categorías principales en orden de aparición, cada una con sus
+    subcategorías y sub-subcategorías en 'children'. Los índices por ruta evitan volver
+    a filtrar el DataFrame por cada categoría. Los slugs repetidos (p. ej. 'accesorios'
+    bajo dos categorías) reciben los sufijos -2, -3... como en WordPress.
     """
-    # Leer el archivo CSV de categorías convertidas
-    csv_path = os.path.join('output', 'categorias_convertidas.csv')
-    df = pd.read_csv(csv_path)
-    
-    # Generar CSV de categorías
-    cat_rows = []
-    
-    # Procesar categorías principales
-    for main_cat in df['Categoría Principal'].unique():
-        cat_rows.append({
-            'Category ID': f'cat_{main_cat.lower().replace(" ", "_")}',
-            'Category Name': main_cat,
-            'Category Slug': main_cat.lower().replace(" ", "-").replace("(", "").replace(")", ""),
-            'Parent Category': '',
-            'Description': f'Productos de {main_cat}'
-        })
+    slugs = slugs or SlugService()
+    roots = {}
+    sub_nodes = {}
+    subsub_paths = set()
+    for main_cat, sub_cat, subsub_cat in zip(*(df[column] for column in CATEGORY_LEVELS)):
+        if pd.isna(main_cat):
+            continue
+        main_node = roots.get(main_cat)
+        if main_node is None:
+            main_node = roots[main_cat] = category_node(main_cat, slugs)
+        # Una categoría principal sin subcategoría igual se emite, sin hijos
+        if pd.isna(sub_cat):
+            continue
         
-        # Procesar subcategorías
-        sub_cats = df[df['Categoría Principal'] == main_cat]['Subcategoría'].unique()
-        for sub_cat in sub_cats:
+        sub_node = sub_nodes.get((main_cat, sub_cat))
+        if sub_node is None:
             # Eliminar números del inicio (ej: "8.1. ")
             sub_cat_clean = sub_cat.split('. ')[-1] if '. ' in sub_cat else sub_cat
-            cat_rows.append({
-                'Category ID': f'cat_{main_cat.lower().replace(" ", "_")}_{sub_cat_clean.lower().replace(" ", "_")}',
-                'Category Name': sub_cat_clean,
-                'Category Slug': sub_cat_clean.lower().replace(" ", "-").replace("(", "").replace(")", ""),
-                'Parent Category': main_cat,
-                'Description': f'Productos de {sub_cat_clean}'
-            })
-            
-            # Procesar sub-subcategorías
-            subsub_cats = df[(df['Categoría Principal'] == main_cat) & 
-                           (df['Subcategoría'] == sub_cat)]['Sub-subcategoría']
-            for subsub_cat in subsub_cats:
-                if pd.notna(subsub_cat):
-                    # Eliminar asterisco del inicio
-                    subsub_cat_clean = subsub_cat.replace('* ', '')
-                    cat_rows.append({
-                        'Category ID': f'cat_{main_cat.lower().replace(" ", "_")}_{sub_cat_clean.lower().replace(" ", "_")}_{subsub_cat_clean.lower().replace(" ", "_")}',
-                        'Category Name': subsub_cat_clean,
-                        'Category Slug': subsub_cat_clean.lower().replace(" ", "-").replace("(", "").replace(")", ""),
-                        'Parent Category': sub_cat_clean,
-                        'Description': f'Productos de {subsub_cat_clean}'
-                    })
+            sub_node = sub_nodes[(main_cat, sub_cat)] = category_node(sub_cat_clean, slugs, main_node)
+            main_node['children'].append(sub_node)
+        
+        if pd.notna(subsub_cat) and (main_cat, sub_cat, subsub_cat) not in subsub_paths:
+            subsub_paths.add((main_cat, sub_cat, subsub_cat))
+            # Eliminar asterisco del inicio
+            sub_node['children'].append(category_node(subsub_cat.replace('* ', ''), slugs, sub_node))
     
-    return pd.DataFrame(cat_rows)
+    return list(roots.values())
+
+def iter_category_nodes(nodes):
+    """Recorre el árbol en profundidad: cada categoría seguida de sus descendientes"""
+    for node in nodes:
+        yield node
+        yield from iter_category_nodes(node['children'])
+
+def category_tree_to_dataframe(tree):
+    """Filas del CSV de categorías WooCommerce a partir del árbol"""
+    return pd.DataFrame([
+        [node['id'], node['name'], node['slug'], node['parent'], node['description']]
+        for node in iter_category_nodes(tree)
+    ], columns=WOO_CATEGORY_COLUMNS)
+
+def generate_category_structure(csv_path=os.path.join('output', 'categorias_convertidas.csv')):
+    """
+    Genera la estructura jerárquica de categorías basada en categorias_convertidas.csv
+    """
+    return category_tree_to_dataframe(build_category_tree(pd.read_csv(csv_path)))
 
 def generate_product_csv(csv_file='output/productos_starcenter.csv'):
     """
@@ -64,20 +87,9 @@ def generate_product_csv(csv_file='output/productos_starcenter.csv'):
     # Cargar productos del CSV
     productos_df = pd.read_csv(csv_file)
     
-    # Convertir la marca a atributo global
-    def set_marca_attributes(row):
-        marca = str(row.get('Meta: _marca', '')).strip()
-        if pd.notna(marca) and marca != 'nan' and marca != '':
-            row['Attribute 1 name'] = 'Marca'
-            row['Attribute 1 value(s)'] = marca
-            row['Attribute 1 visible'] = 1
-            row['Attribute 1 global'] = 1
-        return row
-    
-    # Aplicar la conversión
-    productos_df = productos_df.apply(set_marca_attributes, axis=1)
-    
-    return productos_df
+    # Convertir la marca a atributo global en las filas que la tienen
+    marca = text_column(productos_df, 'Meta: _marca')
+    return set_global_attribute(productos_df, 1, 'Marca', marca, where=present(marca))
 
 def generate_attributes_sql(products_df, table_prefix='wp_'):
     """
@@ -94,13 +106,20 @@ DELETE FROM {table_prefix}options WHERE option_name = '_transient_wc_attribute_t
 """
     return sql
 
-def generate_menu_sql(categories_df, table_prefix='wp_'):
+def generate_menu_sql(categories, table_prefix='wp_'):
     """
     Genera el SQL para crear el menú en WordPress
     Args:
-        categories_df: DataFrame con las categorías
+        categories: Árbol de categorías de build_category_tree, o el DataFrame de
+            categorías WooCommerce (columnas 'Category Name', 'Category Slug', 'Parent Category')
         table_prefix: Prefijo de las tablas (por defecto 'wp_')
     """
+    if isinstance(categories, pd.DataFrame):
+        parents = categories['Parent Category']
+        main_categories = categories[parents.isna() | (parents == '')]
+        main_categories = list(zip(main_categories['Category Name'], main_categories['Category Slug']))
+    else:
+        main_categories = [(node['name'], node['slug']) for node in categories]
     menu_name = "Mega Electronics"
     sql = f"""-- Crear el menú principal
 INSERT INTO {table_prefix}terms (name, slug) 
@@ -120,23 +139,22 @@ ON DUPLICATE KEY UPDATE option_value = VALUES(option_value);"""
 
     # Agregar items del menú
     menu_order = 0
-    for _, cat in categories_df.iterrows():
-        if not cat['Parent Category']:  # Solo categorías principales
-            menu_order += 1
-            sql += f"""
+    for name, slug in main_categories:  # Solo categorías principales
+        menu_order += 1
+        sql += f"""
 
--- Agregar categoría: {cat['Category Name']}
+-- Agregar categoría: {name}
 INSERT INTO {table_prefix}posts 
 (post_author, post_date, post_date_gmt, post_status, post_type, menu_order, post_title) 
 VALUES 
-(1, NOW(), NOW(), 'publish', 'nav_menu_item', {menu_order}, '{cat['Category Name']}');
+(1, NOW(), NOW(), 'publish', 'nav_menu_item', {menu_order}, '{name}');
 
 SET @item_id = LAST_INSERT_ID();
 
 INSERT INTO {table_prefix}postmeta (post_id, meta_key, meta_value) VALUES 
 (@item_id, '_menu_item_type', 'taxonomy'),
 (@item_id, '_menu_item_menu_item_parent', '0'),
-(@item_id, '_menu_item_object_id', (SELECT term_id FROM {table_prefix}terms WHERE slug = '{cat['Category Slug']}' LIMIT 1)),
+(@item_id, '_menu_item_object_id', (SELECT term_id FROM {table_prefix}terms WHERE slug = '{slug}' LIMIT 1)),
 (@item_id, '_menu_item_object', 'product_cat'),
 (@item_id, '_menu_item_target', ''),
 (@item_id, '_menu_item_classes', 'a:1:{{i:0;s:0:""}}'),
@@ -149,8 +167,9 @@ VALUES (@item_id, @menu_tt_id);"""
     return sql.strip()
 
 def main():
-    # Generar estructura de categorías
-    categories_df = generate_category_structure()
+    # Generar el árbol de categorías: de él salen el CSV y el menú
+    category_tree = build_category_tree(pd.read_csv(os.path.join('output', 'categorias_convertidas.csv')))
+    categories_df = category_tree_to_dataframe(category_tree)
     
     # Crear directorio de salida
     output_dir = 'output'
@@ -164,7 +183,7 @@ def main():
     products_df.to_csv(os.path.join(output_dir, 'woo_products.csv'), index=False)
     
     # Generar y guardar SQL del menú
-    menu_sql = generate_menu_sql(categories_df)
+    menu_sql = generate_menu_sql(category_tree)
     with open(os.path.join(output_dir, 'menu_structure.sql'), 'w') as f:
         f.write(menu_sql)
     
@@ -0,0 +1,249 @@
+"""
+Ingesta de imágenes de productos
+Descarga con asyncio las imágenes del feed del proveedor (image[].urlImage) con concurrencia
+acotada, una sola sesión HTTP que reutiliza las conexiones y reintentos con espera exponencial.
+Los archivos se deduplican por hash SHA-256 del contenido y se guardan con la estructura de
+wp-content/uploads (AAAA/MM/archivo). El manifiesto URL → archivo queda en PipelineState, así
+una nueva ejecución solo descarga las URLs nuevas. Luego crea en bloque los adjuntos de
+WordPress y vincula _thumbnail_id / _product_image_gallery de cada producto.
+Uso:
+    python image_ingest.py [--json ../data/Starcenter.json] [--base-url http://127.0.0.1:8000/] [--no-db]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import logging
+import mimetypes
+import random
+import time
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+import aiohttp
+from config import IMAGE_CONFIG
+from generate_woo_products import process_images
+from json_stream import iter_json_array
+from pipeline_state import PipelineState
+from slugs import slugify
+
+DEFAULT_JSON_PATH = Path(__file__).resolve().parent.parent / 'data' / 'Starcenter.json'
+MANIFEST_NAMESPACE = 'images'
+# Respuestas transitorias que vale la pena reintentar
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+class ImageIngestor:
+    def __init__(self, uploads_dir=None, state=None, concurrency=None, retries=None, backoff=None, timeout=None,
+                 manifest_every=None):
+        self.uploads_dir = Path(uploads_dir or IMAGE_CONFIG['uploads_dir'])
+        self.state = state
+        self.concurrency = concurrency or IMAGE_CONFIG['concurrency']
+        self.retries = IMAGE_CONFIG['retries'] if retries is None else retries
+        self.backoff = IMAGE_CONFIG['backoff'] if backoff is None else backoff
+        self.timeout = timeout or IMAGE_CONFIG['timeout']
+        self.manifest_every = manifest_every or IMAGE_CONFIG['manifest_every']
+        # Manifiesto URL -> {sha256, file, mime, size} de las descargas anteriores
+        self.manifest = {}
+        if state is not None:
+            self.manifest = {url: payload for url, (_, payload) in state.get_records(MANIFEST_NAMESPACE).items()}
+        self.files_by_hash = {entry['sha256']: entry['file'] for entry in self.manifest.values()}
+        self._used_files = set(self.files_by_hash.values())
+        self._new_urls = []
+        self.stats = {'downloaded': 0, 'cached': 0, 'duplicates': 0, 'failed': 0, 'retries': 0, 'bytes': 0}
+
+    def download(self, urls):
+        """
+        Descarga las URLs que no están en el manifiesto (o cuyo archivo ya no existe)
+        y devuelve el manifiesto de todas las que se pudieron obtener.
+        """
+        urls = list(dict.fromkeys(urls))
+        pending = [url for url in urls if not self._is_cached(url)]
+        self.stats['cached'] += len(urls) - len(pending)
+        if pending:
+            try:
+                asyncio.run(self._download_all(pending))
+            finally:
+                # Aun si la ejecución se interrumpe, los archivos ya guardados quedan en el manifiesto
+                self.save_manifest()
+        return {url: self.manifest[url] for url in urls if url in self.manifest}
+
+    def _is_cached(self, url):
+        entry = self.manifest.get(url)
+        return entry is not None and (self.uploads_dir / entry['file']).exists()
+
+    def save_manifest(self):
+        """Guarda en PipelineState las entradas nuevas del manifiesto"""
+        if self.state is not None and self._new_urls:
+            self.state.save_records(MANIFEST_NAMESPACE, (
+                (url, self.manifest[url]['sha256'], self.manifest[url]) for url in self._new_urls
+            ))
+        self._new_urls = []
+
+    async def _download_all(self, urls):
+        queue = asyncio.Queue()
+        for url in urls:
+            queue.put_nowait(url)
+        # Una sola sesión: el conector mantiene abiertas y reutiliza hasta concurrency conexiones
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            workers = min(self.concurrency, len(urls))
+            await asyncio.gather(*(self._worker(session, queue) for _ in range(workers)))
+
+    async def _worker(self, session, queue):
+        while not queue.empty():
+            url = queue.get_nowait()
+            result = await self._fetch(session, url)
+            if result is not None:
+                self._store(url, *result)
+
+    async def _fetch(self, session, url):
+        """Contenido y tipo de una URL; reintenta errores de red y respuestas transitorias"""
+        error = None
+        for attempt in range(self.retries + 1):
+            try:
+                async with session.get(url) as response:
+                    if response.status == 200:
+                        return await response.read(), response.content_type
+                    error = f"HTTP {response.status}"
+                    if response.status not in RETRY_STATUSES:
+                        break
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = str(e) or type(e).__name__
+            if attempt < self.retries:
+                self.stats['retries'] += 1
+                # Espera exponencial con variación aleatoria para no reintentar todos a la vez
+                await asyncio.sleep(self.backoff * 2 ** attempt * (1 + random.random()))
+        self.stats['failed'] += 1
+        logging.warning(f"No se pudo descargar {url}: {error}")
+        return None
+
+    def _store(self, url, content, content_type):
+        """Guarda el contenido si es nuevo y registra la URL en el manifiesto"""
+        sha256 = hashlib.sha256(content).hexdigest()
+        file = self.files_by_hash.get(sha256)
+        if file is not None and (self.uploads_dir / file).exists():
+            self.stats['duplicates'] += 1
+        else:
+            file, exists = self._new_file(url, content_type, sha256)
+            if not exists:
+                path = self.uploads_dir / file
+                path.parent.mkdir(parents=True, exist_ok=True)
+                path.write_bytes(content)
+            self.files_by_hash[sha256] = file
+            self.stats['downloaded'] += 1
+            self.stats['bytes'] += len(content)
+        if not content_type.startswith('image/'):
+            content_type = mimetypes.guess_type(file)[0] or 'image/jpeg'
+        self.manifest[url] = {'sha256': sha256, 'file': file, 'mime': content_type, 'size': len(content)}
+        self._new_urls.append(url)
+        if len(self._new_urls) >= self.manifest_every:
+            self.save_manifest()
+
+    def _new_file(self, url, content_type, sha256):
+        """
+        Ruta AAAA/MM/nombre.ext para una imagen, con sufijo -1, -2... si el nombre está ocupado.
+        Devuelve (ruta, existe): si un archivo en disco ya tiene el mismo contenido (p. ej. de una
+        ejecución interrumpida antes de guardar el manifiesto) se reutiliza en lugar de duplicarlo.
+        """
+        name = Path(unquote(urlsplit(url).path)).name
+        stem = slugify(Path(name).stem) or 'imagen'
+        suffix = Path(name).suffix.lower() or mimetypes.guess_extension(content_type) or '.jpg'
+        folder = datetime.now().strftime('%Y/%m')
+        candidate = f"{folder}/{stem}{suffix}"
+        counter = 1
+        while True:
+            if candidate not in self._used_files:
+                path = self.uploads_dir / candidate
+                if not path.exists():
+                    exists = False
+                    break
+                if hashlib.sha256(path.read_bytes()).hexdigest() == sha256:
+                    exists = True
+                    break
+            candidate = f"{folder}/{stem}-{counter}{suffix}"
+            counter += 1
+        self._used_files.add(candidate)
+        return candidate, exists
+
+def load_product_images(json_path, base_url=None, limit=None):
+    """SKU -> (título, URLs de imágenes) de los productos del feed, leído de forma incremental"""
+    products = {}
+    for product in iter_json_array(json_path):
+        if limit is not None and len(products) >= limit:
+            break
+        urls = process_images(product.get('image') or [], base_url)
+        if product.get('code') and urls:
+            products[product['code']] = (product.get('title', ''), urls)
+    return products
+
+def attach_product_images(importer, products, manifest):
+    """
+    Crea los adjuntos que faltan y vincula las imágenes de cada producto.
+    products es SKU -> (título, URLs) y manifest URL -> entrada del manifiesto.
+    Un mismo archivo (por contenido) se adjunta una sola vez aunque lo usen varios productos.
+    """
+    if importer.sku_index is None:
+        importer.refresh_sku_index()
+    attachment_ids = importer.get_attachments_by_file()
+    product_files = {}
+    new_files = {}
+    for sku, (title, urls) in products.items():
+        product_id = importer.sku_index.get(sku)
+        if not product_id:
+            continue
+        files = list(dict.fromkeys(manifest[url]['file'] for url in urls if url in manifest))
+        product_files[product_id] = files
+        for url in urls:
+            entry = manifest.get(url)
+            if entry and entry['file'] not in attachment_ids and entry['file'] not in new_files:
+                new_files[entry['file']] = {'file': entry['file'], 'mime': entry['mime'],
+                                            'title': title, 'parent': product_id}
+
+    attachment_ids.update(importer.create_attachments(new_files.values()))
+    linked = importer.set_product_images({
+        product_id: [attachment_ids[file] for file in files] for product_id, files in product_files.items()
+    })
+    return {'attachments_created': len(new_files), 'products_linked': linked,
+            'products_missing': len(products) - len(product_files)}
+
+def main():
+    parser = argparse.ArgumentParser(description='Descarga las imágenes de los productos y crea sus adjuntos')
+    parser.add_argument('--json', default=str(DEFAULT_JSON_PATH), help='JSON del proveedor')
+    parser.add_argument('--base-url', default=None,
+                        help='Prefijo de las URLs (p. ej. un servidor local con imágenes de prueba)')
+    parser.add_argument('--uploads-dir', default=None, help='Directorio raíz de uploads')
+    parser.add_argument('--state', default='output/pipeline_state.sqlite', help='Base de estado del pipeline')
+    parser.add_argument('--concurrency', type=int, default=None, help='Descargas simultáneas')
+    parser.add_argument('--limit', type=int, default=None, help='Procesar solo los primeros N productos')
+    parser.add_argument('--no-db', action='store_true', help='Solo descargar, sin crear adjuntos')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    state = PipelineState(args.state)
+    try:
+        products = load_product_images(args.json, args.base_url, args.limit)
+        ingestor = ImageIngestor(args.uploads_dir, state, concurrency=args.concurrency)
+        started = time.perf_counter()
+        manifest = ingestor.download(url for _, urls in products.values() for url in urls)
+        elapsed = time.perf_counter() - started
+        stats = ingestor.stats
+        print(f"Imágenes: {stats['downloaded']} descargadas ({stats['bytes'] / 1e6:.1f} MB), "
+              f"{stats['duplicates']} duplicadas, {stats['cached']} ya descargadas, "
+              f"{stats['failed']} fallidas, {stats['retries']} reintentos en {elapsed:.1f} s")
+
+        if not args.no_db:
+            from woo_importer import WooCommerceImporter
+            importer = WooCommerceImporter()
+            try:
+                summary = attach_product_images(importer, products, manifest)
+            finally:
+                importer.close()
+            print(f"Adjuntos creados: {summary['attachments_created']}, "
+                  f"productos vinculados: {summary['products_linked']}, "
+                  f"sin producto en la base: {summary['products_missing']}")
+    finally:
+        state.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Lectura incremental de arrays JSON
+Recorre el array de nivel superior de un archivo (p. ej. Starcenter.json) y devuelve
+un elemento por vez, leyendo el archivo por bloques: la memoria depende del tamaño
+de cada producto y no del tamaño total del feed.
+"""
+
+import json
+
+_WHITESPACE = ' \t\n\r'
+_DELIMITERS = _WHITESPACE + ',]'
+
+def iter_json_array(path, buffer_size=1 << 16):
+    """Genera uno a uno los elementos del array JSON de nivel superior de un archivo"""
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer, position, eof = _refill(f, '', 0, buffer_size)
+        # Saltar un BOM eventual y los espacios previos a la apertura del array
+        if buffer.startswith('\ufeff'):
+            position = 1
+        while True:
+            position = _skip_whitespace(buffer, position)
+            if position < len(buffer) or eof:
+                break
+            buffer, position, eof = _refill(f, buffer, position, buffer_size)
+        if position >= len(buffer) or buffer[position] != '[':
+            raise ValueError(f"{path} no contiene un array JSON")
+        position += 1
+        expect_value = True
+
+        while True:
+            position = _skip_whitespace(buffer, position)
+            if position >= len(buffer):
+                if eof:
+                    raise ValueError(f"{path}: array JSON sin cerrar")
+                buffer, position, eof = _refill(f, buffer, position, buffer_size)
+                continue
+
+            char = buffer[position]
+            if char == ']':
+                return
+            if char == ',' and not expect_value:
+                position += 1
+                expect_value = True
+                continue
+
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                buffer, position, eof = _refill(f, buffer, position, buffer_size)
+                continue
+            if not eof and (end == len(buffer) or buffer[end] not in _DELIMITERS):
+                # Un número cortado por el bloque (p. ej. "7" de "7.5e3") puede continuar en el siguiente
+                buffer, position, eof = _refill(f, buffer, position, buffer_size)
+                continue
+
+            yield item
+            position = end
+            expect_value = False
+
+def _skip_whitespace(buffer, position):
+    while position < len(buffer) and buffer[position] in _WHITESPACE:
+        position += 1
+    return position
+
+def _refill(f, buffer, position, buffer_size):
+    """Descarta lo ya consumido del buffer y agrega el siguiente bloque del archivo"""
+    chunk = f.read(buffer_size)
+    return buffer[position:] + chunk, 0, not chunk
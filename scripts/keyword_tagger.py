@@ -0,0 +1,90 @@
+"""
+Etiquetado de productos por palabras clave
+Compila el diccionario palabra clave → etiquetas (data/tech_keywords.json) en una única
+expresión regular, de modo que cada texto se recorre una sola vez sin importar cuántas
+palabras clave haya. Las coincidencias no pueden estar pegadas a otras letras: 'HD' ya no
+coincide dentro de 'HDMI', pero 'USB' sí en 'USB3.0'. Se acepta el plural de cada palabra
+clave (CABLE/CABLES, AURICULAR/AURICULARES).
+"""
+
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Set
+
+DEFAULT_KEYWORDS_PATH = Path(__file__).resolve().parent.parent / 'data' / 'tech_keywords.json'
+DEFAULT_TAGS = ['tecnología', 'producto']
+# Límite de palabra por letras: una palabra clave puede estar junto a dígitos o signos
+LETTER_BEFORE = r'(?<![^\W\d_])'
+LETTER_AFTER = r'(?![^\W\d_])'
+EMPTY_TEXT_TAGS = 'producto, tecnología'
+
+class KeywordTagger:
+    def __init__(self, keywords: Dict[str, str], default_tags: List[str] = DEFAULT_TAGS):
+        # Etiquetas de cada palabra clave, separadas una sola vez
+        self.keywords = {
+            keyword.upper(): tuple(tag.strip() for tag in tags.split(',') if tag.strip())
+            for keyword, tags in keywords.items()
+        }
+        self.default_tags = set(default_tags)
+        # La anticipación de la primera letra descarta rápido las posiciones que no pueden coincidir
+        first_chars = ''.join(re.escape(char) for char in sorted({keyword[0] for keyword in self.keywords}))
+        self.pattern = re.compile(
+            rf'(?=[{first_chars}]){LETTER_BEFORE}(?P<keyword>{trie_pattern(self.keywords)})(?:ES|S)?{LETTER_AFTER}'
+        ) if self.keywords else None
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_KEYWORDS_PATH) -> 'KeywordTagger':
+        """Carga el diccionario de palabras clave desde un archivo JSON"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def keywords_in(self, text: str) -> Set[str]:
+        """Palabras clave presentes en el texto, en una sola pasada"""
+        if self.pattern is None:
+            return set()
+        return {match.group('keyword') for match in self.pattern.finditer(text.upper())}
+
+    def tag(self, description: str, title: str) -> str:
+        """Etiquetas de un producto a partir de su descripción y título"""
+        if not description and not title:
+            return EMPTY_TEXT_TAGS
+        tags = set()
+        for keyword in self.keywords_in(description + ' ' + title):
+            tags.update(self.keywords[keyword])
+        # Asegurar que siempre tengamos al menos algunas etiquetas
+        return ', '.join(sorted(tags or self.default_tags))
+
+    def tag_many(self, products: Iterable[Dict]) -> List[str]:
+        """Etiquetas de un catálogo completo de productos con 'description' y 'title'"""
+        return [self.tag(product.get('description', ''), product.get('title', '')) for product in products]
+
+def trie_pattern(words: Iterable[str]) -> str:
+    """
+    Alternancia de las palabras factorizada por prefijos comunes (un trie como regex).
+    El motor descarta en un solo paso todas las palabras que no comparten el prefijo leído,
+    en lugar de probar cada alternativa; los cuantificadores voraces prefieren la palabra más larga.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    return _node_pattern(trie)
+
+def _node_pattern(node: Dict) -> str:
+    optional = '' in node
+    branches = [re.escape(char) + _node_pattern(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+    pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    if optional:
+        return (pattern if len(branches) > 1 else '(?:' + pattern + ')') + '?'
+    return pattern
+
+@lru_cache(maxsize=None)
+def get_default_tagger() -> KeywordTagger:
+    """Etiquetador con el diccionario por defecto, compilado una sola vez por proceso"""
+    return KeywordTagger.from_file()
@@ -0,0 +1,169 @@
+"""
+Importación paralela de productos
+Reparte los productos entre N workers según el hash del SKU, de modo que dos
+workers nunca escriben el mismo producto y no compiten por bloqueos en postmeta.
+Cada worker usa su propio WooCommerceImporter (y por lo tanto su propia conexión)
+con transacciones por bloque; el coordinador agrega progreso, errores y rendimiento.
+Los slugs de los productos nuevos que no lo traen se generan en el coordinador antes
+de repartir, para que dos workers no asignen el mismo slug a nombres repetidos.
+Uso:
+    python parallel_importer.py productos.csv --workers 8 --mode process [--delta]
+"""
+
+import argparse
+import multiprocessing
+import queue
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from woo_importer import WooCommerceImporter, iter_csv_products
+
+def shard_for_sku(sku, workers):
+    """Partición estable de un SKU (no depende de PYTHONHASHSEED)"""
+    return zlib.crc32(str(sku).encode('utf-8')) % workers
+
+def partition_products(products, workers):
+    """Reparte los productos en una lista por worker según su SKU"""
+    shards = [[] for _ in range(workers)]
+    for data in products:
+        shards[shard_for_sku(data.get('sku', ''), workers)].append(data)
+    return shards
+
+def _import_shard(shard_index, workers, products, batch_size, delta, delete_missing, progress):
+    """Importa una partición completa en un worker y devuelve sus métricas"""
+    started = time.perf_counter()
+    importer = WooCommerceImporter()
+
+    def on_chunk(row_count, summary):
+        progress.put((shard_index, row_count))
+
+    try:
+        if delta:
+            summary = importer.sync_products(
+                products, batch_size=batch_size, delete_missing=delete_missing, on_chunk=on_chunk,
+                owns_sku=lambda sku: shard_for_sku(sku, workers) == shard_index
+            )
+        else:
+            summary = importer.import_products(products, batch_size=batch_size, on_chunk=on_chunk)
+        db_stats = importer.db.get_stats()
+    finally:
+        importer.close()
+
+    seconds = time.perf_counter() - started
+    return {
+        'worker': shard_index,
+        'rows': len(products),
+        'seconds': seconds,
+        'rows_per_second': len(products) / seconds if seconds > 0 else 0,
+        'summary': summary,
+        'db_stats': db_stats
+    }
+
+class ParallelImporter:
+    def __init__(self, workers=4, mode='process', batch_size=None):
+        if mode not in ('process', 'thread'):
+            raise ValueError(f"Modo de ejecución no válido: {mode}")
+        self.workers = workers
+        self.mode = mode
+        self.batch_size = batch_size
+
+    def run(self, products, delta=False, delete_missing=False):
+        """
+        Importa los productos repartidos entre los workers.
+        Devuelve el resumen agregado, los errores y el rendimiento de cada worker.
+        """
+        products = list(products)
+        if any(not data.get('slug') for data in products):
+            coordinator = WooCommerceImporter()
+            try:
+                products = coordinator.assign_new_slugs(products)
+            finally:
+                coordinator.close()
+        shards = partition_products(products, self.workers)
+        total_rows = sum(len(shard) for shard in shards)
+        started = time.perf_counter()
+
+        if self.mode == 'process':
+            manager = multiprocessing.Manager()
+            progress = manager.Queue()
+            executor = ProcessPoolExecutor(max_workers=self.workers)
+        else:
+            manager = None
+            progress = queue.Queue()
+            executor = ThreadPoolExecutor(max_workers=self.workers)
+
+        results, errors = [], []
+        done_rows = 0
+        try:
+            futures = {
+                executor.submit(_import_shard, index, self.workers, shard, self.batch_size,
+                                delta, delete_missing, progress): index
+                for index, shard in enumerate(shards)
+            }
+            pending = set(futures)
+            while pending:
+                finished, pending = wait(pending, timeout=1, return_when=FIRST_COMPLETED)
+                done_rows += self._drain_progress(progress)
+                print(f"Progreso: {done_rows}/{total_rows} filas, {len(pending)} workers activos")
+                for future in finished:
+                    try:
+                        results.append(future.result())
+                    except Exception as e:
+                        errors.append({'worker': futures[future], 'error': str(e)})
+                        print(f"Error en worker {futures[future]}: {str(e)}")
+        finally:
+            executor.shutdown()
+            if manager is not None:
+                manager.shutdown()
+
+        seconds = time.perf_counter() - started
+        summary = {}
+        for result in results:
+            for key, value in result['summary'].items():
+                summary[key] = summary.get(key, 0) + value
+
+        return {
+            'workers': self.workers,
+            'mode': self.mode,
+            'rows': total_rows,
+            'seconds': seconds,
+            'rows_per_second': total_rows / seconds if seconds > 0 else 0,
+            'summary': summary,
+            'errors': errors,
+            'per_worker': sorted(results, key=lambda result: result['worker'])
+        }
+
+    @staticmethod
+    def _drain_progress(progress):
+        """Suma las filas reportadas por los workers desde la última consulta"""
+        rows = 0
+        while True:
+            try:
+                _, row_count = progress.get_nowait()
+            except queue.Empty:
+                return rows
+            rows += row_count
+
+def main():
+    parser = argparse.ArgumentParser(description='Importación paralela de productos desde CSV')
+    parser.add_argument('csv_file')
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count())
+    parser.add_argument('--mode', choices=['process', 'thread'], default='process')
+    parser.add_argument('--batch-size', type=int, default=None)
+    parser.add_argument('--delta', action='store_true', help='Solo escribir productos modificados')
+    parser.add_argument('--delete-missing', action='store_true', help='En modo delta, eliminar productos ausentes')
+    args = parser.parse_args()
+
+    importer = ParallelImporter(args.workers, args.mode, args.batch_size)
+    result = importer.run(iter_csv_products(args.csv_file), delta=args.delta, delete_missing=args.delete_missing)
+
+    for worker in result['per_worker']:
+        print(f"Worker {worker['worker']}: {worker['rows']} filas en {worker['seconds']:.1f} s "
+              f"({worker['rows_per_second']:.0f} filas/s)")
+    print(f"Total: {result['rows']} filas en {result['seconds']:.1f} s ({result['rows_per_second']:.0f} filas/s)")
+    print(f"Resumen: {result['summary']}")
+    if result['errors']:
+        print(f"Workers con error: {len(result['errors'])}")
+
+if __name__ == '__main__':
+    main()
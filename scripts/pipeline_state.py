@@ -0,0 +1,95 @@
+"""
+Estado persistente del pipeline de catálogo
+Guarda en SQLite el hash de contenido de cada archivo de entrada, de cada registro
+procesado y las salidas de cada etapa, para que una nueva ejecución omita lo que no cambió.
+"""
+
+import hashlib
+import json
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+class PipelineState:
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(str(self.db_path))
+        self.connection.executescript("""
+        CREATE TABLE IF NOT EXISTS stages (
+            stage TEXT PRIMARY KEY,
+            inputs_hash TEXT NOT NULL,
+            outputs TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS records (
+            namespace TEXT NOT NULL,
+            key TEXT NOT NULL,
+            hash TEXT NOT NULL,
+            payload TEXT,
+            PRIMARY KEY (namespace, key)
+        );
+        """)
+
+    @staticmethod
+    def file_hash(path) -> str:
+        """Hash SHA-256 del contenido de un archivo, leído por bloques"""
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def record_hash(record) -> str:
+        """Hash SHA-256 estable de un registro serializable a JSON"""
+        payload = json.dumps(record, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def combined_hash(cls, *hashes) -> str:
+        """Combina varios hashes en uno solo"""
+        return cls.record_hash(list(hashes))
+
+    def stage_is_current(self, stage: str, inputs_hash: str) -> bool:
+        """True si la etapa ya se ejecutó con las mismas entradas y sus salidas siguen existiendo"""
+        row = self.connection.execute(
+            "SELECT inputs_hash, outputs FROM stages WHERE stage = ?", (stage,)
+        ).fetchone()
+        if row is None or row[0] != inputs_hash:
+            return False
+        return all(Path(path).exists() for path in json.loads(row[1]))
+
+    def save_stage(self, stage: str, inputs_hash: str, outputs: list):
+        """Registra la ejecución de una etapa con sus entradas y archivos generados"""
+        self.connection.execute(
+            "INSERT OR REPLACE INTO stages (stage, inputs_hash, outputs, updated_at) VALUES (?, ?, ?, ?)",
+            (stage, inputs_hash, json.dumps([str(path) for path in outputs]), datetime.now().isoformat())
+        )
+        self.connection.commit()
+
+    def get_records(self, namespace: str) -> dict:
+        """Devuelve {clave: (hash, payload)} de un espacio de nombres"""
+        rows = self.connection.execute(
+            "SELECT key, hash, payload FROM records WHERE namespace = ?", (namespace,)
+        )
+        return {key: (record_hash, json.loads(payload) if payload else None)
+                for key, record_hash, payload in rows}
+
+    def save_records(self, namespace: str, records, replace: bool = False):
+        """
+        Guarda registros (clave, hash, payload) de un espacio de nombres
+        Con replace=True elimina antes los registros previos del espacio.
+        """
+        if replace:
+            self.connection.execute("DELETE FROM records WHERE namespace = ?", (namespace,))
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO records (namespace, key, hash, payload) VALUES (?, ?, ?, ?)",
+            ((namespace, key, record_hash, json.dumps(payload, ensure_ascii=False, default=str))
+             for key, record_hash, payload in records)
+        )
+        self.connection.commit()
+
+    def close(self):
+        """Cierra la base de estado"""
+        self.connection.close()
@@ -1,8 +1,11 @@
 from pathlib import Path
 from category_manager import CategoryManager
-from product_integrator import ProductIntegrator
+from product_integrator import COMPARISON_VERSION, ProductIntegrator
+from pipeline_state import PipelineState
+import argparse
 import logging
 from datetime import datetime
+import pandas as pd
 
 def setup_logging(base_dir: Path):
     """Configurar logging para el proceso completo"""
@@ -15,7 +18,55 @@ def setup_logging(base_dir: Path):
         format='%(asctime)s - %(levelname)s - %(message)s'
     )
 
+def compare_products_incremental(product_integrator, state, context_hash, force=False, block_size=5000):
+    """
+    Compara solo los productos JSON cuyo registro cambió desde la última ejecución.
+    Los demás reutilizan la fila de comparación guardada en el estado.
+    El JSON se recorre por streaming y los cambios se recalculan por bloques.
+    """
+    cached = {} if force else state.get_records('comparison')
+    keys, hashes, rows = [], [], []
+    pending = []
+    occurrences = {}
+    recalculated = 0
+    
+    def compare_pending():
+        new_rows = product_integrator.compare_products([product for _, product in pending]).to_dict('records')
+        for (position, _), row in zip(pending, new_rows):
+            rows[position] = row
+        pending.clear()
+    
+    for json_product in product_integrator.iter_json_products():
+        # Clave estable por código de producto (con sufijo si el código se repite)
+        code = str(json_product.get('code', ''))
+        occurrences[code] = occurrences.get(code, 0) + 1
+        key = code if occurrences[code] == 1 else f"{code}#{occurrences[code]}"
+        record_hash = PipelineState.combined_hash(context_hash, PipelineState.record_hash(json_product))
+        
+        keys.append(key)
+        hashes.append(record_hash)
+        if key in cached and cached[key][0] == record_hash:
+            rows.append(cached[key][1])
+        else:
+            rows.append(None)
+            pending.append((len(rows) - 1, json_product))
+            recalculated += 1
+            if len(pending) >= block_size:
+                compare_pending()
+    
+    if pending:
+        compare_pending()
+    logging.info(f"Productos recalculados: {recalculated} de {len(rows)}")
+    
+    state.save_records('comparison', zip(keys, hashes, rows), replace=True)
+    return pd.DataFrame(rows)
+
 def main():
+    parser = argparse.ArgumentParser(description='Procesa el catálogo de categorías y productos')
+    parser.add_argument('--force', action='store_true',
+                        help='Reprocesar todo aunque las entradas no hayan cambiado')
+    args = parser.parse_args()
+    
     # Configuración de directorios
     BASE_DIR = Path("/Users/heydagen/Corporate Ecommerce")
     DATA_DIR = Path("/Users/heydagen/Documents/Proyectos/NOPA")
@@ -31,35 +82,53 @@ def main():
     PRODUCTS_CSV = DATA_DIR / "Lista de productos/CSV/Productos_Nopa.csv"
     JSON_PATH = DATA_DIR / "Lista de productos/JSON/Starcenter.json"
     
+    # Estado de ejecuciones anteriores (hashes de entradas y salidas)
+    state = PipelineState(OUTPUT_DIR / "pipeline_state.sqlite")
+    
     try:
-        # 1. Procesar categorías
-        logging.info("Iniciando procesamiento de categorías")
-        category_manager = CategoryManager(str(BASE_DIR))
+        categories_hash = state.file_hash(CATEGORIES_CSV)
         
-        if not category_manager.load_categories(str(CATEGORIES_CSV)):
-            raise Exception("Error al cargar categorías")
-            
-        # Exportar menú de categorías para WooCommerce
+        # 1. Procesar categorías
         woo_categories_path = OUTPUT_DIR / "woo_categories.csv"
-        if not category_manager.export_category_menu(str(woo_categories_path)):
-            raise Exception("Error al exportar categorías")
+        if not args.force and state.stage_is_current('categories', categories_hash):
+            logging.info("Categorías sin cambios, se omite la etapa")
+        else:
+            logging.info("Iniciando procesamiento de categorías")
+            category_manager = CategoryManager(str(BASE_DIR))
             
-        # 2. Procesar productos
-        logging.info("Iniciando procesamiento de productos")
-        product_integrator = ProductIntegrator(str(BASE_DIR))
-        
-        # Cargar datos
-        if not all([
-            product_integrator.load_json_data(str(JSON_PATH)),
-            product_integrator.load_csv_data(str(PRODUCTS_CSV), str(CATEGORIES_CSV))
-        ]):
-            raise Exception("Error al cargar datos de productos")
+            if not category_manager.load_categories(str(CATEGORIES_CSV)):
+                raise Exception("Error al cargar categorías")
+                
+            # Exportar menú de categorías para WooCommerce
+            if not category_manager.export_category_menu(str(woo_categories_path)):
+                raise Exception("Error al exportar categorías")
+            state.save_stage('categories', categories_hash,
+                             [woo_categories_path, OUTPUT_DIR / "category_mapping.json"])
             
-        # Generar reporte de comparación
+        # 2. Procesar productos
         comparison_path = OUTPUT_DIR / "product_comparison"
-        comparison_path.mkdir(exist_ok=True)
-        if not product_integrator.export_comparison_report(str(comparison_path)):
-            raise Exception("Error al generar reporte de comparación")
+        context_hash = PipelineState.combined_hash(categories_hash, state.file_hash(PRODUCTS_CSV), COMPARISON_VERSION)
+        products_hash = PipelineState.combined_hash(context_hash, state.file_hash(JSON_PATH))
+        if not args.force and state.stage_is_current('products', products_hash):
+            logging.info("Productos sin cambios, se omite la etapa")
+        else:
+            logging.info("Iniciando procesamiento de productos")
+            product_integrator = ProductIntegrator(str(BASE_DIR), str(OUTPUT_DIR))
+            
+            # Cargar datos
+            if not all([
+                product_integrator.load_json_data(str(JSON_PATH)),
+                product_integrator.load_csv_data(str(PRODUCTS_CSV), str(CATEGORIES_CSV))
+            ]):
+                raise Exception("Error al cargar datos de productos")
+                
+            # Generar reporte de comparación, recalculando solo los productos modificados
+            comparison_path.mkdir(exist_ok=True)
+            comparison_df = compare_products_incremental(product_integrator, state, context_hash, args.force)
+            if not product_integrator.export_comparison_report(str(comparison_path), comparison_df):
+                raise Exception("Error al generar reporte de comparación")
+            state.save_stage('products', products_hash,
+                             [comparison_path / "product_comparison.csv", comparison_path / "comparison_stats.json"])
         
         logging.info("Procesamiento completado exitosamente")
         print(f"""
@@ -75,6 +144,8 @@ Siguiente paso: Importar woo_categories.csv en WooCommerce usando el plugin de W
     except Exception as e:
         logging.error(f"Error en el procesamiento: {str(e)}")
         print(f"Error: {str(e)}")
+    finally:
+        state.close()
 
 if __name__ == "__main__":
     main()
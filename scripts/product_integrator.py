@@ -4,26 +4,30 @@ from pathlib import Path
 import json
 import logging
 from datetime import datetime
-import unidecode
-import re
-from typing import Dict, List, Optional
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+from category_matcher import MODEL_VERSION, CategoryMatcher
+from json_stream import iter_json_array
+from pipeline_state import PipelineState
+from record_linkage import ProductLinker, jaccard_similarity
+from text_normalize import normalize_many, normalize_text
+
+# Modelo de categorías ajustado, reutilizado mientras no cambie la taxonomía
+CATEGORY_MODEL_FILE = 'category_model.npz'
+# Versión del formato de las filas de comparación: invalida las guardadas por ejecuciones anteriores
+COMPARISON_VERSION = 2
 
 class ProductIntegrator:
-    def __init__(self, base_dir: str):
+    def __init__(self, base_dir: str, output_dir: Optional[str] = None):
         self.base_dir = Path(base_dir)
+        self.output_dir = Path(output_dir) if output_dir else self.base_dir / 'output'
         self.setup_logging()
         self.categories_df = None
+        self.categories_csv = None
         self.products_df = None
-        self.raw_json_data = None
-        self.vectorizer = TfidfVectorizer(
-            analyzer='word',
-            token_pattern=r'\w+',
-            ngram_range=(1, 2),
-            min_df=2,
-            stop_words=['de', 'la', 'el', 'y', 'en', 'con', 'para', 'por', 'los', 'las']
-        )
+        self.json_path = None
+        self.category_matcher = None
+        self.product_linker = None
         
     def setup_logging(self):
         """Configurar sistema de logging"""
@@ -38,141 +42,193 @@ class ProductIntegrator:
     
     def normalize_text(self, text: str) -> str:
         """Normalizar texto para comparaciones"""
-        if pd.isna(text):
-            return ""
-        text = str(text).lower()
-        text = unidecode.unidecode(text)
-        text = re.sub(r'[^a-z0-9\s]', ' ', text)
-        return ' '.join(text.split())
+        return normalize_text(text)
     
     def load_json_data(self, json_path: str) -> bool:
-        """Cargar datos del JSON raw del proveedor"""
+        """Registrar el JSON raw del proveedor (se lee por streaming al recorrerlo)"""
         try:
-            with open(json_path, 'r', encoding='utf-8') as f:
-                self.raw_json_data = json.load(f)
+            # Validar que el archivo abre un array JSON sin cargarlo completo
+            next(iter_json_array(json_path), None)
+            self.json_path = json_path
             logging.info(f"JSON data loaded successfully from {json_path}")
             return True
         except Exception as e:
             logging.error(f"Error loading JSON data: {str(e)}")
             return False
     
+    def iter_json_products(self) -> Iterator[Dict]:
+        """Recorre los productos del JSON del proveedor de a uno"""
+        if self.json_path is None:
+            return iter(())
+        return iter_json_array(self.json_path)
+    
     def load_csv_data(self, products_csv: str, categories_csv: str) -> bool:
         """Cargar datos de los archivos CSV"""
         try:
             self.products_df = pd.read_csv(products_csv)
             self.categories_df = pd.read_csv(categories_csv)
+            self.categories_csv = categories_csv
+            self.category_matcher = None
+            self.product_linker = None
             logging.info("CSV data loaded successfully")
             return True
         except Exception as e:
             logging.error(f"Error loading CSV data: {str(e)}")
             return False
     
+    def get_category_matcher(self) -> Optional[CategoryMatcher]:
+        """
+        Devuelve el motor de categorías. Si la taxonomía viene de un archivo, el modelo
+        ajustado se guarda en output_dir y se reutiliza mientras el archivo no cambie.
+        """
+        if self.categories_df is None or self.categories_df.empty:
+            return None
+        if self.category_matcher is None:
+            if self.categories_csv is None:
+                self.category_matcher = CategoryMatcher().fit(self.categories_df)
+                return self.category_matcher
+            model_path = self.output_dir / CATEGORY_MODEL_FILE
+            model_key = PipelineState.combined_hash(PipelineState.file_hash(self.categories_csv), MODEL_VERSION)
+            self.category_matcher = CategoryMatcher.load(model_path, model_key)
+            if self.category_matcher is None:
+                self.category_matcher = CategoryMatcher().fit(self.categories_df)
+                self.category_matcher.save(model_path, model_key)
+                logging.info(f"Category model fitted and saved to {model_path}")
+        return self.category_matcher
+    
+    def get_product_linker(self) -> Optional[ProductLinker]:
+        """Devuelve el vinculador de productos, con el índice de bloqueo del CSV armado una sola vez"""
+        if self.products_df is None or self.products_df.empty:
+            return None
+        if self.product_linker is None:
+            self.product_linker = ProductLinker().fit(self.products_df['Name'])
+        return self.product_linker
+    
+    @staticmethod
+    def product_name(json_product: Dict) -> str:
+        """Nombre de un producto del feed (el JSON del proveedor lo trae como 'title')"""
+        return json_product.get('name') or json_product.get('title', '')
+    
+    def match_categories(self, json_products: List[Dict], top_k: int = 1) -> List[List[Dict]]:
+        """Mejores top_k categorías para cada producto JSON, calculadas en un solo lote"""
+        matcher = self.get_category_matcher()
+        if matcher is None:
+            return [[] for _ in json_products]
+        product_texts = [
+            matcher.product_text(
+                self.product_name(json_product),
+                json_product.get('description', ''),
+                json_product.get('tags', '')
+            )
+            for json_product in json_products
+        ]
+        return matcher.match(product_texts, top_k)
+    
     def find_best_category_match(self, product_name: str, description: str, tags: str) -> Dict:
         """Encontrar la mejor categoría para un producto usando TF-IDF y similitud del coseno"""
-        if self.categories_df is None:
-            return {}
-            
-        # Preparar texto del producto
-        product_text = ' '.join(filter(None, [
-            self.normalize_text(product_name),
-            self.normalize_text(description),
-            self.normalize_text(tags)
-        ]))
-        
-        # Preparar textos de categorías
-        category_texts = []
-        category_info = []
-        
-        for _, row in self.categories_df.iterrows():
-            cat_text = ' '.join(filter(None, [
-                self.normalize_text(row['Categoría Principal']),
-                self.normalize_text(row['Subcategoría']),
-                self.normalize_text(row['Sub-subcategoría'])
-            ]))
-            category_texts.append(cat_text)
-            category_info.append({
-                'categoria_principal': row['Categoría Principal'],
-                'subcategoria': row['Subcategoría'],
-                'sub_subcategoria': row['Sub-subcategoría']
-            })
-        
-        # Calcular similitudes
-        if not category_texts:
-            return {}
-            
-        tfidf_matrix = self.vectorizer.fit_transform([product_text] + category_texts)
-        similarities = cosine_similarity(tfidf_matrix[0:1], tfidf_matrix[1:])
-        best_match_idx = similarities[0].argmax()
-        
-        return {
-            **category_info[best_match_idx],
-            'confidence_score': similarities[0][best_match_idx]
-        }
+        matches = self.match_categories([{'name': product_name, 'description': description, 'tags': tags}])
+        return matches[0][0] if matches[0] else {}
     
-    def compare_products(self) -> pd.DataFrame:
-        """Comparar productos entre JSON y CSV, incluyendo mapeo de categorías"""
-        if self.raw_json_data is None or self.products_df is None:
+    def compare_products(self, json_products: Optional[Iterable[Dict]] = None, block_size: int = 5000) -> pd.DataFrame:
+        """
+        Comparar productos entre JSON y CSV, incluyendo mapeo de categorías
+        Args:
+            json_products: Subconjunto de productos JSON a comparar (por defecto todos los del archivo cargado)
+            block_size: Productos por lote de asignación de categorías
+        """
+        if json_products is None and self.json_path is not None:
+            json_products = self.iter_json_products()
+        if json_products is None or self.products_df is None:
             logging.error("No data loaded for comparison")
             return pd.DataFrame()
             
         comparison_results = []
+        linker = self.get_product_linker()
+        csv_skus = set(self.products_df['SKU'].dropna().astype(str)) if 'SKU' in self.products_df else set()
         
-        # Crear diccionario de productos CSV para búsqueda rápida
-        csv_products = {
-            self.normalize_text(row['Name']): row 
-            for _, row in self.products_df.iterrows()
-        }
-        
-        # Comparar cada producto del JSON
-        for json_product in self.raw_json_data:
-            normalized_name = self.normalize_text(json_product.get('name', ''))
-            csv_product = csv_products.get(normalized_name)
+        # Procesar los productos por bloques: solo un bloque del JSON está en memoria
+        json_products = iter(json_products)
+        while True:
+            block = list(islice(json_products, block_size))
+            if not block:
+                break
             
-            # Encontrar mejor categoría
-            category_match = self.find_best_category_match(
-                json_product.get('name', ''),
-                json_product.get('description', ''),
-                json_product.get('tags', '')
-            )
+            # Mejor categoría de todo el bloque en un solo lote
+            category_matches = self.match_categories(block)
             
-            comparison_results.append({
-                'product_name': json_product.get('name', ''),
-                'in_json': True,
-                'in_csv': csv_product is not None,
-                'json_category': json_product.get('category', ''),
-                'csv_category': csv_product['Categories'] if csv_product is not None else '',
-                'mapped_category': category_match.get('categoria_principal', ''),
-                'mapped_subcategory': category_match.get('subcategoria', ''),
-                'mapped_sub_subcategory': category_match.get('sub_subcategoria', ''),
-                'category_confidence': category_match.get('confidence_score', 0),
-                'match_score': self.calculate_match_score(json_product, csv_product) if csv_product is not None else 0
-            })
+            # Producto del CSV más parecido por nombre (índice de bloqueo + TF-IDF de trigramas)
+            names = [self.product_name(json_product) for json_product in block]
+            if linker is not None:
+                csv_indices, name_scores = linker.match(names)
+            else:
+                csv_indices, name_scores = np.full(len(block), -1), np.zeros(len(block))
+            match_scores = self.calculate_match_scores(block, csv_indices, name_scores)
+            
+            # Comparar cada producto del JSON
+            for json_product, name, matches, csv_index, name_score, match_score in zip(
+                    block, names, category_matches, csv_indices, name_scores, match_scores):
+                csv_product = self.products_df.iloc[csv_index] if csv_index >= 0 else None
+                category_match = matches[0] if matches else {}
+                code = str(json_product.get('code', ''))
+                
+                comparison_results.append({
+                    'product_name': name,
+                    'in_json': True,
+                    'in_csv': csv_product is not None,
+                    'json_category': json_product.get('category', ''),
+                    'csv_category': csv_product['Categories'] if csv_product is not None else '',
+                    'mapped_category': category_match.get('categoria_principal', ''),
+                    'mapped_subcategory': category_match.get('subcategoria', ''),
+                    'mapped_sub_subcategory': category_match.get('sub_subcategoria', ''),
+                    'category_confidence': category_match.get('confidence_score', 0),
+                    'match_score': match_score,
+                    'product_code': code,
+                    'matched_sku': str(csv_product['SKU']) if csv_product is not None and 'SKU' in csv_product else '',
+                    'name_similarity': float(name_score),
+                    'sku_in_csv': code in csv_skus
+                })
             
         return pd.DataFrame(comparison_results)
     
-    def calculate_match_score(self, json_product: Dict, csv_product: Dict) -> float:
-        """Calcular puntuación de coincidencia entre productos"""
-        score = 0.0
-        total_fields = 0
-        
-        # Comparar nombre
-        if self.normalize_text(json_product.get('name', '')) == self.normalize_text(csv_product['Name']):
-            score += 1
-        total_fields += 1
-        
-        # Comparar descripción
-        json_desc = self.normalize_text(json_product.get('description', ''))
-        csv_desc = self.normalize_text(csv_product.get('Description', ''))
-        if json_desc and csv_desc:
-            similarity = len(set(json_desc.split()) & set(csv_desc.split())) / len(set(json_desc.split()) | set(csv_desc.split()))
-            score += similarity
-            total_fields += 1
-            
-        return score / total_fields if total_fields > 0 else 0
+    def calculate_match_scores(self, json_products: List[Dict], csv_indices: np.ndarray,
+                               name_scores: np.ndarray) -> np.ndarray:
+        """
+        Puntuación de coincidencia de cada producto con su producto del CSV (0 sin pareja):
+        promedio de la similitud de nombres y, si ambos la tienen, de la similitud de
+        Jaccard de las descripciones, calculada para todos los pares a la vez.
+        """
+        scores = np.zeros(len(json_products))
+        matched = np.flatnonzero(csv_indices >= 0)
+        if not len(matched):
+            return scores
+        json_descriptions = normalize_many(json_products[i].get('description', '') for i in matched)
+        csv_column = self.products_df['Description'] if 'Description' in self.products_df else pd.Series('', index=self.products_df.index)
+        csv_descriptions = normalize_many(csv_column.iloc[csv_indices[matched]])
+        both = np.array([bool(a and b) for a, b in zip(json_descriptions, csv_descriptions)], dtype=bool)
+        descriptions = jaccard_similarity(json_descriptions, csv_descriptions)
+        scores[matched] = np.where(both, (name_scores[matched] + descriptions) / 2, name_scores[matched])
+        return scores
+    
+    @staticmethod
+    def linkage_quality(comparison_df: pd.DataFrame) -> Dict:
+        """
+        Precisión y exhaustividad de la vinculación por nombre, tomando como verdad
+        que el código del proveedor coincide con el SKU del CSV
+        """
+        if 'matched_sku' not in comparison_df or 'sku_in_csv' not in comparison_df:
+            return {}
+        predicted = comparison_df['in_csv'].astype(bool)
+        correct = predicted & (comparison_df['matched_sku'].astype(str) == comparison_df['product_code'].astype(str))
+        expected = comparison_df['sku_in_csv'].astype(bool)
+        return {
+            'match_precision': round(correct.sum() / predicted.sum(), 4) if predicted.any() else None,
+            'match_recall': round(correct.sum() / expected.sum(), 4) if expected.any() else None
+        }
     
-    def export_comparison_report(self, output_path: str) -> bool:
-        """Exportar reporte de comparación"""
-        comparison_df = self.compare_products()
+    def export_comparison_report(self, output_path: str, comparison_df: Optional[pd.DataFrame] = None) -> bool:
+        """Exportar reporte de comparación (calculándolo si no se recibe ya hecho)"""
+        if comparison_df is None:
+            comparison_df = self.compare_products()
         if comparison_df.empty:
             logging.error("No comparison data to export")
             return False
@@ -187,6 +243,7 @@ class ProductIntegrator:
                 'high_match_score': len(comparison_df[comparison_df['match_score'] > 0.8]),
                 'high_category_confidence': len(comparison_df[comparison_df['category_confidence'] > 0.8])
             }
+            stats.update(self.linkage_quality(comparison_df))
             
             # Guardar reporte
             report_path = Path(output_path)
@@ -1,16 +1,27 @@
 """
 Script para eliminar todos los productos de WooCommerce
+Uso:
+    python purge_products.py [--dry-run] [--chunk-size 1000]
 """
 
+import argparse
 from woo_importer import WooCommerceImporter
 
 def main():
-    importer = WooCommerceImporter()
+    parser = argparse.ArgumentParser(description='Elimina todos los productos y variaciones de WooCommerce')
+    parser.add_argument('--dry-run', action='store_true', help='Solo informar qué se eliminaría')
+    parser.add_argument('--chunk-size', type=int, default=None, help='IDs por sentencia DELETE')
+    args = parser.parse_args()
+
+    importer = WooCommerceImporter(preload_skus=False)
     try:
         print("Iniciando eliminación de productos...")
         # Eliminar todos los productos
-        count = importer.delete_all_products()
-        print(f"\nOperación completada. {count} productos eliminados.")
+        count = importer.delete_all_products(chunk_size=args.chunk_size, dry_run=args.dry_run)
+        if args.dry_run:
+            print(f"\nSimulación completada. {count} productos se eliminarían.")
+        else:
+            print(f"\nOperación completada. {count} productos eliminados.")
     finally:
         importer.close()
 
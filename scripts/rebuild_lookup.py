@@ -0,0 +1,27 @@
+"""
+Script para regenerar la tabla wc_product_meta_lookup de WooCommerce desde postmeta
+Uso:
+    python rebuild_lookup.py [--chunk-size 5000]
+"""
+
+import argparse
+import time
+from woo_importer import WooCommerceImporter
+
+def main():
+    parser = argparse.ArgumentParser(description='Regenera wc_product_meta_lookup (filtros de precio y stock de la tienda)')
+    parser.add_argument('--chunk-size', type=int, default=None, help='IDs por sentencia INSERT ... SELECT')
+    args = parser.parse_args()
+
+    importer = WooCommerceImporter(preload_skus=False)
+    try:
+        print("Regenerando wc_product_meta_lookup...")
+        started = time.perf_counter()
+        totals = importer.rebuild_lookup_table(chunk_size=args.chunk_size)
+        print(f"\nOperación completada en {time.perf_counter() - started:.1f} s. "
+              f"{totals['products']} productos regenerados, {totals['removed']} filas huérfanas eliminadas.")
+    finally:
+        importer.close()
+
+if __name__ == '__main__':
+    main()
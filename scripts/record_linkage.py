@@ -0,0 +1,100 @@
+"""
+Vinculación difusa de productos entre el feed del proveedor y el CSV
+Construye una sola vez un índice de bloqueo (índice invertido de trigramas de caracteres)
+sobre los nombres del CSV: cada producto del feed solo se compara con los productos que
+comparten trigramas poco frecuentes con él, en lugar de con todo el catálogo. Los
+candidatos se puntúan con la similitud del coseno TF-IDF de trigramas, calculada de forma
+vectorizada para todos los pares de un bloque a la vez.
+"""
+
+import numpy as np
+from typing import Callable, List, Tuple
+from text_normalize import normalize_many, normalize_text
+
+# Similitud mínima de nombres para considerar que dos productos son el mismo
+DEFAULT_THRESHOLD = 0.6
+# Trigramas presentes en más de esta fracción del catálogo no sirven como clave de bloqueo
+DEFAULT_MAX_DF = 0.005
+# Con catálogos chicos se admiten claves de bloqueo de hasta esta cantidad de productos
+MIN_POSTINGS = 100
+
+class ProductLinker:
+    def __init__(self, normalize: Callable[[str], str] = normalize_text, threshold: float = DEFAULT_THRESHOLD,
+                 max_df: float = DEFAULT_MAX_DF, candidates: int = 10, block_size: int = 5000):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        self.normalize = normalize
+        self.threshold = threshold
+        self.max_df = max_df
+        self.candidates = candidates
+        self.block_size = block_size
+        self.vectorizer = TfidfVectorizer(analyzer='char_wb', ngram_range=(3, 3), dtype=np.float32)
+        self.matrix = None
+        self.blocking_keys = None
+        self.index = None
+
+    def fit(self, names: List[str]) -> 'ProductLinker':
+        """Vectoriza los nombres del catálogo de referencia y arma el índice de bloqueo"""
+        texts = normalize_many(names, self.normalize)
+        self.matrix = self.vectorizer.fit_transform(texts).tocsr()
+        document_frequency = np.bincount(self.matrix.indices, minlength=self.matrix.shape[1])
+        max_postings = max(int(self.max_df * self.matrix.shape[0]), MIN_POSTINGS)
+        # Los trigramas muy comunes ('de ', 'ble') juntarían casi todos los pares
+        self.blocking_keys = np.flatnonzero(document_frequency <= max_postings)
+        # Índice invertido: una fila por clave de bloqueo con los productos que la contienen
+        self.index = (self.matrix[:, self.blocking_keys] > 0).astype(np.float32).T.tocsr()
+        return self
+
+    def match(self, names: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Devuelve (índices, similitudes) del mejor producto del catálogo para cada nombre:
+        índice -1 si ningún candidato alcanza el umbral. Procesa los nombres por bloques.
+        """
+        if self.matrix is None:
+            raise ValueError("ProductLinker no está ajustado: llamar a fit() primero")
+        indices = np.full(len(names), -1, dtype=np.int64)
+        scores = np.zeros(len(names), dtype=np.float64)
+        for start in range(0, len(names), self.block_size):
+            block = self.vectorizer.transform(normalize_many(names[start:start + self.block_size], self.normalize))
+            rows, columns = self._candidate_pairs(block)
+            if not len(rows):
+                continue
+            # Coseno TF-IDF de todos los pares candidatos a la vez (filas ya normalizadas L2)
+            similarities = np.asarray(block[rows].multiply(self.matrix[columns]).sum(axis=1)).ravel()
+            # Mejor candidato por nombre: a igual similitud gana el de menor índice
+            order = np.lexsort((columns, -similarities, rows))
+            first = order[np.r_[True, rows[order][1:] != rows[order][:-1]]]
+            accepted = first[similarities[first] >= self.threshold]
+            indices[start + rows[accepted]] = columns[accepted]
+            scores[start + rows[accepted]] = similarities[accepted]
+        return indices, scores
+
+    def _candidate_pairs(self, block) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Pares (nombre, producto) que comparten claves de bloqueo, limitados a los
+        candidates productos con más claves en común por nombre.
+        """
+        shared = ((block[:, self.blocking_keys] > 0).astype(np.float32) @ self.index).tocsr()
+        rows = np.repeat(np.arange(shared.shape[0]), np.diff(shared.indptr))
+        order = np.lexsort((-shared.data, rows))
+        ranks = np.arange(len(order)) - shared.indptr[rows[order]]
+        keep = order[ranks < self.candidates]
+        return rows[keep], shared.indices[keep]
+
+def jaccard_similarity(texts_a: List[str], texts_b: List[str]) -> np.ndarray:
+    """Similitud de Jaccard entre los conjuntos de palabras de cada par (texts_a[i], texts_b[i])"""
+    from sklearn.feature_extraction.text import CountVectorizer
+
+    if not texts_a:
+        return np.zeros(0)
+    vectorizer = CountVectorizer(binary=True, token_pattern=r'\S+', lowercase=False)
+    try:
+        vectorizer.fit(list(texts_a) + list(texts_b))
+    except ValueError:
+        # Ningún texto tiene palabras
+        return np.zeros(len(texts_a))
+    words_a = vectorizer.transform(texts_a)
+    words_b = vectorizer.transform(texts_b)
+    intersection = np.asarray(words_a.multiply(words_b).sum(axis=1)).ravel()
+    union = np.asarray(words_a.sum(axis=1)).ravel() + np.asarray(words_b.sum(axis=1)).ravel() - intersection
+    return np.divide(intersection, union, out=np.zeros(len(texts_a)), where=union > 0)
@@ -0,0 +1,69 @@
+"""
+Generación de slugs compartida por categorías y productos
+El slug de cada componente se calcula una sola vez (caché LRU sobre el nombre limpio) y
+SlugService garantiza slugs únicos con los sufijos -2, -3... que aplica WordPress.
+"""
+
+import re
+from functools import lru_cache
+from typing import Dict, Iterable
+import unidecode
+
+NON_ALNUM = re.compile(r'[^a-z0-9]+')
+# Largo de la columna post_name / slug en WordPress
+MAX_SLUG_LENGTH = 200
+
+def clean_name(name: str) -> str:
+    """Elimina asteriscos y espacios repetidos de un nombre"""
+    return ' '.join(name.replace('*', '').split())
+
+@lru_cache(maxsize=131072)
+def _component_slug(clean: str) -> str:
+    text = unidecode.unidecode(clean.lower())
+    return NON_ALNUM.sub('-', text).strip('-')
+
+def slugify(name: str) -> str:
+    """Slug SEO-friendly de un nombre: minúsculas, sin acentos, palabras separadas por guiones"""
+    return _component_slug(clean_name(str(name)))
+
+def path_slug(parts: Iterable[str]) -> str:
+    """Slug de una ruta de categorías (una parte por nivel)"""
+    return '-'.join(slugify(part) for part in parts)
+
+class SlugService:
+    def __init__(self, existing: Iterable[str] = (), max_length: int = MAX_SLUG_LENGTH,
+                 empty_slug: str = 'sin-nombre'):
+        self.used = set(existing)
+        self.max_length = max_length
+        self.empty_slug = empty_slug
+        # Próximo sufijo a probar por slug base, para no recorrer -2, -3... en cada colisión
+        self._next_suffix: Dict[str, int] = {}
+
+    def reserve(self, slug: str):
+        """Marca un slug existente como ocupado"""
+        self.used.add(slug)
+
+    def unique(self, slug: str) -> str:
+        """Devuelve slug, o slug-2, slug-3... si ya está ocupado, y lo reserva"""
+        base = (slug or self.empty_slug)[:self.max_length].strip('-') or self.empty_slug
+        if base not in self.used:
+            self.used.add(base)
+            return base
+        suffix = self._next_suffix.get(base, 2)
+        while True:
+            # Como WordPress, se recorta la base para que el sufijo quepa en el largo máximo
+            candidate = f"{base[:self.max_length - len(str(suffix)) - 1].rstrip('-')}-{suffix}"
+            suffix += 1
+            if candidate not in self.used:
+                break
+        self._next_suffix[base] = suffix
+        self.used.add(candidate)
+        return candidate
+
+    def unique_slug(self, name: str) -> str:
+        """Slug único para un nombre"""
+        return self.unique(slugify(name))
+
+    def unique_path_slug(self, parts: Iterable[str]) -> str:
+        """Slug único para una ruta de categorías"""
+        return self.unique(path_slug(parts))
@@ -0,0 +1,44 @@
+"""
+Script para actualizar solo precio y stock de los productos desde el feed del proveedor
+Acepta el JSON de StarCenter (code, price, stock) o un CSV de WooCommerce (SKU, Regular price, Stock).
+Uso:
+    python sync_stock.py [archivo] [--batch-size 500]
+"""
+
+import argparse
+import time
+from pathlib import Path
+from json_stream import iter_json_array
+from woo_importer import WooCommerceImporter, iter_csv_products
+
+DEFAULT_FEED_PATH = Path(__file__).resolve().parent.parent / 'data' / 'Starcenter.json'
+
+def iter_stock_prices(path):
+    """Tuplas (sku, precio, stock) del archivo, leído de forma incremental"""
+    if str(path).lower().endswith('.csv'):
+        for row in iter_csv_products(path):
+            yield row.get('SKU', ''), row.get('Regular price', ''), row.get('Stock', '')
+    else:
+        for product in iter_json_array(path):
+            yield product.get('code', ''), product.get('price'), product.get('stock')
+
+def main():
+    parser = argparse.ArgumentParser(description='Actualiza precio y stock de los productos existentes')
+    parser.add_argument('file', nargs='?', default=str(DEFAULT_FEED_PATH), help='JSON del proveedor o CSV de productos')
+    parser.add_argument('--batch-size', type=int, default=None, help='Filas por INSERT en la tabla temporal')
+    args = parser.parse_args()
+
+    importer = WooCommerceImporter(preload_skus=False)
+    try:
+        started = time.perf_counter()
+        summary = importer.sync_stock_prices(iter_stock_prices(args.file), batch_size=args.batch_size)
+        print(f"Recibidos: {summary['received']}, encontrados: {summary['matched']}, "
+              f"SKU desconocidos: {summary['unknown']}")
+        print(f"Metadatos actualizados: {summary['meta_updated']}, "
+              f"filas de búsqueda actualizadas: {summary['lookup_updated']}")
+        print(f"Sincronización completada en {time.perf_counter() - started:.2f} s")
+    finally:
+        importer.close()
+
+if __name__ == '__main__':
+    main()
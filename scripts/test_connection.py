@@ -7,7 +7,7 @@ if db.test_connection():
     
     # Test query to get WooCommerce product count
     query = "SELECT COUNT(*) as count FROM wp_posts WHERE post_type = 'product'"
-    result = db.execute_query(query)
+    result = db.fetch(query)
     if result:
         print(f"Number of products in WooCommerce: {result[0]['count']}")
 
@@ -2,7 +2,14 @@
 Test script for WooCommerce product import
 """
 
-from woo_importer import WooCommerceImporter
+import json
+import os
+import tempfile
+from config import IMPORT_CONFIG
+from generate_woo_products import generate_woo_products
+from parallel_importer import partition_products
+from slugs import SlugService
+from woo_importer import WooCommerceImporter, fill_missing_slugs, iter_csv_products
 
 def test_single_product():
     importer = WooCommerceImporter()
@@ -27,5 +34,46 @@ def test_single_product():
     finally:
         importer.close()
 
+def test_parallel_slugs():
+    # Nombres repetidos sin slug que caen en particiones distintas (no requiere base de datos)
+    products = [{'sku': f'TEST-{index:03d}', 'name': 'Cable USB'} for index in range(20)]
+    products.append({'sku': 'TEST-100', 'name': 'Cable USB', 'slug': 'cable-usb-2'})
+    shards = partition_products(fill_missing_slugs(products, SlugService(['cable-usb'])), 4)
+    assert sum(1 for shard in shards if shard) > 1, "Los productos no se repartieron"
+
+    slugs = [data['slug'] for shard in shards for data in shard]
+    assert len(slugs) == len(set(slugs)), f"Slugs repetidos entre workers: {slugs}"
+    assert 'cable-usb' not in slugs
+    print(f"Slugs únicos en {len(shards)} particiones: {len(slugs)}")
+
+def test_pipeline_categories():
+    # El CSV que genera generate_woo_products.py (Categories = 'StarCenter_<id>') debe asignar categorías
+    importer = WooCommerceImporter()
+    try:
+        category_slugs = importer.load_category_map()['slug']
+        if not category_slugs:
+            print("No hay categorías product_cat para la prueba")
+            return
+        slug, tt_id = next(iter(category_slugs.items()))
+        IMPORT_CONFIG['supplier_categories']['TEST'] = slug
+
+        with tempfile.TemporaryDirectory() as directory:
+            json_path = os.path.join(directory, 'productos.json')
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump([{'code': 'TEST-CAT-001', 'title': 'Producto de Prueba', 'description': '',
+                            'image': [], 'category_id': 'TEST', 'stock': 5, 'price': 10.5}], f)
+            products = list(iter_csv_products(generate_woo_products(json_path, directory)))
+        assert products[0]['sku'] == 'TEST-CAT-001' and products[0]['categories'] == 'StarCenter_TEST'
+
+        summary = importer.import_products(products)
+        product_id = importer.find_product_id('TEST-CAT-001')
+        assigned = importer.get_categories_for_products([product_id]).get(product_id, [])
+        assert tt_id in {row['term_taxonomy_id'] for row in assigned}, f"Categoría no asignada: {summary}"
+        print(f"Categoría '{slug}' asignada al producto {product_id}")
+    finally:
+        importer.close()
+
 if __name__ == '__main__':
+    test_parallel_slugs()
+    test_pipeline_categories()
     test_single_product()
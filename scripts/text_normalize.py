@@ -0,0 +1,52 @@
+"""
+Normalización de texto para comparaciones
+normalize_text pasa un texto a minúsculas sin acentos ni signos, con una caché LRU para
+los textos repetidos (categorías, nombres de productos). normalize_series hace lo mismo
+sobre una columna completa de pandas con operaciones vectorizadas; unidecode translitera
+cada carácter por separado, así que una tabla de traducción por carácter da exactamente
+el mismo resultado.
+"""
+
+import re
+from functools import lru_cache
+from typing import Callable, Iterable, List
+import numpy as np
+import pandas as pd
+import unidecode
+
+NON_ALNUM = re.compile(r'[^a-z0-9\s]')
+# Transliteración de los caracteres no ASCII (Latin-1 y Latin extendido A/B precalculados;
+# los demás se agregan la primera vez que aparecen)
+TRANSLATION_TABLE = {code: unidecode.unidecode(chr(code)) for code in range(0x80, 0x250)}
+
+@lru_cache(maxsize=131072)
+def _normalize(text: str) -> str:
+    text = unidecode.unidecode(text.lower())
+    return ' '.join(NON_ALNUM.sub(' ', text).split())
+
+def normalize_text(text) -> str:
+    """Normalizar texto para comparaciones"""
+    if pd.isna(text):
+        return ""
+    return _normalize(str(text))
+
+def normalize_series(values: pd.Series) -> pd.Series:
+    """normalize_text aplicado a una columna completa ('' para los valores faltantes)"""
+    # Cada valor distinto se normaliza una sola vez (categorías y descripciones se repiten mucho)
+    codes, uniques = pd.factorize(values.map(str, na_action='ignore'))
+    text = pd.Series(uniques, dtype=object).str.lower()
+    non_ascii = ~text.map(str.isascii).astype(bool)
+    if non_ascii.any():
+        for char in set(''.join(text[non_ascii])):
+            if ord(char) not in TRANSLATION_TABLE:
+                TRANSLATION_TABLE[ord(char)] = unidecode.unidecode(char)
+        text[non_ascii] = text[non_ascii].str.translate(TRANSLATION_TABLE)
+    text = text.str.replace(NON_ALNUM, ' ', regex=True).str.split().str.join(' ')
+    normalized = np.append(text.to_numpy(dtype=object), '')
+    return pd.Series(normalized[codes], index=values.index, dtype=object)
+
+def normalize_many(texts: Iterable, normalize: Callable[[str], str] = normalize_text) -> List[str]:
+    """Normaliza una lista de textos: con normalize_text lo hace de forma vectorizada"""
+    if normalize is normalize_text:
+        return normalize_series(pd.Series(list(texts), dtype=object)).tolist()
+    return [normalize(text) for text in texts]
@@ -0,0 +1,222 @@
+"""
+Generación de miniaturas de las imágenes de productos
+Crea los tamaños de WooCommerce configurados en THUMBNAIL_CONFIG para cada imagen de la
+columna Images del CSV de productos (ya descargada por image_ingest), repartiendo las
+imágenes entre un pool de procesos. Las dimensiones siguen las reglas de WordPress (sin
+ampliar, recorte centrado) y los archivos se nombran nombre-ANCHOxALTO.ext junto al original.
+Las imágenes cuyo hash de origen y configuración de tamaños no cambiaron se omiten, y
+_wp_attachment_metadata se escribe en bloque para que WordPress no las regenere.
+Uso:
+    python thumbnails.py [--csv output/woo_products.csv] [--workers 4] [--no-db]
+"""
+
+import argparse
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import pandas as pd
+from PIL import Image, ImageOps
+from config import IMAGE_CONFIG, THUMBNAIL_CONFIG
+from pipeline_state import PipelineState
+
+THUMBNAILS_NAMESPACE = 'thumbnails'
+IMAGES_NAMESPACE = 'images'
+EXIF_ORIENTATION = 0x0112
+# Formatos de Pillow -> tipo MIME de WordPress
+MIME_TYPES = {'JPEG': 'image/jpeg', 'PNG': 'image/png', 'GIF': 'image/gif', 'WEBP': 'image/webp'}
+# image_meta vacío, como el que guarda WordPress para imágenes sin EXIF
+EMPTY_IMAGE_META = {
+    'aperture': '0', 'credit': '', 'camera': '', 'caption': '', 'created_timestamp': '0',
+    'copyright': '', 'focal_length': '0', 'iso': '0', 'shutter_speed': '0', 'title': '',
+    'orientation': '0', 'keywords': []
+}
+
+def php_serialize(value) -> str:
+    """Serializa un valor al formato de serialize() de PHP (las longitudes van en bytes UTF-8)"""
+    if value is None:
+        return 'N;'
+    if isinstance(value, bool):
+        return f'b:{int(value)};'
+    if isinstance(value, int):
+        return f'i:{value};'
+    if isinstance(value, float):
+        return f'd:{value!r};'
+    if isinstance(value, str):
+        return f's:{len(value.encode("utf-8"))}:"{value}";'
+    if isinstance(value, (list, tuple)):
+        value = dict(enumerate(value))
+    if isinstance(value, dict):
+        items = ''.join(php_serialize(key) + php_serialize(item) for key, item in value.items())
+        return f'a:{len(value)}:{{{items}}}'
+    raise TypeError(f"No se puede serializar {type(value).__name__}")
+
+def resize_dimensions(width, height, max_width, max_height, crop):
+    """
+    Dimensiones de un tamaño intermedio como image_resize_dimensions() de WordPress.
+    Devuelve ((x, y, ancho, alto) de la región de origen, (ancho, alto) de destino),
+    o None si el tamaño no es más chico que el original.
+    """
+    if crop:
+        new_width, new_height = min(max_width, width), min(max_height, height)
+        ratio = max(new_width / width, new_height / height)
+        crop_width, crop_height = round(new_width / ratio), round(new_height / ratio)
+        box = ((width - crop_width) // 2, (height - crop_height) // 2, crop_width, crop_height)
+    else:
+        # wp_constrain_dimensions: encajar en la caja sin ampliar (0 = sin límite)
+        ratios = [limit / size for limit, size in ((max_width, width), (max_height, height)) if 0 < limit < size]
+        ratio = min(ratios) if ratios else 1
+        new_width = max(1, round(width * ratio))
+        new_height = max(1, round(height * ratio))
+        box = (0, 0, width, height)
+    if new_width >= width and new_height >= height:
+        return None
+    return box, (new_width, new_height)
+
+def generate_image_sizes(task):
+    """
+    Genera los tamaños intermedios de una imagen (se ejecuta en un proceso del pool).
+    task es (directorio de uploads, archivo relativo, tamaños, calidad JPEG).
+    Devuelve (archivo, metadatos de WordPress o None, error).
+    """
+    uploads_dir, file, sizes, quality = task
+    source = Path(uploads_dir) / file
+    try:
+        with Image.open(source) as image:
+            image_format = image.format
+            # Las dimensiones se calculan sobre la imagen ya orientada según EXIF, como en WordPress
+            rotated = image.getexif().get(EXIF_ORIENTATION, 1) in (5, 6, 7, 8)
+            width, height = image.size[::-1] if rotated else image.size
+            plans = {}
+            for name, (max_width, max_height, crop) in sizes.items():
+                plan = resize_dimensions(width, height, max_width, max_height, crop)
+                if plan:
+                    plans[name] = plan
+            if plans and image_format == 'JPEG':
+                # Decodificar el JPEG ya reducido al mayor tamaño pedido ahorra la mayor parte del trabajo
+                largest = (max(plan[1][0] for plan in plans.values()), max(plan[1][1] for plan in plans.values()))
+                image.draft('RGB', largest[::-1] if rotated else largest)
+            image = ImageOps.exif_transpose(image)
+            scale_x, scale_y = image.size[0] / width, image.size[1] / height
+            if image.mode in ('1', 'P') or (image_format == 'JPEG' and image.mode not in ('RGB', 'L')):
+                # Las imágenes con paleta solo se redimensionan bien como RGB(A)
+                image = image.convert('RGB' if image_format == 'JPEG' else 'RGBA')
+
+            mime = MIME_TYPES.get(image_format, 'image/jpeg')
+            generated = {}
+            for name, ((x, y, crop_width, crop_height), (new_width, new_height)) in plans.items():
+                region = (x * scale_x, y * scale_y, (x + crop_width) * scale_x, (y + crop_height) * scale_y)
+                resized = image.resize((new_width, new_height), Image.LANCZOS, box=region)
+                size_file = f"{source.stem}-{new_width}x{new_height}{source.suffix}"
+                save_options = {'quality': quality} if image_format in ('JPEG', 'WEBP') else {}
+                resized.save(source.with_name(size_file), format=image_format, **save_options)
+                generated[name] = {
+                    'file': size_file, 'width': new_width, 'height': new_height, 'mime-type': mime,
+                    'filesize': source.with_name(size_file).stat().st_size
+                }
+        metadata = {
+            'width': width, 'height': height, 'file': file, 'filesize': source.stat().st_size,
+            'sizes': generated, 'image_meta': EMPTY_IMAGE_META
+        }
+        return file, metadata, None
+    except Exception as e:
+        return file, None, str(e)
+
+def image_files_from_csv(csv_path, manifest):
+    """Archivos locales de las URLs de la columna Images del CSV de productos, sin repetir"""
+    files = {}
+    for chunk in pd.read_csv(csv_path, usecols=['Images'], dtype=str, chunksize=10000):
+        for images in chunk['Images'].dropna():
+            for url in images.split('|'):
+                entry = manifest.get(url.strip())
+                if entry:
+                    files[entry['file']] = entry['sha256']
+    return files
+
+def sizes_are_current(uploads_dir, metadata):
+    """True si siguen existiendo los archivos de todos los tamaños generados"""
+    folder = (Path(uploads_dir) / metadata['file']).parent
+    return all((folder / size['file']).exists() for size in metadata['sizes'].values())
+
+def generate_thumbnails(files, uploads_dir=None, state=None, sizes=None, workers=None, force=False):
+    """
+    Genera los tamaños intermedios de las imágenes {archivo: sha256 de origen} en un pool
+    de procesos, omitiendo las que no cambiaron desde la última ejecución.
+    Devuelve ({archivo: metadatos}, resumen).
+    """
+    uploads_dir = str(uploads_dir or IMAGE_CONFIG['uploads_dir'])
+    sizes = sizes or THUMBNAIL_CONFIG['sizes']
+    workers = workers or THUMBNAIL_CONFIG['workers']
+    quality = THUMBNAIL_CONFIG['jpeg_quality']
+    config_hash = PipelineState.record_hash({'sizes': sizes, 'quality': quality})
+    previous = {} if state is None or force else state.get_records(THUMBNAILS_NAMESPACE)
+
+    metadata = {}
+    hashes = {}
+    pending = []
+    for file, source_hash in files.items():
+        hashes[file] = PipelineState.combined_hash(source_hash, config_hash)
+        cached = previous.get(file)
+        if cached and cached[0] == hashes[file] and sizes_are_current(uploads_dir, cached[1]):
+            metadata[file] = cached[1]
+        else:
+            pending.append(file)
+
+    summary = {'images': len(files), 'skipped': len(metadata), 'generated': 0, 'errors': 0}
+    if pending:
+        tasks = ((uploads_dir, file, sizes, quality) for file in pending)
+        # Bloques de varias imágenes por envío para amortizar la comunicación entre procesos
+        chunksize = max(1, len(pending) // ((workers or os.cpu_count() or 1) * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = []
+            for file, file_metadata, error in executor.map(generate_image_sizes, tasks, chunksize=chunksize):
+                if file_metadata is None:
+                    summary['errors'] += 1
+                    logging.warning(f"No se pudieron generar los tamaños de {file}: {error}")
+                    continue
+                metadata[file] = file_metadata
+                results.append((file, hashes[file], file_metadata))
+                summary['generated'] += 1
+        if state is not None:
+            state.save_records(THUMBNAILS_NAMESPACE, results)
+    return metadata, summary
+
+def main():
+    parser = argparse.ArgumentParser(description='Genera las miniaturas de WooCommerce de las imágenes de productos')
+    parser.add_argument('--csv', default='output/woo_products.csv', help='CSV generado por generate_woo_products')
+    parser.add_argument('--uploads-dir', default=None, help='Directorio raíz de uploads')
+    parser.add_argument('--state', default='output/pipeline_state.sqlite', help='Base de estado del pipeline')
+    parser.add_argument('--workers', type=int, default=None, help='Procesos (por defecto uno por núcleo)')
+    parser.add_argument('--force', action='store_true', help='Regenerar aunque nada haya cambiado')
+    parser.add_argument('--no-db', action='store_true', help='Solo generar archivos, sin escribir metadatos')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    state = PipelineState(args.state)
+    try:
+        manifest = {url: payload for url, (_, payload) in state.get_records(IMAGES_NAMESPACE).items()}
+        files = image_files_from_csv(args.csv, manifest)
+        started = time.perf_counter()
+        metadata, summary = generate_thumbnails(files, args.uploads_dir, state, workers=args.workers, force=args.force)
+        print(f"Imágenes: {summary['images']}, generadas: {summary['generated']}, "
+              f"sin cambios: {summary['skipped']}, errores: {summary['errors']} "
+              f"en {time.perf_counter() - started:.1f} s")
+
+        if not args.no_db:
+            from woo_importer import WooCommerceImporter
+            importer = WooCommerceImporter(preload_skus=False)
+            try:
+                attachment_ids = importer.get_attachments_by_file()
+                written = importer.set_attachment_metadata({
+                    attachment_ids[file]: php_serialize(file_metadata)
+                    for file, file_metadata in metadata.items() if file in attachment_ids
+                })
+            finally:
+                importer.close()
+            print(f"Metadatos de adjuntos escritos: {written}")
+    finally:
+        state.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""
+Traducción de títulos de productos
+Compila los términos de data/title_translations.json en una única expresión regular sin
+distinción de mayúsculas, que prefiere siempre la coincidencia más larga ('AURICULARES'
+antes que 'AURICULAR'), y traduce cada título en una sola pasada. Los términos a preservar
+(marcas, siglas) se escriben como en la lista aunque contengan un término traducible.
+"""
+
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable
+from keyword_tagger import LETTER_AFTER, LETTER_BEFORE, trie_pattern
+
+DEFAULT_TRANSLATIONS_PATH = Path(__file__).resolve().parent.parent / 'data' / 'title_translations.json'
+
+def english_plural(word: str) -> str:
+    """Plural inglés simple de la traducción de un término en plural ('Memory' → 'Memories')"""
+    if len(word) > 1 and word[-1] == 'y' and word[-2] not in 'aeiou':
+        return word[:-1] + 'ies'
+    return word + 's'
+
+class TitleTranslator:
+    def __init__(self, translations: Dict[str, str], preserve_terms: Iterable[str] = (), cache_size: int = 65536):
+        self.translations = {term.upper(): translation for term, translation in translations.items()}
+        # Un término preservado se escribe tal como figura en la lista y gana a los términos contenidos en él
+        preserve_terms = list(preserve_terms)
+        self.preserved = {term.upper() for term in preserve_terms}
+        for term in preserve_terms:
+            self.translations[term.upper()] = term
+        first_chars = ''.join(re.escape(char) for char in sorted({term[0] for term in self.translations}))
+        self.pattern = re.compile(
+            rf'(?=[{first_chars}]){LETTER_BEFORE}(?P<term>{trie_pattern(self.translations)})(?P<plural>ES|S)?{LETTER_AFTER}',
+            re.IGNORECASE
+        ) if self.translations else None
+        # Caché por instancia: los títulos repetidos (variantes de un mismo producto) no se recalculan
+        self.translate = lru_cache(maxsize=cache_size)(self._translate)
+
+    @classmethod
+    def from_file(cls, path=DEFAULT_TRANSLATIONS_PATH) -> 'TitleTranslator':
+        """Carga los términos a traducir y a preservar desde un archivo JSON"""
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return cls(data.get('translations', {}), data.get('preserve', []))
+
+    def _replace(self, match) -> str:
+        term = match.group('term').upper()
+        translation = self.translations[term]
+        if term in self.preserved:
+            return translation + (match.group('plural') or '')
+        return english_plural(translation) if match.group('plural') else translation
+
+    def _translate(self, title: str) -> str:
+        if self.pattern is None or not title:
+            return title
+        return self.pattern.sub(self._replace, title)
+
+@lru_cache(maxsize=None)
+def get_default_translator() -> TitleTranslator:
+    """Traductor con los términos por defecto, compilado una sola vez por proceso"""
+    return TitleTranslator.from_file()
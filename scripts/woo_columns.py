@@ -0,0 +1,75 @@
+"""
+Columnas de los CSV de importación de WooCommerce
+Define el orden de columnas de cada CSV y las proyecciones por columna que comparten
+los generadores: cada transformación se aplica a la columna completa (máscaras de pandas)
+en lugar de recorrer las filas con apply.
+"""
+
+import pandas as pd
+from typing import Dict, Optional
+
+# Columnas del CSV de productos WooCommerce, en orden
+WOO_PRODUCT_COLUMNS = [
+    'Type', 'Title', 'Description', 'Short description', 'SKU', 'Published', 'Featured',
+    'Visibility in catalog', 'Tax status', 'Tax class', 'In stock?', 'Stock',
+    'Backorders allowed?', 'Sold individually?', 'Allow customer reviews?', 'Regular price',
+    'Categories', 'Tags', 'Images', 'Position'
+]
+
+# Columnas del CSV de productos (generado o exportado por WooCommerce) -> campos del importador
+WOO_PRODUCT_FIELDS = {
+    'SKU': 'sku',
+    'Title': 'name',
+    'Name': 'name',
+    'Description': 'description',
+    'Short description': 'short_description',
+    'Regular price': 'regular_price',
+    'Stock': 'stock',
+    'Categories': 'categories'
+}
+
+# Columnas del CSV de categorías WooCommerce, en orden
+WOO_CATEGORY_COLUMNS = ['Category ID', 'Category Name', 'Category Slug', 'Parent Category', 'Description']
+
+def text_column(df: pd.DataFrame, column: str) -> pd.Series:
+    """Columna como texto sin espacios en los extremos ('' si la columna no existe, 'nan' si falta el valor)"""
+    if column not in df.columns:
+        return pd.Series('', index=df.index, dtype=object)
+    return df[column].astype(object).where(df[column].notna(), 'nan').astype(str).str.strip()
+
+def present(values: pd.Series) -> pd.Series:
+    """Máscara de las filas con valor (ni vacío ni 'nan')"""
+    return (values != '') & (values != 'nan')
+
+def project_columns(df: pd.DataFrame, values: Dict[str, object], where: Optional[pd.Series] = None) -> pd.DataFrame:
+    """
+    Asigna columnas completas de una vez y devuelve un nuevo DataFrame.
+    Cada valor puede ser un escalar o una Series alineada con df. Con where solo se
+    asignan las filas marcadas: las demás conservan su valor, o quedan vacías si la
+    columna es nueva (los enteros pasan a Int64 para no escribirse como 1.0).
+    """
+    if where is not None and not where.any():
+        return df
+    df = df.copy()
+    for column, value in values.items():
+        if where is None or where.all():
+            df[column] = value
+            continue
+        series = value if isinstance(value, pd.Series) else pd.Series(value, index=df.index)
+        if pd.api.types.is_integer_dtype(series):
+            series = series.astype('Int64')
+        if column in df.columns:
+            df[column] = df[column].mask(where, series)
+        else:
+            df[column] = series.where(where)
+    return df
+
+def set_global_attribute(df: pd.DataFrame, number: int, name: str, values: pd.Series,
+                         where: Optional[pd.Series] = None) -> pd.DataFrame:
+    """Proyecta un atributo global de WooCommerce en las columnas 'Attribute N ...'"""
+    return project_columns(df, {
+        f'Attribute {number} name': name,
+        f'Attribute {number} value(s)': values,
+        f'Attribute {number} visible': 1,
+        f'Attribute {number} global': 1
+    }, where)
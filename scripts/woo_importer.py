@@ -3,15 +3,184 @@ WooCommerce Product Importer
 Handles direct database operations for product import and updates
 """
 
+from chunking import iter_chunks
 from db_connection import WordPressDB
+from config import IMAGE_CONFIG, IMPORT_CONFIG
+from slugs import SlugService, slugify
+from woo_columns import WOO_PRODUCT_FIELDS
 import pandas as pd
 from datetime import datetime
+from decimal import Decimal, InvalidOperation
+import hashlib
 import json
+import resource
+import sys
+import time
+
+# Prefijo de las categorías del proveedor que escribe generate_woo_products.py
+SUPPLIER_CATEGORY_PREFIX = 'StarCenter_'
+
+PRODUCT_GUID_BASE = "http://nopasi.local/?post_type=product&#038;p="
+
+# Campos que compara la sincronización diferencial
+POST_SYNC_FIELDS = ['post_title', 'post_content', 'post_excerpt']
+META_SYNC_FIELDS = ['_price', '_regular_price', '_stock', '_stock_status']
+NUMERIC_SYNC_FIELDS = {'_price', '_regular_price', '_stock'}
+
+# Columnas de wc_product_meta_lookup; el importador mantiene las que escribe en postmeta
+LOOKUP_COLUMNS = ['product_id', 'sku', 'virtual', 'downloadable', 'min_price', 'max_price', 'onsale',
+                  'stock_quantity', 'stock_status', 'rating_count', 'average_rating', 'total_sales',
+                  'tax_status', 'tax_class']
+LOOKUP_SYNC_COLUMNS = ['sku', 'min_price', 'max_price', 'stock_quantity', 'stock_status']
+# Metadatos que escribe la actualización de precio y stock
+STOCK_PRICE_FIELDS = ['_price', '_regular_price', '_stock', '_stock_status']
+
+def split_categories(value):
+    """
+    Separa la columna de categorías de WooCommerce ('A, B' o 'Padre > Hijo')
+    en los nombres de las categorías asignadas (la última de cada jerarquía)
+    """
+    if not value:
+        return []
+    return [part.split('>')[-1].strip() for part in str(value).split(',') if part.split('>')[-1].strip()]
+
+def lookup_number(value):
+    """Valor numérico de un meta para wc_product_meta_lookup (None si está vacío o no es un número)"""
+    value = '' if value is None else str(value).strip()
+    if not value:
+        return None
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        return None
+
+def meta_number(value):
+    """Número normalizado como texto de postmeta ('355.0' → '355'); None si está vacío o no es un número"""
+    number = lookup_number(value)
+    return None if number is None else format(number.normalize(), 'f')
+
+def stock_status(value):
+    """
+    _stock_status de una fila según su stock: vacío cuenta como 0 y se aceptan decimales ('3.0').
+    Lanza ValueError si el stock no es un número.
+    """
+    value = '' if value is None else str(value).strip()
+    if not value:
+        return 'outofstock'
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        raise ValueError(f"Stock no numérico: {value!r}")
+    if not number.is_finite():
+        raise ValueError(f"Stock no numérico: {value!r}")
+    return 'instock' if number > 0 else 'outofstock'
+
+def peak_rss_mb():
+    """Pico de memoria residente del proceso en MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa KB; macOS, bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def fill_missing_slugs(products, slugs):
+    """
+    Completa el slug de los productos que no lo traen a partir de su nombre.
+    Los slugs explícitos se reservan antes, para que ninguno generado coincida con ellos.
+    """
+    products = list(products)
+    for data in products:
+        if data.get('slug'):
+            slugs.reserve(data['slug'])
+    return [
+        data if data.get('slug') else {**data, 'slug': slugs.unique_slug(data.get('name', ''))}
+        for data in products
+    ]
 
 class WooCommerceImporter:
-    def __init__(self):
+    def __init__(self, preload_skus=True):
         self.db = WordPressDB()
         self.prefix = self.db.prefix
+        # Índice en memoria SKU -> ID de producto (y su inverso)
+        self.sku_index = None
+        self.sku_by_id = None
+        # Slugs de productos existentes, cargados solo si hay que generar alguno
+        self.slug_service = None
+        # Mapa de categorías product_cat (slug/nombre -> term_taxonomy_id), cargado una vez
+        self.category_map = None
+        self._unresolved_categories = set()
+        # Términos cuyo contador se recalcula al final de la importación
+        self._pending_recount = set()
+        self._tables = {}
+        if preload_skus:
+            self.refresh_sku_index()
+
+    def refresh_sku_index(self):
+        """Recarga el índice SKU -> ID con una única consulta sobre postmeta"""
+        query = f"""
+        SELECT pm.post_id, pm.meta_value AS sku
+        FROM {self.prefix}postmeta pm
+        JOIN {self.prefix}posts p ON p.ID = pm.post_id
+        WHERE pm.meta_key = '_sku'
+        AND p.post_type = 'product'
+        """
+        rows = self.db.fetch(query)
+        self.sku_index = {row['sku']: row['post_id'] for row in rows if row['sku']}
+        self.sku_by_id = {product_id: sku for sku, product_id in self.sku_index.items()}
+        return len(self.sku_index)
+
+    def invalidate_sku_index(self):
+        """Descarta el índice; se recarga en la próxima búsqueda"""
+        self.sku_index = None
+        self.sku_by_id = None
+
+    def find_product_id(self, sku):
+        """Devuelve el ID del producto con ese SKU (o None) usando el índice en memoria"""
+        if self.sku_index is None:
+            self.refresh_sku_index()
+        return self.sku_index.get(sku)
+
+    def _index_product(self, product_id, sku):
+        """Registra un producto recién creado en el índice"""
+        if self.sku_index is not None:
+            self.sku_index[sku] = product_id
+            self.sku_by_id[product_id] = sku
+
+    def _unindex_product(self, product_id):
+        """Quita un producto eliminado del índice"""
+        if self.sku_index is not None:
+            sku = self.sku_by_id.pop(product_id, None)
+            if sku is not None:
+                self.sku_index.pop(sku, None)
+
+    def load_slug_service(self):
+        """Carga los slugs de los productos existentes para generar slugs únicos"""
+        rows = self.db.fetch(f"""
+        SELECT post_name FROM {self.prefix}posts
+        WHERE post_type IN ('product', 'product_variation')
+        """)
+        self.slug_service = SlugService(row['post_name'] for row in rows if row['post_name'])
+        return self.slug_service
+
+    def _with_slugs(self, products):
+        """Completa el slug de los productos que no lo traen a partir de su nombre"""
+        products = list(products)
+        missing = any(not data.get('slug') for data in products)
+        if not missing and self.slug_service is None:
+            return products
+        return fill_missing_slugs(products, self.slug_service or self.load_slug_service())
+
+    def assign_new_slugs(self, products):
+        """
+        Genera en un solo lugar los slugs de los productos nuevos (SKU sin producto),
+        p. ej. antes de repartirlos entre workers que no comparten su SlugService.
+        Los productos existentes conservan su slug actual.
+        """
+        products = list(products)
+        if self.sku_index is None:
+            self.refresh_sku_index()
+        new = [index for index, data in enumerate(products) if data.get('sku') not in self.sku_index]
+        for index, data in zip(new, self._with_slugs(products[index] for index in new)):
+            products[index] = data
+        return products
 
     def get_product_by_sku(self, sku):
         """Busca un producto por SKU"""
@@ -23,22 +192,158 @@ class WooCommerceImporter:
         AND pm.meta_value = %s
         AND p.post_type = 'product'
         """
-        return self.db.execute_query(query, (sku,))
+        return self.db.fetch(query, (sku,))
 
     def get_product_categories(self, product_id):
         """Obtiene las categorías de un producto"""
-        query = f"""
-        SELECT t.term_id, t.name, t.slug
+        return self.get_categories_for_products([product_id]).get(product_id, [])
+
+    def get_categories_for_products(self, product_ids):
+        """Obtiene las categorías de muchos productos con una consulta por bloque: {ID: [categorías]}"""
+        categories = {}
+        for chunk in iter_chunks(sorted(set(product_ids)), IMPORT_CONFIG['purge_chunk_size']):
+            placeholders = ', '.join(['%s'] * len(chunk))
+            rows = self.db.fetch(f"""
+            SELECT tr.object_id, t.term_id, t.name, t.slug, tt.term_taxonomy_id
+            FROM {self.prefix}terms t
+            JOIN {self.prefix}term_taxonomy tt ON t.term_id = tt.term_id
+            JOIN {self.prefix}term_relationships tr ON tt.term_taxonomy_id = tr.term_taxonomy_id
+            WHERE tr.object_id IN ({placeholders})
+            AND tt.taxonomy = 'product_cat'
+            """, chunk)
+            for row in rows:
+                categories.setdefault(row.pop('object_id'), []).append(row)
+        return categories
+
+    def load_category_map(self):
+        """Carga en una consulta el mapa slug/nombre -> term_taxonomy_id de las categorías de producto"""
+        rows = self.db.fetch(f"""
+        SELECT t.name, t.slug, tt.term_taxonomy_id
         FROM {self.prefix}terms t
         JOIN {self.prefix}term_taxonomy tt ON t.term_id = tt.term_id
-        JOIN {self.prefix}term_relationships tr ON tt.term_taxonomy_id = tr.term_taxonomy_id
-        WHERE tr.object_id = %s
-        AND tt.taxonomy = 'product_cat'
+        WHERE tt.taxonomy = 'product_cat'
+        ORDER BY tt.term_taxonomy_id
+        """)
+        self.category_map = {'slug': {}, 'name': {}}
+        for row in rows:
+            self.category_map['slug'][row['slug']] = row['term_taxonomy_id']
+            # Con nombres repetidos se usa el término más antiguo
+            self.category_map['name'].setdefault(row['name'].strip().lower(), row['term_taxonomy_id'])
+        return self.category_map
+
+    def resolve_categories(self, value):
+        """
+        Convierte la columna de categorías de una fila ('Cat A, Cat B' o 'Padre > Hijo')
+        en term_taxonomy_ids. Cada categoría se busca por slug, por nombre y por el slug del nombre.
         """
-        return self.db.execute_query(query, (product_id,))
+        if self.category_map is None:
+            self.load_category_map()
+        tt_ids = set()
+        for category in split_categories(value):
+            tt_id = self._resolve_category(category)
+            if tt_id:
+                tt_ids.add(tt_id)
+            elif category not in self._unresolved_categories:
+                self._unresolved_categories.add(category)
+                print(f"Categoría no encontrada en WooCommerce: {category}")
+        return tt_ids
+
+    def _resolve_category(self, category):
+        """term_taxonomy_id de una categoría de la columna Categories (None si no existe)"""
+        if category.startswith(SUPPLIER_CATEGORY_PREFIX):
+            # 'StarCenter_<id>': término indicado en IMPORT_CONFIG['supplier_categories'] o 'starcenter-<id>'
+            supplier_id = category[len(SUPPLIER_CATEGORY_PREFIX):]
+            slug = IMPORT_CONFIG['supplier_categories'].get(supplier_id) or slugify(category)
+            return self.category_map['slug'].get(slug)
+        return (self.category_map['slug'].get(category)
+                or self.category_map['name'].get(category.lower())
+                or self.category_map['slug'].get(slugify(category)))
+
+    def _assign_categories(self, product_ids, chunk, new_products=False):
+        """
+        Escribe las relaciones producto -> categoría de un bloque: un INSERT IGNORE multi-fila
+        con las que faltan y, para productos existentes, un DELETE de las que ya no corresponden.
+        Solo se tocan los productos cuya fila trae la columna de categorías.
+        """
+        desired = {}
+        for product_id, data in zip(product_ids, chunk):
+            tt_ids = self.resolve_categories(data['categories']) if data.get('categories') else None
+            # Si ninguna categoría de la fila existe, se conservan las actuales
+            if tt_ids:
+                desired[product_id] = tt_ids
+        if not desired:
+            return
+        current = {} if new_products else {
+            product_id: {row['term_taxonomy_id'] for row in rows}
+            for product_id, rows in self.get_categories_for_products(desired).items()
+        }
+        missing = [(product_id, tt_id, 0) for product_id, tt_ids in desired.items()
+                   for tt_id in sorted(tt_ids - current.get(product_id, set()))]
+        stale = [(product_id, tt_id) for product_id, tt_ids in current.items()
+                 for tt_id in sorted(tt_ids - desired[product_id])]
+
+        with self.db.transaction():
+            if stale:
+                pairs = ', '.join(['(%s, %s)'] * len(stale))
+                self.db.execute(
+                    f"DELETE FROM {self.prefix}term_relationships WHERE (object_id, term_taxonomy_id) IN ({pairs})",
+                    [value for pair in stale for value in pair]
+                )
+            if missing:
+                self.db.execute(*self.db.multi_row_insert(
+                    'term_relationships', ['object_id', 'term_taxonomy_id', 'term_order'], missing, ignore=True
+                ))
+        self._pending_recount.update(tt_id for _, tt_id, _ in missing)
+        self._pending_recount.update(tt_id for _, tt_id in stale)
+
+    def flush_term_counts(self):
+        """Recalcula una sola vez el contador de los términos tocados desde la última llamada"""
+        pending, self._pending_recount = self._pending_recount, set()
+        return self.recount_terms(pending) if pending else 0
+
+    def _build_meta(self, data):
+        """Arma los metadatos iniciales de un producto nuevo"""
+        return {
+            '_sku': data['sku'],
+            '_price': data.get('price', ''),
+            '_regular_price': data.get('regular_price', ''),
+            '_stock': data.get('stock', ''),
+            '_stock_status': stock_status(data.get('stock')),
+            '_manage_stock': 'yes',
+            '_visibility': 'visible',
+            '_virtual': 'no',
+            '_downloadable': 'no',
+            '_product_version': '8.6.1'
+        }
+
+    def _lookup_row(self, product_id, meta):
+        """Fila de wc_product_meta_lookup a partir de los metadatos de un producto simple"""
+        price = lookup_number(meta.get('_price'))
+        return (
+            product_id, meta.get('_sku', ''), 0, 0, price, price, 0,
+            lookup_number(meta.get('_stock')), meta.get('_stock_status', 'instock'),
+            0, 0, 0, 'taxable', ''
+        )
+
+    def upsert_lookup(self, rows):
+        """
+        Escribe filas de wc_product_meta_lookup con INSERT ... ON DUPLICATE KEY UPDATE.
+        Solo se actualizan SKU, precios y stock: valoraciones, ventas, oferta e impuestos
+        los mantiene WooCommerce. Sin la tabla (WooCommerce < 3.6) no hace nada.
+        """
+        rows = list(rows)
+        if not rows or not self._table_exists('wc_product_meta_lookup'):
+            return 0
+        written = 0
+        for chunk in iter_chunks(rows, IMPORT_CONFIG['batch_size']):
+            written += self.db.execute(*self.db.multi_row_insert(
+                'wc_product_meta_lookup', LOOKUP_COLUMNS, chunk, update_columns=LOOKUP_SYNC_COLUMNS
+            ))
+        return written
 
     def create_product(self, data):
         """Crea un nuevo producto"""
+        data = self._with_slugs([data])[0]
         now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
         # Insertar el post principal del producto
@@ -53,7 +358,7 @@ class WooCommerceImporter:
         """
         
         # Generar GUID (URL del producto)
-        guid = f"http://nopasi.local/?post_type=product&#038;p="
+        guid = PRODUCT_GUID_BASE
         
         post_data = (
             now, now, 
@@ -65,50 +370,131 @@ class WooCommerceImporter:
             guid
         )
         
-        cursor = self.db.connection.cursor()
-        try:
-            cursor.execute(post_query, post_data)
-            self.db.connection.commit()
-            product_id = cursor.lastrowid
+        with self.db.transaction():
+            product_id = self.db.insert(post_query, post_data)
             
             # Actualizar GUID con el ID
             guid_update = f"""
             UPDATE {self.prefix}posts 
-            SET guid = CONCAT(%s, {product_id})
-            WHERE ID = {product_id}
+            SET guid = CONCAT(%s, ID)
+            WHERE ID = %s
             """
-            cursor.execute(guid_update, (guid,))
-            self.db.connection.commit()
+            self.db.execute(guid_update, (guid, product_id))
             
             # Insertar meta datos
-            meta_data = {
-                '_sku': data['sku'],
-                '_price': data.get('price', ''),
-                '_regular_price': data.get('regular_price', ''),
-                '_stock': data.get('stock', ''),
-                '_stock_status': 'instock' if int(data.get('stock', 0)) > 0 else 'outofstock',
-                '_manage_stock': 'yes',
-                '_visibility': 'visible',
-                '_virtual': 'no',
-                '_downloadable': 'no',
-                '_product_version': '8.6.1'
-            }
+            meta_data = self._build_meta(data)
             
             for key, value in meta_data.items():
                 meta_query = f"""
                 INSERT INTO {self.prefix}postmeta (post_id, meta_key, meta_value)
                 VALUES (%s, %s, %s)
                 """
-                cursor.execute(meta_query, (product_id, key, value))
+                self.db.execute(meta_query, (product_id, key, value))
             
-            self.db.connection.commit()
-            return product_id
-            
-        except Exception as e:
-            self.db.connection.rollback()
-            raise e
-        finally:
-            cursor.close()
+            self._assign_categories([product_id], [data], new_products=True)
+            self.upsert_lookup([self._lookup_row(product_id, meta_data)])
+        
+        self.flush_term_counts()
+        self._index_product(product_id, data['sku'])
+        return product_id
+
+    def create_products(self, products, batch_size=None, recount=True):
+        """
+        Crea productos en lote.
+        Cada bloque de batch_size productos se inserta en una sola transacción:
+        un INSERT multi-fila en posts, un UPDATE de GUIDs y un executemany
+        con todos los metadatos del bloque. Devuelve la lista de IDs creados.
+        Los productos sin slug reciben uno único generado a partir del nombre.
+        Con recount=False el contador de las categorías queda pendiente para flush_term_counts.
+        """
+        batch_size = batch_size or IMPORT_CONFIG['batch_size']
+        products = self._with_slugs(products)
+        product_ids = []
+        for start in range(0, len(products), batch_size):
+            product_ids.extend(self._create_products_chunk(products[start:start + batch_size]))
+        if recount:
+            self.flush_term_counts()
+        return product_ids
+
+    def _create_products_chunk(self, chunk):
+        """Inserta un bloque de productos en una única transacción"""
+        if not chunk:
+            return []
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+        row_placeholder = """(1, %s, %s, %s, %s, %s, 'publish', 'open', 'closed', %s,
+                %s, %s, 0, 'product', '', '', '', 0, '', '')"""
+        post_query = f"""
+        INSERT INTO {self.prefix}posts 
+        (post_author, post_date, post_date_gmt, post_content, post_title, 
+         post_excerpt, post_status, comment_status, ping_status, post_name, 
+         post_modified, post_modified_gmt, post_parent, post_type,
+         to_ping, pinged, post_content_filtered, menu_order, post_mime_type, guid)
+        VALUES {', '.join([row_placeholder] * len(chunk))}
+        """
+        post_data = []
+        for data in chunk:
+            post_data.extend((
+                now, now,
+                data.get('description', ''),
+                data['name'],
+                data.get('short_description', ''),
+                data['slug'],
+                now, now
+            ))
+
+        with self.db.transaction():
+            # En un INSERT multi-fila lastrowid es el ID de la primera fila;
+            # InnoDB reserva el rango consecutivo para el resto del bloque
+            first_id = self.db.insert(post_query, post_data)
+            product_ids = list(range(first_id, first_id + len(chunk)))
+
+            # Verificar que el rango corresponde a las filas insertadas
+            inserted = self.db.fetch(
+                f"SELECT ID, post_name FROM {self.prefix}posts WHERE ID BETWEEN %s AND %s ORDER BY ID",
+                (product_ids[0], product_ids[-1])
+            )
+            if [row['post_name'] for row in inserted] != [data['slug'] for data in chunk]:
+                raise RuntimeError(
+                    f"Los IDs autoincrementales {product_ids[0]}-{product_ids[-1]} no son consecutivos "
+                    "(revisar innodb_autoinc_lock_mode)"
+                )
+
+            # GUIDs calculados en el cliente, aplicados en un solo UPDATE
+            guid_cases = ' '.join(['WHEN %s THEN %s'] * len(product_ids))
+            guid_params = []
+            for product_id in product_ids:
+                guid_params.extend((product_id, f"{PRODUCT_GUID_BASE}{product_id}"))
+            self.db.execute(
+                f"""
+                UPDATE {self.prefix}posts
+                SET guid = CASE ID {guid_cases} END
+                WHERE ID BETWEEN %s AND %s
+                """,
+                guid_params + [product_ids[0], product_ids[-1]]
+            )
+
+            # Todos los metadatos del bloque en un único INSERT multi-fila
+            metas = [self._build_meta(data) for data in chunk]
+            meta_rows = [
+                (product_id, key, value)
+                for product_id, meta in zip(product_ids, metas)
+                for key, value in meta.items()
+            ]
+            self.db.executemany(
+                f"INSERT INTO {self.prefix}postmeta (post_id, meta_key, meta_value) VALUES (%s, %s, %s)",
+                meta_rows
+            )
+
+            # Relaciones con las categorías del bloque en un único INSERT IGNORE
+            self._assign_categories(product_ids, chunk, new_products=True)
+
+            # Fila de búsqueda de precio/stock de cada producto, en la misma transacción
+            self.upsert_lookup(self._lookup_row(product_id, meta) for product_id, meta in zip(product_ids, metas))
+
+        for product_id, data in zip(product_ids, chunk):
+            self._index_product(product_id, data['sku'])
+        return product_ids
 
     def update_product(self, product_id, data):
         """Actualiza un producto existente"""
@@ -132,78 +518,274 @@ class WooCommerceImporter:
             now,
             product_id
         )
-        self.db.execute_query(post_query, post_data)
         
         # Actualizar meta datos
         meta_data = {
             '_price': data.get('price', ''),
             '_regular_price': data.get('regular_price', ''),
             '_stock': data.get('stock', ''),
-            '_stock_status': 'instock' if int(data.get('stock', 0)) > 0 else 'outofstock'
+            '_stock_status': stock_status(data.get('stock'))
         }
         
-        for key, value in meta_data.items():
-            meta_query = f"""
-            UPDATE {self.prefix}postmeta 
-            SET meta_value = %s
-            WHERE post_id = %s AND meta_key = %s
-            """
-            self.db.execute_query(meta_query, (value, product_id, key))
+        with self.db.transaction():
+            self.db.execute(post_query, post_data)
+            for key, value in meta_data.items():
+                meta_query = f"""
+                UPDATE {self.prefix}postmeta 
+                SET meta_value = %s
+                WHERE post_id = %s AND meta_key = %s
+                """
+                self.db.execute(meta_query, (value, product_id, key))
+            self.upsert_lookup([self._lookup_row(product_id, {**meta_data, '_sku': data['sku']})])
         
         return True
 
     def delete_product(self, product_id):
-        """Elimina un producto y todos sus metadatos"""
+        """
+        Elimina un producto y todos sus metadatos. Los términos que pierden el producto
+        quedan pendientes de recuento (flush_term_counts).
+        """
         try:
-            # Eliminar metadatos
-            meta_query = f"""
-            DELETE FROM {self.prefix}postmeta 
-            WHERE post_id = %s
-            """
-            self.db.execute_query(meta_query, (product_id,))
-            
-            # Eliminar relaciones de términos (categorías, etiquetas, etc.)
-            term_query = f"""
-            DELETE FROM {self.prefix}term_relationships 
-            WHERE object_id = %s
-            """
-            self.db.execute_query(term_query, (product_id,))
-            
-            # Eliminar el post del producto
-            post_query = f"""
-            DELETE FROM {self.prefix}posts 
-            WHERE ID = %s AND post_type = 'product'
-            """
-            self.db.execute_query(post_query, (product_id,))
+            with self.db.transaction():
+                term_ids = [row['term_taxonomy_id'] for row in self.db.fetch(
+                    f"SELECT term_taxonomy_id FROM {self.prefix}term_relationships WHERE object_id = %s",
+                    (product_id,)
+                )]
+                # Eliminar metadatos
+                meta_query = f"""
+                DELETE FROM {self.prefix}postmeta 
+                WHERE post_id = %s
+                """
+                self.db.execute(meta_query, (product_id,))
+                
+                # Eliminar relaciones de términos (categorías, etiquetas, etc.)
+                term_query = f"""
+                DELETE FROM {self.prefix}term_relationships 
+                WHERE object_id = %s
+                """
+                self.db.execute(term_query, (product_id,))
+                
+                if self._table_exists('wc_product_meta_lookup'):
+                    self.db.execute(
+                        f"DELETE FROM {self.prefix}wc_product_meta_lookup WHERE product_id = %s",
+                        (product_id,)
+                    )
+                
+                # Eliminar el post del producto
+                post_query = f"""
+                DELETE FROM {self.prefix}posts 
+                WHERE ID = %s AND post_type = 'product'
+                """
+                self.db.execute(post_query, (product_id,))
+            self._unindex_product(product_id)
+            self._pending_recount.update(term_ids)
             
             return True
         except Exception as e:
             print(f"Error eliminando producto {product_id}: {str(e)}")
             return False
 
-    def delete_all_products(self):
+    def _table_exists(self, table):
+        """Indica si existe una tabla (sin prefijo) en la base actual"""
+        if table not in self._tables:
+            rows = self.db.fetch(
+                "SELECT COUNT(*) AS total FROM information_schema.tables "
+                "WHERE table_schema = DATABASE() AND table_name = %s",
+                (f"{self.prefix}{table}",)
+            )
+            self._tables[table] = bool(rows and rows[0]['total'])
+        return self._tables[table]
+
+    def recount_terms(self, term_taxonomy_ids):
+        """Recalcula wp_term_taxonomy.count de los términos indicados con una sentencia por bloque"""
+        term_taxonomy_ids = sorted(set(term_taxonomy_ids))
+        updated = 0
+        for chunk in iter_chunks(term_taxonomy_ids, IMPORT_CONFIG['purge_chunk_size']):
+            placeholders = ', '.join(['%s'] * len(chunk))
+            updated += self.db.execute(
+                f"""
+                UPDATE {self.prefix}term_taxonomy tt
+                SET tt.count = (
+                    SELECT COUNT(*)
+                    FROM {self.prefix}term_relationships tr
+                    JOIN {self.prefix}posts p ON p.ID = tr.object_id
+                    WHERE tr.term_taxonomy_id = tt.term_taxonomy_id
+                    AND p.post_status = 'publish'
+                )
+                WHERE tt.term_taxonomy_id IN ({placeholders})
+                """,
+                chunk
+            )
+        return updated
+
+    def rebuild_lookup_table(self, chunk_size=None):
+        """
+        Regenera wc_product_meta_lookup desde postmeta con sentencias por conjunto.
+        Cada bloque de chunk_size IDs es un INSERT ... SELECT agrupado por producto (una
+        transacción corta por bloque); los productos variables toman el precio mínimo y
+        máximo de sus variaciones. Al final elimina las filas de productos inexistentes.
+        Devuelve la cantidad de productos regenerados y de filas huérfanas eliminadas.
+        """
+        if not self._table_exists('wc_product_meta_lookup'):
+            raise RuntimeError(f"No existe la tabla {self.prefix}wc_product_meta_lookup (requiere WooCommerce 3.6+)")
+        chunk_size = chunk_size or IMPORT_CONFIG['lookup_chunk_size']
+        post_types = "'product', 'product_variation'"
+        meta_keys = ['_sku', '_virtual', '_downloadable', '_price', '_regular_price', '_sale_price', '_stock',
+                     '_stock_status', '_wc_review_count', '_wc_average_rating', 'total_sales',
+                     '_tax_status', '_tax_class']
+        meta = {key: f"MAX(CASE WHEN pm.meta_key = '{key}' THEN pm.meta_value END)" for key in meta_keys}
+
+        def number(key, kind='DECIMAL(19,4)'):
+            return f"CAST(NULLIF({meta[key]}, '') AS {kind})"
+
+        query = f"""
+        INSERT INTO {self.prefix}wc_product_meta_lookup ({', '.join(f'`{column}`' for column in LOOKUP_COLUMNS)})
+        SELECT p.ID,
+            COALESCE({meta['_sku']}, ''),
+            COALESCE({meta['_virtual']} = 'yes', 0),
+            COALESCE({meta['_downloadable']} = 'yes', 0),
+            COALESCE(v.min_price, {number('_price')}),
+            COALESCE(v.max_price, {number('_price')}),
+            COALESCE({number('_sale_price')} < {number('_regular_price')}, 0),
+            {number('_stock')},
+            COALESCE({meta['_stock_status']}, 'instock'),
+            COALESCE({number('_wc_review_count', 'SIGNED')}, 0),
+            COALESCE({number('_wc_average_rating', 'DECIMAL(3,2)')}, 0),
+            COALESCE({number('total_sales', 'SIGNED')}, 0),
+            COALESCE({meta['_tax_status']}, 'taxable'),
+            COALESCE({meta['_tax_class']}, '')
+        FROM {self.prefix}posts p
+        LEFT JOIN {self.prefix}postmeta pm
+            ON pm.post_id = p.ID AND pm.meta_key IN ({', '.join(f"'{key}'" for key in meta_keys)})
+        LEFT JOIN (
+            SELECT var.post_parent,
+                MIN(CAST(NULLIF(vm.meta_value, '') AS DECIMAL(19,4))) AS min_price,
+                MAX(CAST(NULLIF(vm.meta_value, '') AS DECIMAL(19,4))) AS max_price
+            FROM {self.prefix}posts var
+            JOIN {self.prefix}postmeta vm ON vm.post_id = var.ID AND vm.meta_key = '_price'
+            WHERE var.post_type = 'product_variation' AND var.post_parent BETWEEN %s AND %s
+            GROUP BY var.post_parent
+        ) v ON v.post_parent = p.ID
+        WHERE p.post_type IN ({post_types}) AND p.ID BETWEEN %s AND %s
+        GROUP BY p.ID, v.min_price, v.max_price
+        ON DUPLICATE KEY UPDATE {', '.join(f"`{column}` = VALUES(`{column}`)" for column in LOOKUP_COLUMNS[1:])}
+        """
+
+        product_ids = [row['ID'] for row in self.db.fetch(f"""
+        SELECT ID FROM {self.prefix}posts
+        WHERE post_type IN ({post_types})
+        ORDER BY ID
+        """)]
+        for chunk in iter_chunks(product_ids, chunk_size):
+            with self.db.transaction():
+                self.db.execute(query, (chunk[0], chunk[-1], chunk[0], chunk[-1]))
+
+        removed = self.db.execute(f"""
+        DELETE l FROM {self.prefix}wc_product_meta_lookup l
+        LEFT JOIN {self.prefix}posts p ON p.ID = l.product_id AND p.post_type IN ({post_types})
+        WHERE p.ID IS NULL
+        """)
+        return {'products': len(product_ids), 'removed': removed}
+
+    def _product_tables(self):
+        """Tablas con filas de productos y la columna con el ID del producto, posts al final"""
+        tables = [
+            ('postmeta', 'post_id'),
+            ('term_relationships', 'object_id')
+        ]
+        if self._table_exists('wc_product_meta_lookup'):
+            tables.append(('wc_product_meta_lookup', 'product_id'))
+        tables.append(('posts', 'ID'))
+        return tables
+
+    def delete_products(self, product_ids, chunk_size=None):
+        """
+        Elimina productos con sentencias por conjunto: postmeta, term_relationships,
+        wc_product_meta_lookup y posts con DELETE ... WHERE id IN (...) en bloques de
+        chunk_size IDs (una transacción corta por bloque). Los términos que pierden
+        productos quedan pendientes de recuento (flush_term_counts).
+        Devuelve la cantidad de filas eliminadas por tabla y los términos afectados.
+        """
+        chunk_size = chunk_size or IMPORT_CONFIG['purge_chunk_size']
+        tables = self._product_tables()
+        totals = {table: 0 for table, _ in tables}
+        affected_terms = set()
+        for chunk in iter_chunks(sorted(set(product_ids)), chunk_size):
+            placeholders = ', '.join(['%s'] * len(chunk))
+            with self.db.transaction():
+                chunk_terms = [row['term_taxonomy_id'] for row in self.db.fetch(
+                    f"SELECT DISTINCT term_taxonomy_id FROM {self.prefix}term_relationships "
+                    f"WHERE object_id IN ({placeholders})",
+                    chunk
+                )]
+                for table, column in tables:
+                    totals[table] += self.db.execute(
+                        f"DELETE FROM {self.prefix}{table} WHERE {column} IN ({placeholders})",
+                        chunk
+                    )
+            affected_terms.update(chunk_terms)
+            self._pending_recount.update(chunk_terms)
+            for product_id in chunk:
+                self._unindex_product(product_id)
+        return totals, affected_terms
+
+    def purge_products(self, chunk_size=None, dry_run=False):
+        """
+        Elimina todos los productos y variaciones con delete_products y recalcula
+        al final el contador de los términos afectados.
+        Con dry_run solo cuenta las filas que se eliminarían.
+        Devuelve la cantidad de filas por tabla.
+        """
+        post_types = "'product', 'product_variation'"
+
+        if dry_run:
+            totals = {}
+            for table, column in self._product_tables():
+                rows = self.db.fetch(f"""
+                SELECT COUNT(*) AS total
+                FROM {self.prefix}{table} t
+                JOIN {self.prefix}posts p ON p.ID = t.{column}
+                WHERE p.post_type IN ({post_types})
+                """)
+                totals[table] = rows[0]['total']
+            totals['terms_recounted'] = self.db.fetch(f"""
+            SELECT COUNT(DISTINCT tr.term_taxonomy_id) AS total
+            FROM {self.prefix}term_relationships tr
+            JOIN {self.prefix}posts p ON p.ID = tr.object_id
+            WHERE p.post_type IN ({post_types})
+            """)[0]['total']
+            return totals
+
+        product_ids = [row['ID'] for row in self.db.fetch(f"""
+        SELECT ID FROM {self.prefix}posts
+        WHERE post_type IN ({post_types})
+        ORDER BY ID
+        """)]
+        totals, affected_terms = self.delete_products(product_ids, chunk_size)
+        self.flush_term_counts()
+        totals['terms_recounted'] = len(affected_terms)
+        self.invalidate_sku_index()
+        return totals
+
+    def delete_all_products(self, chunk_size=None, dry_run=False):
         """Elimina todos los productos de WooCommerce"""
         try:
-            # Obtener todos los IDs de productos
-            query = f"""
-            SELECT ID 
-            FROM {self.prefix}posts 
-            WHERE post_type = 'product'
-            """
-            products = self.db.execute_query(query)
+            totals = self.purge_products(chunk_size=chunk_size, dry_run=dry_run)
             
-            if not products:
+            if not totals['posts']:
                 print("No se encontraron productos para eliminar")
                 return 0
             
-            count = 0
-            for product in products:
-                if self.delete_product(product['ID']):
-                    count += 1
-                    print(f"Producto {product['ID']} eliminado correctamente")
+            for table, count in totals.items():
+                if table != 'terms_recounted':
+                    print(f"{table}: {count} filas{' a eliminar' if dry_run else ' eliminadas'}")
+            print(f"Términos {'a recontar' if dry_run else 'recontados'}: {totals['terms_recounted']}")
             
-            print(f"Se eliminaron {count} productos en total")
-            return count
+            if dry_run:
+                print(f"Se eliminarían {totals['posts']} productos y variaciones")
+            else:
+                print(f"Se eliminaron {totals['posts']} productos en total")
+            return totals['posts']
             
         except Exception as e:
             print(f"Error eliminando productos: {str(e)}")
@@ -211,34 +793,537 @@ class WooCommerceImporter:
 
     def import_product(self, data):
         """Importa o actualiza un producto"""
-        existing_product = self.get_product_by_sku(data['sku'])
+        product_id = self.find_product_id(data['sku'])
         
-        if existing_product:
+        if product_id:
             print(f"Actualizando producto existente: {data['name']}")
-            return self.update_product(existing_product[0]['ID'], data)
+            return self.update_product(product_id, data)
         else:
             print(f"Creando nuevo producto: {data['name']}")
             return self.create_product(data)
 
+    def import_products(self, products, batch_size=None, on_chunk=None):
+        """
+        Importa o actualiza productos en bloques.
+        Decide alta o actualización con el índice de SKUs, sin consultas por fila;
+        las altas de cada bloque se crean con create_products. Las relaciones con
+        categorías se escriben por bloque y los contadores se recalculan al final.
+        on_chunk(filas, resumen) se invoca después de escribir cada bloque.
+        """
+        batch_size = batch_size or IMPORT_CONFIG['batch_size']
+        summary = {'created': 0, 'updated': 0, 'errors': 0, 'category_errors': 0}
+        if self.sku_index is None:
+            self.refresh_sku_index()
+
+        for chunk in iter_chunks(products, batch_size):
+            self._import_chunk(chunk, summary)
+            if on_chunk:
+                on_chunk(len(chunk), summary)
+        # Contadores de categorías una sola vez por importación
+        self.flush_term_counts()
+        return summary
+
+    def _import_chunk(self, chunk, summary):
+        """Separa un bloque en altas y actualizaciones y las aplica"""
+        new_products = {}
+        updated = {}
+        for data in chunk:
+            if not data.get('sku'):
+                summary['errors'] += 1
+                print(f"Producto sin SKU omitido: {data.get('name', '')}")
+                continue
+            product_id = self.sku_index.get(data['sku'])
+            if product_id:
+                try:
+                    self.update_product(product_id, data)
+                    summary['updated'] += 1
+                    updated[product_id] = data
+                except Exception as e:
+                    summary['errors'] += 1
+                    print(f"Error actualizando producto {data['sku']}: {str(e)}")
+            else:
+                # Si el SKU se repite dentro del bloque, prevalece la última fila
+                new_products[data['sku']] = data
+
+        self._assign_chunk_categories(updated, summary)
+
+        self._create_chunk_products(new_products.values(), summary)
+
+    def _create_chunk_products(self, products, summary):
+        """
+        Crea los productos nuevos de un bloque. Las filas cuyos metadatos no se pueden armar
+        (p. ej. stock no numérico) se cuentan como error y se omiten antes del INSERT en lote,
+        para que una fila inválida no haga fallar el bloque completo.
+        """
+        valid = []
+        for data in products:
+            try:
+                self._build_meta(data)
+            except (KeyError, ValueError) as e:
+                summary['errors'] += 1
+                print(f"Error preparando producto {data['sku']}: {str(e)}")
+                continue
+            valid.append(data)
+        if not valid:
+            return
+        try:
+            summary['created'] += len(self.create_products(valid, recount=False))
+        except Exception as e:
+            summary['errors'] += len(valid)
+            print(f"Error creando bloque de {len(valid)} productos: {str(e)}")
+
+    def _assign_chunk_categories(self, products, summary):
+        """
+        Actualiza las categorías de los productos existentes de un bloque ({ID: fila}).
+        Los fallos se cuentan aparte: esos productos ya figuran como actualizados o sin cambios.
+        """
+        if not products:
+            return
+        try:
+            self._assign_categories(list(products), list(products.values()))
+        except Exception as e:
+            summary['category_errors'] += len(products)
+            print(f"Error asignando categorías a {len(products)} productos: {str(e)}")
+
+    def fetch_product_state(self):
+        """Obtiene en una sola consulta título, contenido, extracto, precios y stock de todos los productos"""
+        meta_columns = ',\n            '.join(
+            f"MAX(CASE WHEN pm.meta_key = '{key}' THEN pm.meta_value END) AS {key}"
+            for key in META_SYNC_FIELDS
+        )
+        meta_keys = ', '.join(f"'{key}'" for key in META_SYNC_FIELDS)
+        query = f"""
+        SELECT p.ID, p.post_title, p.post_content, p.post_excerpt,
+            {meta_columns}
+        FROM {self.prefix}posts p
+        LEFT JOIN {self.prefix}postmeta pm
+            ON pm.post_id = p.ID AND pm.meta_key IN ({meta_keys})
+        WHERE p.post_type = 'product'
+        GROUP BY p.ID
+        """
+        rows = self.db.fetch(query)
+        return {row['ID']: row for row in rows}
+
+    def _product_state(self, data):
+        """Estado deseado de un producto según la fila de entrada"""
+        return {
+            'post_title': data['name'],
+            'post_content': data.get('description', ''),
+            'post_excerpt': data.get('short_description', ''),
+            '_price': data.get('price', ''),
+            '_regular_price': data.get('regular_price', ''),
+            '_stock': data.get('stock', ''),
+            '_stock_status': stock_status(data.get('stock'))
+        }
+
+    @staticmethod
+    def _normalize_state_value(field, value):
+        """Normaliza un valor para compararlo (p. ej. '355.0' y '355' son iguales)"""
+        value = '' if value is None else str(value).strip()
+        if field in NUMERIC_SYNC_FIELDS and value:
+            try:
+                return format(Decimal(value).normalize(), 'f')
+            except InvalidOperation:
+                return value
+        return value
+
+    def _state_hash(self, state):
+        """Hash de contenido de un producto sobre los campos sincronizados"""
+        normalized = [self._normalize_state_value(field, state.get(field))
+                      for field in POST_SYNC_FIELDS + META_SYNC_FIELDS]
+        return hashlib.sha1(json.dumps(normalized).encode('utf-8')).hexdigest()
+
+    def sync_products(self, products, batch_size=None, delete_missing=False, on_chunk=None, owns_sku=None):
+        """
+        Sincronización diferencial: solo escribe los productos que cambiaron.
+        Compara el hash de contenido de cada fila con el estado actual (leído en bloque)
+        y actualiza únicamente los campos distintos. Con delete_missing elimina en bloque
+        (delete_products) los productos cuyo SKU no aparece en la entrada (limitado a los SKUs para los
+        que owns_sku devuelve True, si se indica, p. ej. la partición de un worker).
+        Devuelve un resumen con los productos creados, actualizados, sin cambios y eliminados.
+        """
+        batch_size = batch_size or IMPORT_CONFIG['batch_size']
+        summary = {'created': 0, 'updated': 0, 'unchanged': 0, 'deleted': 0, 'errors': 0, 'category_errors': 0}
+        self.refresh_sku_index()
+        current_state = self.fetch_product_state()
+        seen_skus = set()
+
+        for chunk in iter_chunks(products, batch_size):
+            self._sync_chunk(chunk, current_state, seen_skus, summary)
+            if on_chunk:
+                on_chunk(len(chunk), summary)
+
+        if delete_missing:
+            missing = [product_id for sku, product_id in self.sku_index.items()
+                       if sku not in seen_skus and not (owns_sku and not owns_sku(sku))]
+            try:
+                self.delete_products(missing)
+            except Exception as e:
+                summary['errors'] += 1
+                print(f"Error eliminando productos ausentes: {str(e)}")
+            # Los bloques confirmados ya salieron del índice
+            summary['deleted'] += sum(1 for product_id in missing if product_id not in self.sku_by_id)
+
+        self.flush_term_counts()
+        return summary
+
+    def _sync_chunk(self, chunk, current_state, seen_skus, summary):
+        """Clasifica un bloque en altas, cambios y filas sin cambios y aplica las escrituras"""
+        new_products = {}
+        changes = []
+        lookup_rows = []
+        existing = {}
+        for data in chunk:
+            if not data.get('sku'):
+                summary['errors'] += 1
+                print(f"Producto sin SKU omitido: {data.get('name', '')}")
+                continue
+            seen_skus.add(data['sku'])
+            product_id = self.sku_index.get(data['sku'])
+            if not product_id:
+                new_products[data['sku']] = data
+                continue
+            # Las categorías se concilian aunque el contenido no haya cambiado (sin escrituras si coinciden)
+            existing[product_id] = data
+
+            try:
+                desired = self._product_state(data)
+            except (KeyError, ValueError) as e:
+                summary['errors'] += 1
+                print(f"Error preparando producto {data['sku']}: {str(e)}")
+                continue
+            current = current_state.get(product_id, {})
+            if self._state_hash(desired) == self._state_hash(current):
+                summary['unchanged'] += 1
+                continue
+
+            changed = {
+                field: value for field, value in desired.items()
+                if self._normalize_state_value(field, value) != self._normalize_state_value(field, current.get(field))
+            }
+            changes.append((product_id, changed))
+            current_state[product_id] = {**current, **desired}
+            if any(key in changed for key in META_SYNC_FIELDS):
+                lookup_rows.append(self._lookup_row(product_id, {**desired, '_sku': data['sku']}))
+
+        if changes:
+            try:
+                self._apply_changes(changes, lookup_rows)
+                summary['updated'] += len(changes)
+            except Exception as e:
+                summary['errors'] += len(changes)
+                print(f"Error actualizando bloque de {len(changes)} productos: {str(e)}")
+
+        self._assign_chunk_categories(existing, summary)
+
+        self._create_chunk_products(new_products.values(), summary)
+
+    def sync_stock_prices(self, updates, batch_size=None):
+        """
+        Actualiza solo precio y stock de productos existentes a partir de tuplas (sku, precio, stock).
+        Los IDs se resuelven con el índice de SKUs (una consulta); los valores se cargan en una
+        tabla temporal y postmeta (_price, _regular_price, _stock, _stock_status) y
+        wc_product_meta_lookup se actualizan con un UPDATE ... JOIN cada uno, en una transacción
+        corta. Solo se escriben las filas cuyo valor cambia; un precio o stock vacío deja el actual.
+        Si un SKU se repite prevalece la última tupla.
+        Devuelve un resumen con los SKUs recibidos, encontrados y desconocidos y las filas actualizadas.
+        """
+        batch_size = batch_size or IMPORT_CONFIG['batch_size']
+        summary = {'received': 0, 'matched': 0, 'unknown': 0, 'meta_updated': 0, 'lookup_updated': 0}
+        # Índice fresco en cada ejecución: otro proceso pudo crear o eliminar productos
+        self.refresh_sku_index()
+        rows = {}
+        for sku, price, stock in updates:
+            summary['received'] += 1
+            product_id = self.sku_index.get('' if sku is None else str(sku).strip())
+            if not product_id:
+                summary['unknown'] += 1
+                continue
+            price, stock = meta_number(price), meta_number(stock)
+            stock_status = None if stock is None else ('instock' if Decimal(stock) > 0 else 'outofstock')
+            rows[product_id] = (product_id, price, stock, stock_status, price, stock)
+        summary['matched'] = len(rows)
+        if not rows:
+            return summary
+
+        table = f"{self.prefix}stock_price_sync"
+        new_value = """CASE pm.meta_key
+            WHEN '_price' THEN COALESCE(t.price, pm.meta_value)
+            WHEN '_regular_price' THEN COALESCE(t.price, pm.meta_value)
+            WHEN '_stock' THEN COALESCE(t.stock, pm.meta_value)
+            ELSE COALESCE(t.stock_status, pm.meta_value)
+        END"""
+        with self.db.transaction():
+            # La tabla temporal es de la conexión de la transacción; no provoca commit implícito
+            self.db.execute(f"DROP TEMPORARY TABLE IF EXISTS {table}")
+            self.db.execute(f"""
+            CREATE TEMPORARY TABLE {table} (
+                product_id BIGINT UNSIGNED NOT NULL PRIMARY KEY,
+                price VARCHAR(32) NULL,
+                stock VARCHAR(32) NULL,
+                stock_status VARCHAR(20) NULL,
+                price_num DECIMAL(19,4) NULL,
+                stock_num DOUBLE NULL
+            )
+            """)
+            try:
+                for chunk in iter_chunks(rows.values(), batch_size):
+                    self.db.execute(*self.db.multi_row_insert(
+                        'stock_price_sync',
+                        ['product_id', 'price', 'stock', 'stock_status', 'price_num', 'stock_num'],
+                        chunk
+                    ))
+                summary['meta_updated'] = self.db.execute(f"""
+                UPDATE {self.prefix}postmeta pm
+                JOIN {table} t ON t.product_id = pm.post_id
+                SET pm.meta_value = {new_value}
+                WHERE pm.meta_key IN ({', '.join(f"'{key}'" for key in STOCK_PRICE_FIELDS)})
+                AND NOT (pm.meta_value <=> {new_value})
+                """)
+                if self._table_exists('wc_product_meta_lookup'):
+                    summary['lookup_updated'] = self.db.execute(f"""
+                    UPDATE {self.prefix}wc_product_meta_lookup l
+                    JOIN {table} t ON t.product_id = l.product_id
+                    SET l.min_price = COALESCE(t.price_num, l.min_price),
+                        l.max_price = COALESCE(t.price_num, l.max_price),
+                        l.stock_quantity = COALESCE(t.stock_num, l.stock_quantity),
+                        l.stock_status = COALESCE(t.stock_status, l.stock_status)
+                    """)
+            finally:
+                self.db.execute(f"DROP TEMPORARY TABLE IF EXISTS {table}")
+        return summary
+
+    def _apply_changes(self, changes, lookup_rows=()):
+        """Aplica en una transacción solo los campos modificados de cada producto y sus filas de búsqueda"""
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        meta_query = f"""
+        UPDATE {self.prefix}postmeta
+        SET meta_value = %s
+        WHERE post_id = %s AND meta_key = %s
+        """
+        meta_rows = []
+        with self.db.transaction():
+            for product_id, changed in changes:
+                post_fields = [field for field in POST_SYNC_FIELDS if field in changed]
+                if post_fields:
+                    assignments = ', '.join(f"{field} = %s" for field in post_fields)
+                    self.db.execute(
+                        f"""
+                        UPDATE {self.prefix}posts
+                        SET {assignments}, post_modified = %s, post_modified_gmt = %s
+                        WHERE ID = %s
+                        """,
+                        [changed[field] for field in post_fields] + [now, now, product_id]
+                    )
+                meta_rows.extend(
+                    (changed[key], product_id, key) for key in META_SYNC_FIELDS if key in changed
+                )
+            self.db.executemany(meta_query, meta_rows)
+            self.upsert_lookup(lookup_rows)
+
+    def get_attachments_by_file(self):
+        """Adjuntos existentes por archivo relativo a uploads (_wp_attached_file) -> ID"""
+        rows = self.db.fetch(f"""
+        SELECT pm.post_id, pm.meta_value AS file
+        FROM {self.prefix}postmeta pm
+        JOIN {self.prefix}posts p ON p.ID = pm.post_id
+        WHERE pm.meta_key = '_wp_attached_file'
+        AND p.post_type = 'attachment'
+        """)
+        return {row['file']: row['post_id'] for row in rows if row['file']}
+
+    def create_attachments(self, files, batch_size=None):
+        """
+        Crea en bloque los posts de adjunto de imágenes ya guardadas en uploads.
+        files es una lista de diccionarios con 'file' (ruta relativa AAAA/MM/nombre),
+        'mime', 'title' y 'parent' (producto al que se sube). Cada bloque es un INSERT
+        multi-fila en posts y otro con los _wp_attached_file, en una transacción.
+        Devuelve {archivo: ID de adjunto}.
+        """
+        batch_size = batch_size or IMPORT_CONFIG['batch_size']
+        files = list(files)
+        if not files:
+            return {}
+        # Los slugs de adjuntos no pueden coincidir con los de ningún otro post
+        slugs = SlugService(row['post_name'] for row in self.db.fetch(
+            f"SELECT post_name FROM {self.prefix}posts WHERE post_name <> ''"
+        ))
+        attachment_ids = {}
+        for chunk in iter_chunks(files, batch_size):
+            chunk = [{**data, 'slug': slugs.unique_slug(data['title'])} for data in chunk]
+            attachment_ids.update(self._create_attachments_chunk(chunk))
+        return attachment_ids
+
+    def _create_attachments_chunk(self, chunk):
+        """Inserta un bloque de adjuntos en una única transacción"""
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        row_placeholder = """(1, %s, %s, '', %s, '', 'inherit', 'open', 'closed', %s,
+                %s, %s, %s, 'attachment', '', '', '', 0, %s, %s)"""
+        post_query = f"""
+        INSERT INTO {self.prefix}posts
+        (post_author, post_date, post_date_gmt, post_content, post_title,
+         post_excerpt, post_status, comment_status, ping_status, post_name,
+         post_modified, post_modified_gmt, post_parent, post_type,
+         to_ping, pinged, post_content_filtered, menu_order, post_mime_type, guid)
+        VALUES {', '.join([row_placeholder] * len(chunk))}
+        """
+        post_data = []
+        for data in chunk:
+            post_data.extend((
+                now, now,
+                data['title'],
+                data['slug'],
+                now, now,
+                data.get('parent') or 0,
+                data['mime'],
+                IMAGE_CONFIG['uploads_url'] + data['file']
+            ))
+
+        with self.db.transaction():
+            first_id = self.db.insert(post_query, post_data)
+            attachment_ids = list(range(first_id, first_id + len(chunk)))
+            inserted = self.db.fetch(
+                f"SELECT ID, post_name FROM {self.prefix}posts WHERE ID BETWEEN %s AND %s ORDER BY ID",
+                (attachment_ids[0], attachment_ids[-1])
+            )
+            if [row['post_name'] for row in inserted] != [data['slug'] for data in chunk]:
+                raise RuntimeError(
+                    f"Los IDs autoincrementales {attachment_ids[0]}-{attachment_ids[-1]} no son consecutivos "
+                    "(revisar innodb_autoinc_lock_mode)"
+                )
+            self.db.executemany(
+                f"INSERT INTO {self.prefix}postmeta (post_id, meta_key, meta_value) VALUES (%s, %s, %s)",
+                [(attachment_id, '_wp_attached_file', data['file'])
+                 for attachment_id, data in zip(attachment_ids, chunk)]
+            )
+        return {data['file']: attachment_id for attachment_id, data in zip(attachment_ids, chunk)}
+
+    def set_product_images(self, images, batch_size=None):
+        """
+        Vincula imágenes a productos a partir de {ID de producto: [IDs de adjuntos]}:
+        la primera es la imagen destacada (_thumbnail_id) y el resto la galería
+        (_product_image_gallery). Reemplaza los valores previos con un DELETE y un
+        INSERT multi-fila por bloque, en una transacción cada uno.
+        """
+        batch_size = batch_size or IMPORT_CONFIG['batch_size']
+        linked = 0
+        for chunk in iter_chunks([(product_id, ids) for product_id, ids in images.items() if ids], batch_size):
+            meta_rows = []
+            for product_id, attachment_ids in chunk:
+                meta_rows.append((product_id, '_thumbnail_id', str(attachment_ids[0])))
+                if len(attachment_ids) > 1:
+                    meta_rows.append((product_id, '_product_image_gallery', ','.join(map(str, attachment_ids[1:]))))
+            self._replace_meta([product_id for product_id, _ in chunk],
+                               ['_thumbnail_id', '_product_image_gallery'], meta_rows)
+            linked += len(chunk)
+        return linked
+
+    def set_attachment_metadata(self, metadata, batch_size=None):
+        """
+        Escribe _wp_attachment_metadata a partir de {ID de adjunto: valor ya serializado},
+        reemplazando el valor previo con un DELETE y un INSERT multi-fila por bloque.
+        """
+        batch_size = batch_size or IMPORT_CONFIG['batch_size']
+        written = 0
+        for chunk in iter_chunks(metadata.items(), batch_size):
+            self._replace_meta([attachment_id for attachment_id, _ in chunk], ['_wp_attachment_metadata'],
+                               [(attachment_id, '_wp_attachment_metadata', value) for attachment_id, value in chunk])
+            written += len(chunk)
+        return written
+
+    def _replace_meta(self, post_ids, meta_keys, meta_rows):
+        """Reemplaza en una transacción los metadatos meta_keys de los posts por meta_rows"""
+        placeholders = ', '.join(['%s'] * len(post_ids))
+        keys = ', '.join(f"'{key}'" for key in meta_keys)
+        with self.db.transaction():
+            self.db.execute(
+                f"""
+                DELETE FROM {self.prefix}postmeta
+                WHERE post_id IN ({placeholders})
+                AND meta_key IN ({keys})
+                """,
+                post_ids
+            )
+            self.db.executemany(
+                f"INSERT INTO {self.prefix}postmeta (post_id, meta_key, meta_value) VALUES (%s, %s, %s)",
+                meta_rows
+            )
+
     def close(self):
         """Cierra la conexión a la base de datos"""
         self.db.close()
 
+def product_from_csv_row(row):
+    """
+    Campos del importador de una fila del CSV. Acepta los encabezados de WooCommerce
+    (SKU, Title/Name, Regular price, Categories...) además de los nombres propios
+    (sku, name, price...); el precio activo es el regular si la fila no trae price.
+    """
+    data = dict(row)
+    for column, field in WOO_PRODUCT_FIELDS.items():
+        if column in row and not data.get(field):
+            data[field] = row[column]
+    if not data.get('price') and data.get('regular_price'):
+        data['price'] = data['regular_price']
+    return data
+
+def iter_csv_products(csv_file, chunksize=None):
+    """
+    Lee el CSV por bloques de chunksize filas y devuelve cada fila como diccionario
+    de campos del importador (ver product_from_csv_row).
+    Los valores se leen como texto y los vacíos se normalizan a '' por columna,
+    así la memoria queda acotada por el tamaño del bloque y no por el del archivo.
+    """
+    chunksize = chunksize or IMPORT_CONFIG['csv_chunksize']
+    for chunk in pd.read_csv(csv_file, chunksize=chunksize, dtype=str):
+        for row in chunk.fillna('').to_dict('records'):
+            yield product_from_csv_row(row)
+
 # Función de ayuda para importar desde CSV
-def import_products_from_csv(csv_file):
-    """Importa productos desde un archivo CSV"""
+def import_products_from_csv(csv_file, delta=False, delete_missing=False, chunksize=None, batch_size=None):
+    """
+    Importa productos desde un archivo CSV, procesándolo por bloques
+    Args:
+        csv_file: Archivo CSV con los productos
+        delta: Si es True solo escribe los productos y campos que cambiaron
+        delete_missing: En modo delta, elimina los productos ausentes del CSV
+        chunksize: Filas por bloque de lectura del CSV (por defecto IMPORT_CONFIG['csv_chunksize'])
+        batch_size: Filas por transacción de escritura (por defecto IMPORT_CONFIG['batch_size'])
+    Returns:
+        Resumen de la importación, con las métricas de conexión en 'db'
+    """
+    chunksize = chunksize or IMPORT_CONFIG['csv_chunksize']
     importer = WooCommerceImporter()
-    df = pd.read_csv(csv_file)
+    rows = iter_csv_products(csv_file, chunksize)
+    progress = {'chunks': 0, 'rows': 0, 'started': time.perf_counter()}
+    progress['last'] = progress['started']
     
-    for _, row in df.iterrows():
-        # Convertir la fila a diccionario y limpiar los datos
-        product_data = row.to_dict()
-        product_data = {k: str(v) if not pd.isna(v) else '' for k, v in product_data.items()}
-        
-        try:
-            importer.import_product(product_data)
-        except Exception as e:
-            print(f"Error importando producto {product_data.get('sku', 'Unknown SKU')}: {str(e)}")
+    def report_chunk(row_count, summary):
+        now = time.perf_counter()
+        progress['chunks'] += 1
+        progress['rows'] += row_count
+        elapsed = now - progress['last']
+        progress['last'] = now
+        rate = row_count / elapsed if elapsed > 0 else 0
+        print(f"Bloque {progress['chunks']}: {row_count} filas ({rate:.0f} filas/s), "
+              f"total {progress['rows']}, pico de memoria {peak_rss_mb():.1f} MB")
     
-    importer.close()
+    try:
+        if delta:
+            summary = importer.sync_products(rows, batch_size=batch_size, delete_missing=delete_missing,
+                                             on_chunk=report_chunk)
+            print(f"Creados: {summary['created']}, actualizados: {summary['updated']}, "
+                  f"sin cambios: {summary['unchanged']}, eliminados: {summary['deleted']}, "
+                  f"errores: {summary['errors']}, errores de categorías: {summary['category_errors']}")
+        else:
+            summary = importer.import_products(rows, batch_size=batch_size, on_chunk=report_chunk)
+            print(f"Creados: {summary['created']}, actualizados: {summary['updated']}, errores: {summary['errors']}, "
+                  f"errores de categorías: {summary['category_errors']}")
+        summary['db'] = importer.db.get_stats()
+    finally:
+        importer.close()
+    elapsed = time.perf_counter() - progress['started']
+    if elapsed > 0:
+        print(f"{progress['rows']} filas en {elapsed:.1f} s ({progress['rows'] / elapsed:.0f} filas/s)")
     print("Importación completada")
+    return summary